@@ -0,0 +1,151 @@
+"""
+Benchmark the cold start of the server process
+
+Every stdio session launches a fresh interpreter, so import time is paid on
+every connection before the first tool call. This runs
+`python -X importtime -c "import submagic_mcp"` in fresh subprocesses and
+reports the median import time of the package, the part spent in its own
+modules (tool registration, model classes) and the slowest dependencies.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --top 15
+    python benchmarks/bench_startup.py --output startup.json
+    python benchmarks/bench_startup.py --baseline startup.json --max-regression 0.2
+
+With --baseline, the run exits non-zero if the median total or own import
+time grew by more than --max-regression (a fraction) compared with the saved
+results.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+PACKAGE = "submagic_mcp"
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# "import time:       self [us] |  cumulative | imported package"
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+# Metrics checked against --baseline
+TRACKED = ("import_ms", "own_ms")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """(module, self_us, cumulative_us, depth) for every line of -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2)), depth))
+    return rows
+
+
+def direct_imports(rows: List[Tuple[str, int, int, int]]) -> List[Tuple[str, int]]:
+    """(module, cumulative_us) of the modules the package itself imported first"""
+    index = next((i for i, row in enumerate(rows) if row[0] == PACKAGE), None)
+    if index is None:
+        return []
+    # A module is printed after everything it imports, so the package's
+    # children are the depth-1 lines right above it
+    children = []
+    for name, _, cumulative, depth in reversed(rows[:index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((name, cumulative))
+    return children
+
+
+def measure_once() -> Dict[str, Any]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = SRC + os.pathsep + env.get("PYTHONPATH", "")
+    env.setdefault("SUBMAGIC_API_KEY", "sk-benchmark")
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {PACKAGE}"],
+        capture_output=True, text=True, env=env, check=False,
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise SystemExit(f"import {PACKAGE} failed:\n{result.stderr[-2000:]}")
+    rows = parse_importtime(result.stderr)
+    total = next((cumulative for name, _, cumulative, _ in rows if name == PACKAGE), 0)
+    own = sum(self_us for name, self_us, _, _ in rows if name == PACKAGE or name.startswith(PACKAGE + "."))
+    return {"wall_ms": wall * 1000, "import_ms": total / 1000, "own_ms": own / 1000, "rows": rows}
+
+
+def run_benchmark(runs: int, top: int) -> Dict[str, Any]:
+    measure_once()  # warm-up: writes bytecode caches so every timed run is comparable
+    samples = [measure_once() for _ in range(runs)]
+    report: Dict[str, Any] = {"runs": runs, "python": sys.version.split()[0]}
+    for key in ("wall_ms", "import_ms", "own_ms"):
+        values = [sample[key] for sample in samples]
+        report[key] = round(statistics.median(values), 2)
+        report[f"{key}_min"] = round(min(values), 2)
+    median_run = sorted(samples, key=lambda sample: sample["import_ms"])[len(samples) // 2]
+    slowest = sorted(direct_imports(median_run["rows"]), key=lambda row: row[1], reverse=True)[:top]
+    report["slowest_imports"] = [{"module": name, "cumulative_ms": round(us / 1000, 2)} for name, us in slowest]
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"Cold start of {PACKAGE} (median of {report['runs']} runs, Python {report['python']})")
+    print(f"  process wall time   {report['wall_ms']:>9.1f} ms (min {report['wall_ms_min']:.1f})")
+    print(f"  import {PACKAGE:<12} {report['import_ms']:>9.1f} ms (min {report['import_ms_min']:.1f})")
+    print(f"  own modules         {report['own_ms']:>9.1f} ms (min {report['own_ms_min']:.1f})")
+    print("\nSlowest imports:")
+    for row in report["slowest_imports"]:
+        print(f"  {row['module']:<40} {row['cumulative_ms']:>9.1f} ms")
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Descriptions of every tracked metric that regressed past the threshold"""
+    regressions = []
+    for key in TRACKED:
+        before = baseline.get(key)
+        if not before:
+            continue
+        change = report[key] / before - 1.0
+        if change > max_regression:
+            regressions.append(f"{key}: {before:.1f} -> {report[key]:.1f} ms (+{change:.0%})")
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--runs", type=int, default=7, help="Fresh interpreters to time (default: 7)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list (default: 10)")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed growth vs baseline (default: 0.2)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    report = run_benchmark(max(args.runs, 1), args.top)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""
+Benchmark the MCP tools against the local mock Submagic API
+
+Runs each tool many times at several concurrency levels with the shared HTTP
+client pointed at submagic_mcp.mock_api, and reports latency percentiles and
+throughput. Nothing leaves the machine and no API key is needed, so the
+numbers measure the server's own overhead plus whatever latency is injected.
+
+    python benchmarks/bench_tools.py
+    python benchmarks/bench_tools.py --concurrency 1,16,64 --latency 0.05 --error-rate 0.02
+    python benchmarks/bench_tools.py --output results.json
+    python benchmarks/bench_tools.py --baseline results.json --max-regression 0.25
+
+With --baseline, the run exits non-zero if any tool's p95 grew by more than
+--max-regression (a fraction) compared with the saved results.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Benchmarks must not be throttled by the client-side hourly budgets, and a
+# long-lived state directory would skew registry/ledger timings between runs
+os.environ.setdefault("SUBMAGIC_API_KEY", "sk-benchmark")
+os.environ.setdefault("SUBMAGIC_STATE_DIR", tempfile.mkdtemp(prefix="submagic-bench-"))
+for _quota in ("LIGHTWEIGHT", "STANDARD", "UPLOAD"):
+    os.environ.setdefault(f"SUBMAGIC_RATE_LIMIT_{_quota}", "100000000")
+os.environ.setdefault("SUBMAGIC_RETRY_BASE_DELAY", "0.01")
+os.environ.setdefault("SUBMAGIC_RETRY_MAX_DELAY", "0.1")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import submagic_mcp  # noqa: E402
+from submagic_mcp.http_client import build_http_client, set_http_client  # noqa: E402
+from submagic_mcp.mock_api import MockSubmagicAPI  # noqa: E402
+
+VIDEO_URL = "https://example.com/video.mp4"
+YOUTUBE_URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+ToolCall = Callable[[int], Awaitable[Any]]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def build_scenarios(api: MockSubmagicAPI, requests: int) -> Dict[str, Callable[[], ToolCall]]:
+    """
+    Tool name -> factory returning the call to time for one concurrency level.
+
+    Every get/export call targets its own seeded project so the project cache
+    cannot turn the run into a benchmark of dictionary lookups.
+    """
+
+    def list_languages() -> ToolCall:
+        return lambda i: submagic_mcp.submagic_list_languages()
+
+    def list_templates() -> ToolCall:
+        return lambda i: submagic_mcp.submagic_list_templates()
+
+    def create_project() -> ToolCall:
+        return lambda i: submagic_mcp.submagic_create_project(
+            title=f"Bench {i}", language="en", video_url=VIDEO_URL, remove_silence_pace="fast"
+        )
+
+    def get_project() -> ToolCall:
+        ids = [api.add_project() for _ in range(requests + 1)]
+        return lambda i: submagic_mcp.submagic_get_project(ids[i])
+
+    def export_project() -> ToolCall:
+        ids = [api.add_project() for _ in range(requests + 1)]
+        return lambda i: submagic_mcp.submagic_export_project(ids[i])
+
+    def create_magic_clips() -> ToolCall:
+        return lambda i: submagic_mcp.submagic_create_magic_clips(
+            title=f"Clips {i}", youtube_url=YOUTUBE_URL, language="en"
+        )
+
+    return {
+        "submagic_list_languages": list_languages,
+        "submagic_list_templates": list_templates,
+        "submagic_create_project": create_project,
+        "submagic_get_project": get_project,
+        "submagic_export_project": export_project,
+        "submagic_create_magic_clips": create_magic_clips,
+    }
+
+
+async def run_level(call: ToolCall, requests: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    next_call = 0
+
+    async def worker() -> None:
+        nonlocal next_call, errors
+        while next_call < requests:
+            i = next_call
+            next_call += 1
+            started = time.perf_counter()
+            try:
+                result = await call(i)
+            except Exception:
+                errors += 1
+            else:
+                text = result[0].text if result else ""
+                if text.startswith("Error:") or text.startswith("Input validation error"):
+                    errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    api = MockSubmagicAPI(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    set_http_client(build_http_client(transport=api.transport()))
+    scenarios = build_scenarios(api, args.requests)
+    selected = args.tools or list(scenarios)
+    results: Dict[str, Any] = {}
+    try:
+        for name in selected:
+            if name not in scenarios:
+                raise SystemExit(f"Unknown tool {name!r}; choose from {', '.join(scenarios)}")
+            results[name] = {}
+            for concurrency in args.concurrency:
+                call = scenarios[name]()
+                await call(-1)  # warm-up: catalogs, lazy workers, connection pool
+                results[name][str(concurrency)] = await run_level(call, args.requests, concurrency)
+    finally:
+        await submagic_mcp.scheduler.aclose()
+        await submagic_mcp.catalog_cache.aclose()
+        set_http_client(None)
+        submagic_mcp.close_registry()
+    return {
+        "config": {
+            "requests": args.requests,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "rate_limit_rate": args.rate_limit_rate,
+        },
+        "results": results,
+        "mock_api": api.snapshot(),
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    header = f"{'tool':<30} {'conc':>5} {'reqs':>6} {'errs':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, levels in report["results"].items():
+        for concurrency, row in levels.items():
+            print(
+                f"{name:<30} {concurrency:>5} {row['requests']:>6} {row['errors']:>5} "
+                f"{row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['throughput_rps']:>9.1f}"
+            )
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Descriptions of every tool/concurrency whose p95 regressed past the threshold"""
+    regressions = []
+    for name, levels in report["results"].items():
+        for concurrency, row in levels.items():
+            before = baseline.get("results", {}).get(name, {}).get(concurrency)
+            if not before or not before.get("p95_ms"):
+                continue
+            change = row["p95_ms"] / before["p95_ms"] - 1.0
+            if change > max_regression:
+                regressions.append(
+                    f"{name} @ {concurrency}: p95 {before['p95_ms']:.2f} -> {row['p95_ms']:.2f} ms (+{change:.0%})"
+                )
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--tools", nargs="*", help="Tools to run (default: all)")
+    parser.add_argument(
+        "--concurrency", default="1,8,32",
+        type=lambda s: [int(c) for c in s.split(",") if c.strip()],
+        help="Comma-separated concurrency levels (default: 1,8,32)",
+    )
+    parser.add_argument("--requests", type=int, default=200, help="Calls per tool and level (default: 200)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock API latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=0.01, help="Retry-After sent with injected 429s")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for latency and fault injection")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--baseline", help="JSON report to compare p95 latencies against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95 growth vs baseline (default: 0.2)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    report = asyncio.run(run_benchmarks(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,26 +7,227 @@ Provides tools for creating viral short-form content with 100+ language support.
 """
 
 import os
+import re
+import copy
+import json
+import sqlite3
 import asyncio
+import time
 import httpx
-from typing import Optional, List, Any, Dict
-from datetime import datetime
-from mcp.server.fastmcp import FastMCP
-from mcp.types import Tool, TextContent
-from pydantic import BaseModel, Field, field_validator
+from contextlib import asynccontextmanager
+from typing import Optional, List, Any, Dict, AsyncIterator, Awaitable, Callable, Union
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.types import TextContent
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+
+from .batch import BatchLedger, request_key
+from .cache import ProjectResponseCache, TTLCache
+from .catalog import LANGUAGES, TEMPLATES, CatalogIndex
+from .concurrency import gather_bounded
+from .config import env_bool, env_float, env_int, env_str, state_dir
+from .downloads import DownloadError, download_file, download_segmented, safe_filename, verify_download
+from .events import event_bus, is_terminal
+from .http_client import close_http_client, get_http_client, http_client_info
+from .keys import (
+    CREATE_ENDPOINTS,
+    POLICY_LEAST_USED,
+    ApiKey,
+    KeyPool,
+    NoApiKeyAvailable,
+    load_api_keys,
+    project_id_from_endpoint,
+)
+from .metrics import (
+    API_DURATION,
+    API_IN_FLIGHT,
+    API_RATE_LIMITED,
+    API_REQUESTS,
+    API_RESPONSES,
+    API_RETRIES,
+    DOWNLOAD_BYTES,
+    TOOL_CALLS,
+    TOOL_DURATION,
+    Family,
+    MetricsServer,
+    current_tool,
+    endpoint_label,
+    instrument_tool,
+    metrics,
+    metrics_server_from_env,
+)
+from .pipeline import (
+    FINISHED_STAGES,
+    STAGE_COMPLETED,
+    STAGE_CREATING,
+    STAGE_EXPORTING,
+    STAGE_FAILED,
+    STAGE_PROCESSING,
+    STAGE_RENDERING,
+    STAGES,
+    RunStore,
+)
+from .polling import AdaptivePollSchedule
+from .rate_limit import RateLimiter, RateLimitExceeded, classify_endpoint, parse_retry_after
+from .registry import ACTIVE, KIND_MAGIC_CLIPS, KIND_PROJECT, KIND_UPLOAD, ProjectRegistry
+from .retry import RetryPolicy, RetryState
+from .scheduler import BATCH, INTERACTIVE, RequestScheduler, lane
+from .singleflight import SingleFlight
+from .tracing import STATUS_ERROR, current_span, tracer
+from .transcript import WordCallback, parse_project_stream, segment_bounds
+from .transcript_index import TranscriptIndex, TranscriptIndexCache
+from .uploads import MultipartFileUpload
+from .webhooks import WebhookReceiver, receiver_from_env
 
 # Constants
 API_BASE_URL = "https://api.submagic.co/v1"
 CHARACTER_LIMIT = 25000
+MAX_UPLOAD_BYTES = 2 * 1024 ** 3
+UPLOAD_EXTENSIONS = (".mp4", ".mov")
+
+# Languages and templates change rarely; serve them from an in-process cache
+catalog_cache = TTLCache(
+    ttl=env_float("SUBMAGIC_CATALOG_TTL", 6 * 3600),
+    max_stale=env_float("SUBMAGIC_CATALOG_MAX_STALE", 7 * 24 * 3600),
+    snapshot_path=env_str("SUBMAGIC_CATALOG_SNAPSHOT")
+)
+
+# Input models check languages and template names against the cached catalogs
+CATALOG_VALIDATION = env_bool("SUBMAGIC_CATALOG_VALIDATION", True)
+
+# Language code formats accepted while the languages catalog is not cached
+PROJECT_LANGUAGE_PATTERN = "^[a-z]{2}(-[A-Z]{2})?$"
+CLIPS_LANGUAGE_PATTERN = "^[a-z]{2,10}(_[a-z]{2})?$"
+catalog_index = CatalogIndex(catalog_cache.peek)
+_catalog_refresh_task: Optional[asyncio.Task] = None
+
+# Identical GETs in flight at the same moment share one upstream request
+request_flight = SingleFlight()
+
+# Methods safe to coalesce: repeating them has no side effects
+COALESCED_METHODS = frozenset({"GET", "HEAD"})
+
+# GET /projects/{id} responses; finished projects are kept until updated or exported
+project_cache = ProjectResponseCache(
+    ttl=env_float("SUBMAGIC_PROJECT_CACHE_TTL", 10.0),
+    max_entries=env_int("SUBMAGIC_PROJECT_CACHE_SIZE", 256)
+)
+
+# Word/time indexes of completed transcripts, built once per project
+transcript_indexes = TranscriptIndexCache(max_entries=env_int("SUBMAGIC_TRANSCRIPT_CACHE_SIZE", 32))
+_transcript_flight = SingleFlight()
+
+# Client-side token buckets for the lightweight/standard/upload quota classes
+rate_limiter = RateLimiter.from_env()
+
+# Backoff/deadline settings for transient upstream failures
+retry_policy = RetryPolicy.from_env()
+
+# Priority queue in front of every API request (interactive ahead of batch work)
+scheduler = RequestScheduler.from_env()
+
+# Optional listener for Submagic webhook deliveries (enabled by SUBMAGIC_WEBHOOK_PORT)
+webhook_receiver: Optional[WebhookReceiver] = None
+
+# Optional Prometheus scrape endpoint (enabled by SUBMAGIC_METRICS_PORT)
+metrics_server: Optional[MetricsServer] = None
+
+
+# Sessions (and HTTP server runs) currently holding the shared resources
+_resource_users = 0
+_resource_lock: Optional[asyncio.Lock] = None
+
+
+async def _open_shared_resources() -> None:
+    global webhook_receiver, metrics_server
+    get_http_client()
+    catalog_cache.load_snapshot()
+    webhook_receiver = receiver_from_env(event_bus)
+    if webhook_receiver is not None:
+        await webhook_receiver.start()
+    metrics_server = metrics_server_from_env(metrics)
+    if metrics_server is not None:
+        await metrics_server.start()
+    if env_bool("SUBMAGIC_PIPELINE_RESUME", True):
+        resume_pipeline_runs()
+    if CATALOG_VALIDATION:
+        start_catalog_refresh()
+
+
+async def _close_shared_resources() -> None:
+    # Unfinished runs keep their checkpoint and resume on the next start
+    await cancel_pipeline_runs()
+    await stop_catalog_refresh()
+    if webhook_receiver is not None:
+        await webhook_receiver.stop()
+    if metrics_server is not None:
+        await metrics_server.stop()
+    close_run_store()
+    close_registry()
+    await catalog_cache.aclose()
+    await scheduler.aclose()
+    await close_http_client()
+    tracer.shutdown()
+
+
+@asynccontextmanager
+async def shared_resources() -> AsyncIterator[None]:
+    """
+    Hold the process-wide resources (connection pool, caches, webhook and
+    metrics listeners, pipeline runs) for the duration of the block
+    
+    The first holder opens them and the last one to leave releases them, so
+    any number of concurrent client sessions share one set.
+    """
+    global _resource_users, _resource_lock
+    if _resource_lock is None:
+        _resource_lock = asyncio.Lock()
+    async with _resource_lock:
+        if _resource_users == 0:
+            await _open_shared_resources()
+        _resource_users += 1
+    try:
+        yield
+    finally:
+        async with _resource_lock:
+            _resource_users -= 1
+            if _resource_users == 0:
+                await _close_shared_resources()
+
+
+@asynccontextmanager
+async def server_lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Open shared resources at startup and release them on shutdown
+    
+    Over stdio this runs once per process. The HTTP transports enter it once per
+    client session, and the reference count in shared_resources() keeps those
+    sessions on the same pool, caches and rate-limit state.
+    """
+    async with shared_resources():
+        yield
 
-# Initialize MCP server
-app = FastMCP("submagic_mcp")
+
+# Initialize MCP server. Tools are registered with structured_output=False:
+# they return markdown TextContent, and an output schema for that would cost
+# schema generation at startup and a duplicate structuredContent copy per call
+app = FastMCP("submagic_mcp", lifespan=server_lifespan)
 
 # ==============================================================================
 # Pydantic Models for Input Validation
 # ==============================================================================
 
-class CreateProjectInput(BaseModel):
+class ToolInput(BaseModel):
+    """Base for tool input models; validation shows up as its own tracing span"""
+    
+    # Validators are built on first use rather than at import, which keeps
+    # them off the startup path of every stdio session
+    model_config = ConfigDict(defer_build=True)
+    
+    def __init__(self, **data: Any) -> None:
+        with tracer.span(f"validate {type(self).__name__}"):
+            super().__init__(**data)
+
+
+class CreateProjectInput(ToolInput):
     """Input model for creating a video project with AI captions"""
     title: str = Field(
         ...,
@@ -36,7 +237,8 @@ class CreateProjectInput(BaseModel):
     )
     language: str = Field(
         ...,
-        pattern="^[a-z]{2}(-[A-Z]{2})?$",
+        # Checked by validate_language: against the catalog once it is cached, this pattern until then
+        json_schema_extra={"pattern": PROJECT_LANGUAGE_PATTERN},
         description="Language code for transcription (e.g., 'en', 'es', 'fr')"
     )
     video_url: str = Field(
@@ -91,8 +293,42 @@ class CreateProjectInput(BaseModel):
             raise ValueError("Cannot use both template_name and user_theme_id")
         return v
 
+    @field_validator('language', mode='before')
+    def validate_language(cls, v):
+        """Reject languages missing from the cached catalog before any request is sent"""
+        return validate_catalog_value(LANGUAGES, v, PROJECT_LANGUAGE_PATTERN)
+
+    @field_validator('template_name', mode='before')
+    def validate_template_name(cls, v):
+        """Reject templates missing from the cached catalog before any request is sent"""
+        return validate_catalog_value(TEMPLATES, v)
+
+
+class UploadProjectInput(CreateProjectInput):
+    """Input model for creating a project from a local video file (same options as CreateProjectInput)"""
+    video_url: Optional[str] = Field(
+        None,
+        description="Not used for uploads; the video comes from file_path"
+    )
+    file_path: str = Field(
+        ...,
+        description="Path to a local MP4 or MOV file (max 2GB)"
+    )
 
-class GetProjectInput(BaseModel):
+    @field_validator('file_path')
+    def validate_file_path(cls, v):
+        """Ensure the file exists, is MP4/MOV and is within the 2GB upload limit"""
+        path = os.path.abspath(os.path.expanduser(v))
+        if not os.path.isfile(path):
+            raise ValueError(f"File not found: {v}")
+        if os.path.splitext(path)[1].lower() not in UPLOAD_EXTENSIONS:
+            raise ValueError("Only MP4 and MOV files are supported")
+        if os.path.getsize(path) > MAX_UPLOAD_BYTES:
+            raise ValueError("File exceeds the 2GB upload limit")
+        return path
+
+
+class GetProjectInput(ToolInput):
     """Input model for retrieving project details"""
     project_id: str = Field(
         ...,
@@ -100,7 +336,69 @@ class GetProjectInput(BaseModel):
     )
 
 
-class UpdateProjectInput(BaseModel):
+class GetProjectManyInput(ToolInput):
+    """Input model for checking many projects in one call"""
+    project_ids: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=500,
+        description="UUIDs of the projects to check (duplicates are ignored)"
+    )
+    max_concurrency: Optional[int] = Field(
+        None,
+        ge=1,
+        le=50,
+        description="Maximum simultaneous API requests. Defaults to SUBMAGIC_BATCH_CONCURRENCY or 10."
+    )
+
+
+class GetMagicClipsInput(ToolInput):
+    """Input model for listing (and optionally downloading) a magic clips project's clips"""
+    project_id: str = Field(
+        ...,
+        description="UUID of the magic clips project"
+    )
+    download_dir: Optional[str] = Field(
+        None,
+        min_length=1,
+        description="Directory to download completed clips into; clips are only listed when omitted"
+    )
+    max_concurrency: Optional[int] = Field(
+        None,
+        ge=1,
+        le=16,
+        description="Maximum simultaneous downloads. Defaults to SUBMAGIC_DOWNLOAD_CONCURRENCY or 4."
+    )
+
+
+class DownloadOutputInput(ToolInput):
+    """Input model for downloading rendered videos of one or more projects"""
+    project_ids: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=50,
+        description="UUIDs of exported projects (duplicates are ignored)"
+    )
+    download_dir: str = Field(
+        ...,
+        min_length=1,
+        description="Directory to save the videos into (created if needed)"
+    )
+    segments: Optional[int] = Field(
+        None,
+        ge=1,
+        le=16,
+        description="Parallel byte ranges per file when the CDN supports them. Defaults to SUBMAGIC_DOWNLOAD_SEGMENTS or 4."
+    )
+    max_concurrency: Optional[int] = Field(
+        None,
+        ge=1,
+        le=16,
+        description="Files downloaded at once. Defaults to SUBMAGIC_DOWNLOAD_CONCURRENCY or 4."
+    )
+
+
+class UpdateProjectInput(ToolInput):
     """Input model for updating project settings - only supports editing features, not AI toggles"""
     project_id: str = Field(
         ...,
@@ -121,7 +419,7 @@ class UpdateProjectInput(BaseModel):
     )
 
 
-class ExportProjectInput(BaseModel):
+class ExportProjectInput(ToolInput):
     """Input model for exporting rendered video"""
     project_id: str = Field(
         ...,
@@ -151,7 +449,7 @@ class ExportProjectInput(BaseModel):
     )
 
 
-class CreateMagicClipsInput(BaseModel):
+class CreateMagicClipsInput(ToolInput):
     """Input model for generating viral clips from long-form video with full control"""
     title: str = Field(
         ...,
@@ -165,7 +463,7 @@ class CreateMagicClipsInput(BaseModel):
     )
     language: str = Field(
         ...,
-        pattern="^[a-z]{2,10}(_[a-z]{2})?$",
+        json_schema_extra={"pattern": CLIPS_LANGUAGE_PATTERN},
         description="Language code for captions (e.g., 'en', 'es', 'cmn_en')"
     )
     webhook_url: Optional[str] = Field(
@@ -189,156 +487,1072 @@ class CreateMagicClipsInput(BaseModel):
         description="Maximum clip duration in seconds (15-300). Must be >= minClipLength."
     )
 
+    @field_validator('language', mode='before')
+    def validate_language(cls, v):
+        """Reject languages missing from the cached catalog before any request is sent"""
+        return validate_catalog_value(LANGUAGES, v, CLIPS_LANGUAGE_PATTERN)
+
+
+class WaitForProjectInput(ToolInput):
+    """Input model for waiting on a project to finish"""
+    project_id: str = Field(
+        ...,
+        description="UUID of the project or magic clips job to wait for"
+    )
+    timeout_seconds: int = Field(
+        600,
+        ge=1,
+        le=3600,
+        description="Maximum seconds to wait before returning the current status"
+    )
+
+
+class GetTranscriptInput(ToolInput):
+    """Input model for reading one window of a project's transcript"""
+    project_id: str = Field(
+        ...,
+        description="UUID of the project"
+    )
+    start_time: Optional[float] = Field(
+        None,
+        ge=0,
+        description="Only include segments ending after this time (seconds)"
+    )
+    end_time: Optional[float] = Field(
+        None,
+        gt=0,
+        description="Only include segments starting before this time (seconds)"
+    )
+    page: int = Field(
+        1,
+        ge=1,
+        description="Page of matching segments to return (1-based)"
+    )
+    page_size: int = Field(
+        200,
+        ge=1,
+        le=500,
+        description="Segments per page (max 500)"
+    )
+
+    @field_validator('end_time')
+    def validate_end_time(cls, v, info):
+        """Ensure the time window is not empty"""
+        start_time = info.data.get('start_time')
+        if v is not None and start_time is not None and v <= start_time:
+            raise ValueError("end_time must be greater than start_time")
+        return v
+
+
+class ProcessVideoInput(CreateProjectInput):
+    """Input model for the create -> export pipeline (project options plus export settings)"""
+    fps: Optional[int] = Field(
+        None,
+        ge=1,
+        le=60,
+        description="Frames per second for the exported video (1-60)"
+    )
+    width: Optional[int] = Field(
+        None,
+        ge=100,
+        le=4000,
+        description="Exported video width in pixels (100-4000)"
+    )
+    height: Optional[int] = Field(
+        None,
+        ge=100,
+        le=4000,
+        description="Exported video height in pixels (100-4000)"
+    )
+    timeout_seconds: int = Field(
+        7200,
+        ge=60,
+        le=86400,
+        description="Give up if the video is not exported within this many seconds"
+    )
+    wait_seconds: int = Field(
+        0,
+        ge=0,
+        le=3600,
+        description="Seconds to wait for the run before returning (0 returns immediately)"
+    )
+
+
+class PipelineRunInput(ToolInput):
+    """Input model for checking pipeline runs"""
+    run_id: Optional[str] = Field(
+        None,
+        description="Run ID from submagic_process_video; omit to list recent runs"
+    )
+    wait_seconds: int = Field(
+        0,
+        ge=0,
+        le=3600,
+        description="Seconds to wait for the run to finish before returning"
+    )
+
+
+class FindInTranscriptInput(ToolInput):
+    """Input model for searching a project's transcript"""
+    project_id: str = Field(
+        ...,
+        description="UUID of the project"
+    )
+    phrase: Optional[str] = Field(
+        None,
+        min_length=1,
+        max_length=200,
+        description="Word or phrase to locate (case and punctuation are ignored)"
+    )
+    min_silence_seconds: Optional[float] = Field(
+        None,
+        gt=0,
+        description="List silence gaps longer than this many seconds"
+    )
+    max_results: int = Field(
+        50,
+        ge=1,
+        le=500,
+        description="Maximum matches and gaps listed (each)"
+    )
+
+    @model_validator(mode="after")
+    def validate_query(self):
+        """Require at least one kind of search"""
+        if not self.phrase and self.min_silence_seconds is None:
+            raise ValueError("Provide phrase, min_silence_seconds, or both")
+        return self
+
+
+class ServerStatsInput(ToolInput):
+    """Input model for the server statistics tool"""
+    output_format: str = Field(
+        "markdown",
+        pattern="^(markdown|prometheus)$",
+        description="markdown for a readable report, prometheus for the raw text exposition"
+    )
+
 
 # ==============================================================================
 # API Helper Functions
 # ==============================================================================
 
-def get_api_key() -> str:
-    """Get Submagic API key from environment"""
-    api_key = os.getenv("SUBMAGIC_API_KEY")
-    if not api_key:
+def rate_limit_error(quota: str, retry_after: float, upstream: bool) -> Dict[str, Any]:
+    """Build the error returned when a quota class is exhausted"""
+    if upstream:
+        message = "You've hit the rate limit for this operation. Please wait and try again."
+    else:
+        message = (
+            f"The local {quota} request budget is used up, so the request was not sent "
+            "(this avoids spending quota on a guaranteed 429)."
+        )
+    return {
+        "error": "Rate limit exceeded",
+        "message": message,
+        "suggestion": f"Retry in about {max(int(retry_after), 1)} seconds.",
+        "quota_class": quota,
+        "retry_after": round(retry_after, 1),
+        "limits": {
+            f"{name}_operations": f"{limit} requests/hour"
+            for name, limit in rate_limiter.limits.items()
+        }
+    }
+
+
+def default_webhook_url() -> Optional[str]:
+    """
+    Public URL of the built-in webhook receiver, used when a tool call gives no webhook_url
+    
+    Only returned while the receiver is running and SUBMAGIC_WEBHOOK_PUBLIC_URL is set,
+    so Submagic never gets pointed at a listener that isn't there.
+    """
+    public_url = env_str("SUBMAGIC_WEBHOOK_PUBLIC_URL")
+    if not public_url or webhook_receiver is None or not webhook_receiver.running:
+        return None
+    if webhook_receiver.token:
+        separator = "&" if "?" in public_url else "?"
+        public_url = f"{public_url}{separator}token={webhook_receiver.token}"
+    return public_url
+
+
+_key_pool: Optional[KeyPool] = None
+
+
+def get_key_pool() -> KeyPool:
+    """
+    Pool of configured API keys, rebuilt whenever the key settings change
+    
+    Raises:
+        ValueError: If no API key is configured
+    """
+    global _key_pool
+    keys = load_api_keys()
+    if not keys:
         raise ValueError(
             "SUBMAGIC_API_KEY environment variable is required. "
             "Get your API key from https://app.submagic.co/signup"
         )
-    return api_key
+    if _key_pool is None or _key_pool.signature != tuple(keys):
+        _key_pool = KeyPool(
+            keys,
+            policy=env_str("SUBMAGIC_API_KEY_POLICY", POLICY_LEAST_USED),
+            pins_path=os.path.join(state_dir(), "key_pins.json"),
+            pin_ttl=env_float("SUBMAGIC_KEY_PIN_TTL", 30 * 24 * 3600)
+        )
+    return _key_pool
 
 
-async def make_api_request(
+def get_api_key() -> str:
+    """Get Submagic API key from environment (the first key still in rotation)"""
+    pool = get_key_pool()
+    active = pool.active()
+    return (active[0] if active else pool.keys[0]).key
+
+
+async def send_api_request(
     method: str,
     endpoint: str,
     data: Optional[Dict[str, Any]] = None,
-    params: Optional[Dict[str, Any]] = None
-) -> Dict[str, Any]:
+    params: Optional[Dict[str, Any]] = None,
+    *,
+    content_factory: Optional[Callable[[], AsyncIterator[bytes]]] = None,
+    extra_headers: Optional[Dict[str, str]] = None,
+    stream: bool = False
+) -> Union[httpx.Response, Dict[str, Any]]:
     """
-    Make HTTP request to Submagic API with error handling
+    Send a request to the Submagic API through the rate limiter and retry policy
+    
+    Transient failures are retried with jittered exponential backoff within the
+    retry deadline. Idempotent requests retry on timeouts, connection errors
+    and 5xx responses; POSTs only retry when the request never reached the
+    server (or was rejected with 429), so projects are never created twice.
     
     Args:
         method: HTTP method (GET, POST, PUT, DELETE)
         endpoint: API endpoint path (without base URL)
         data: Request body data
         params: Query parameters
+        content_factory: Returns a fresh streaming body per attempt (used instead of data)
+        extra_headers: Headers that override the JSON defaults (e.g. multipart Content-Type)
+        stream: Leave a 2xx response body unread so it can be consumed with
+            aiter_bytes(); the caller must aclose() it. Other responses are
+            always read in full.
         
     Returns:
-        JSON response data
-        
-    Raises:
-        Exception: If API request fails with descriptive error message
+        The final HTTP response (any status code, with the attempt count in
+        response.extensions["attempts"]), or an error dict when no usable
+        response was received (network failure, timeout, rate limit)
     """
-    api_key = get_api_key()
+    tool = current_tool.get()
+    endpoint_name = endpoint_label(endpoint)
+    API_IN_FLIGHT.inc(tool=tool, endpoint=endpoint_name)
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        with tracer.span(
+            f"{method} {endpoint_name}",
+            **{"http.request.method": method, "submagic.endpoint": endpoint_name}
+        ) as span:
+            if span.recording and data is not None:
+                span.set_attribute("http.request.body.size", len(json.dumps(data)))
+            response = await _send_with_retries(
+                method,
+                endpoint,
+                data,
+                params,
+                content_factory=content_factory,
+                extra_headers=extra_headers,
+                stream=stream
+            )
+            if not isinstance(response, dict):
+                outcome = "ok" if response.is_success or response.status_code == 304 else "http_error"
+            if span.recording:
+                trace_response(span, response)
+        return response
+    finally:
+        API_IN_FLIGHT.dec(tool=tool, endpoint=endpoint_name)
+        API_DURATION.observe(time.perf_counter() - started, tool=tool, endpoint=endpoint_name, method=method)
+        API_REQUESTS.inc(tool=tool, endpoint=endpoint_name, method=method, outcome=outcome)
+
+
+def trace_response(span: Any, response: Union[httpx.Response, Dict[str, Any]]) -> None:
+    """Attach the outcome of send_api_request to its tracing span"""
+    if isinstance(response, dict):
+        span.set_attribute("submagic.attempts", response.get("attempts"))
+        span.set_status(STATUS_ERROR, f"{response.get('error')}: {response.get('message')}")
+        return
+    attempts = response.extensions.get("attempts", 1)
+    span.set_attribute("http.response.status_code", response.status_code)
+    span.set_attribute("submagic.attempts", attempts)
+    span.set_attribute("submagic.retries", attempts - 1)
+    span.set_attribute("submagic.api_key_id", response.extensions.get("api_key_id"))
+    length = response.headers.get("content-length")
+    if length is None:
+        try:
+            length = len(response.content)
+        except httpx.ResponseNotRead:
+            # Streamed body, still to be consumed by the caller
+            pass
+    if length is not None:
+        span.set_attribute("http.response.body.size", int(length))
+    if response.status_code >= 400:
+        span.set_status(STATUS_ERROR, f"HTTP {response.status_code}")
+
+
+async def _send_with_retries(
+    method: str,
+    endpoint: str,
+    data: Optional[Dict[str, Any]],
+    params: Optional[Dict[str, Any]],
+    *,
+    content_factory: Optional[Callable[[], AsyncIterator[bytes]]],
+    extra_headers: Optional[Dict[str, str]],
+    stream: bool
+) -> Union[httpx.Response, Dict[str, Any]]:
+    """The attempt loop behind send_api_request"""
+    pool = get_key_pool()
+    endpoint_name = endpoint_label(endpoint)
+    project_id = project_id_from_endpoint(endpoint)
     url = f"{API_BASE_URL}/{endpoint.lstrip('/')}"
     
     headers = {
-        "x-api-key": api_key,
         "Content-Type": "application/json"
     }
+    if extra_headers:
+        headers.update(extra_headers)
     
-    async with httpx.AsyncClient(timeout=120.0) as client:
-        try:
-            response = await client.request(
+    quota = classify_endpoint(method, endpoint)
+    retry = RetryState(retry_policy)
+    
+    # Shared pooled client: keeps TCP/TLS connections alive between tool calls
+    client = get_http_client()
+    
+    async def attempt(key: ApiKey, parent: Any, queued_at: float) -> httpx.Response:
+        # Runs in a scheduler worker, whose context does not carry the caller's span
+        with tracer.span("attempt", parent=parent, **{"submagic.attempt": retry.attempt}) as span:
+            span.set_attribute("submagic.queue_seconds", round(time.perf_counter() - queued_at, 6))
+            request = client.build_request(
                 method=method,
                 url=url,
-                json=data,
+                json=data if content_factory is None else None,
+                content=content_factory() if content_factory is not None else None,
                 params=params,
-                headers=headers
+                headers=dict(headers, **{"x-api-key": key.key})
             )
-            
-            # Handle rate limiting
-            if response.status_code == 429:
-                return {
-                    "error": "Rate limit exceeded",
-                    "message": "You've hit the rate limit for this operation. Please wait and try again.",
-                    "limits": {
-                        "lightweight_operations": "1000 requests/hour",
-                        "standard_operations": "500 requests/hour",
-                        "upload_operations": "500 requests/hour"
-                    }
-                }
-            
-            # Handle authentication errors
-            if response.status_code == 401:
-                return {
-                    "error": "Authentication failed",
-                    "message": "Invalid API key. Check your SUBMAGIC_API_KEY environment variable."
-                }
-            
-            response.raise_for_status()
-            return response.json()
-            
-        except httpx.HTTPStatusError as e:
-            error_detail = "Unknown error"
-            try:
-                error_data = e.response.json()
-                error_detail = error_data.get("message", error_data.get("error", str(error_data)))
-            except:
-                error_detail = e.response.text or str(e)
-            
-            return {
-                "error": f"API Error ({e.response.status_code})",
-                "message": error_detail,
-                "suggestion": "Check the API documentation at https://docs.submagic.co for more details."
-            }
-            
-        except httpx.TimeoutException:
+            key.requests += 1
+            response = await client.send(request, stream=stream)
+            if stream and not response.is_success:
+                await response.aread()
+            span.set_attribute("http.response.status_code", response.status_code)
+            if response.status_code >= 400:
+                span.set_status(STATUS_ERROR, f"HTTP {response.status_code}")
+            return response
+    
+    while True:
+        retry.attempt += 1
+        
+        # Pinned projects keep their key; anything else goes to the least loaded key
+        try:
+            key = pool.select(quota, project_id)
+        except NoApiKeyAvailable as e:
             return {
-                "error": "Request timeout",
-                "message": "The request took too long to complete. The video might be too large or the server is busy.",
-                "suggestion": "Try with a smaller video or wait a few minutes and retry."
+                "error": "Authentication failed",
+                "message": str(e),
+                "suggestion": "Check the keys in SUBMAGIC_API_KEY / SUBMAGIC_API_KEYS / SUBMAGIC_API_KEYS_FILE."
             }
+        limiter = key.limiter or rate_limiter
+        
+        # Queue (or refuse) locally before spending quota on a request that would 429.
+        # The token is taken before the job is queued, so a scheduler worker never
+        # sits on the rate limiter while other quota classes and lanes wait
+        try:
+            with tracer.span("rate_limit.acquire", **{"submagic.quota": quota}):
+                await limiter.acquire(quota)
+        except RateLimitExceeded as e:
+            API_RATE_LIMITED.inc(endpoint=endpoint_name, source="local")
+            return rate_limit_error(quota, e.retry_after, upstream=False)
+        
+        # Each attempt waits its turn in the scheduler; backoff sleeps happen outside it
+        key.in_flight += 1
+        try:
+            parent, queued_at = current_span.get(), time.perf_counter()
+            response = await scheduler.run(lambda: attempt(key, parent, queued_at), tenant=key.id)
+        except httpx.HTTPError as e:
+            API_RESPONSES.inc(endpoint=endpoint_name, method=method, status=type(e).__name__)
+            if retry_policy.should_retry_error(method, endpoint, e):
+                delay = retry.next_delay()
+                if delay is not None:
+                    API_RETRIES.inc(endpoint=endpoint_name, method=method, reason="network")
+                    await asyncio.sleep(delay)
+                    continue
             
-        except Exception as e:
+            if isinstance(e, httpx.TimeoutException):
+                return {
+                    "error": "Request timeout",
+                    "message": "The request took too long to complete. The video might be too large or the server is busy.",
+                    "suggestion": "Try with a smaller video or wait a few minutes and retry.",
+                    "attempts": retry.attempt
+                }
             return {
                 "error": "Request failed",
                 "message": str(e),
-                "suggestion": "Check your internet connection and API key configuration."
+                "suggestion": "Check your internet connection and API key configuration.",
+                "attempts": retry.attempt
             }
+        finally:
+            key.in_flight -= 1
+        API_RESPONSES.inc(endpoint=endpoint_name, method=method, status=response.status_code)
+        
+        # A revoked key is dropped from the pool and the request goes to another one
+        if response.status_code == 401 and pool.eject(key, "401 Unauthorized"):
+            await response.aclose()
+            API_RETRIES.inc(endpoint=endpoint_name, method=method, reason="key_rejected")
+            continue
+        
+        # Handle rate limiting
+        if response.status_code == 429:
+            retry_hint = None
+            try:
+                retry_hint = float(response.json().get("retryAfter"))
+            except Exception:
+                pass
+            retry_after = limiter.observe(quota, 429, response.headers, retry_hint)
+            API_RATE_LIMITED.inc(endpoint=endpoint_name, source="upstream")
+            delay = retry.next_delay(retry_after)
+            if delay is not None:
+                # The limiter has paused this quota class; acquire() waits it out
+                API_RETRIES.inc(endpoint=endpoint_name, method=method, reason="rate_limited")
+                continue
+            return rate_limit_error(quota, retry_after, upstream=True)
+        
+        limiter.observe(quota, response.status_code, response.headers)
+        
+        if retry_policy.should_retry_status(method, endpoint, response.status_code):
+            delay = retry.next_delay(parse_retry_after(response.headers.get("retry-after")))
+            if delay is not None:
+                API_RETRIES.inc(endpoint=endpoint_name, method=method, reason="status")
+                await asyncio.sleep(delay)
+                continue
+        
+        response.extensions["attempts"] = retry.attempt
+        response.extensions["api_key_id"] = key.id
+        return response
+
+
+def parse_api_response(response: httpx.Response) -> Dict[str, Any]:
+    """Convert an API response into its JSON data or a descriptive error dict"""
+    # Handle authentication errors
+    if response.status_code == 401:
+        return {
+            "error": "Authentication failed",
+            "message": "Invalid API key. Check your SUBMAGIC_API_KEY environment variable."
+        }
+    
+    try:
+        response.raise_for_status()
+        return response.json()
+        
+    except httpx.HTTPStatusError as e:
+        error_detail = "Unknown error"
+        try:
+            error_data = e.response.json()
+            error_detail = error_data.get("message", error_data.get("error", str(error_data)))
+        except:
+            error_detail = e.response.text or str(e)
+        
+        return {
+            "error": f"API Error ({e.response.status_code})",
+            "message": error_detail,
+            "suggestion": "Check the API documentation at https://docs.submagic.co for more details.",
+            "attempts": response.extensions.get("attempts", 1)
+        }
+        
+    except Exception as e:
+        return {
+            "error": "Request failed",
+            "message": str(e),
+            "suggestion": "Check your internet connection and API key configuration."
+        }
 
 
-def truncate_text(text: str, max_length: int = CHARACTER_LIMIT) -> str:
-    """Truncate text to maximum length with ellipsis"""
-    if len(text) <= max_length:
-        return text
-    return text[:max_length - 3] + "..."
-
-
-def format_project_response(project: Dict[str, Any], detail_level: str = "summary") -> str:
+async def make_api_request(
+    method: str,
+    endpoint: str,
+    data: Optional[Dict[str, Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    *,
+    content_factory: Optional[Callable[[], AsyncIterator[bytes]]] = None,
+    extra_headers: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
     """
-    Format project data for LLM consumption
+    Make HTTP request to Submagic API with error handling
+    
+    Concurrent GET/HEAD requests for the same endpoint, query and headers share
+    one upstream call. Callers that shared a response each get their own deep
+    copy, so mutating nested lists (e.g. words or videos) never leaks into
+    another caller's result.
     
     Args:
-        project: Project data from API
-        detail_level: "summary" or "detailed"
+        method: HTTP method (GET, POST, PUT, DELETE)
+        endpoint: API endpoint path (without base URL)
+        data: Request body data
+        params: Query parameters
+        content_factory: Returns a fresh streaming body per attempt (used instead of data)
+        extra_headers: Headers that override the JSON defaults (e.g. multipart Content-Type)
         
     Returns:
-        Formatted markdown string
+        JSON response data
+        
+    Raises:
+        Exception: If API request fails with descriptive error message
     """
-    if detail_level == "summary":
-        return f"""# Project: {project.get('title', 'Untitled')}
+    if method.upper() in COALESCED_METHODS and data is None and content_factory is None:
+        key = (
+            method.upper(),
+            endpoint.strip("/"),
+            # JSON, not tuples of items: params may hold lists (repeated query keys)
+            json.dumps(params or {}, sort_keys=True, default=str),
+            json.dumps(extra_headers or {}, sort_keys=True, default=str)
+        )
+        return await request_flight.do(
+            key,
+            lambda: _make_api_request(method, endpoint, params=params, extra_headers=extra_headers),
+            copy=copy.deepcopy
+        )
+    return await _make_api_request(
+        method,
+        endpoint,
+        data=data,
+        params=params,
+        content_factory=content_factory,
+        extra_headers=extra_headers
+    )
 
-**ID:** `{project.get('id')}`
-**Status:** {project.get('status', 'unknown')}
-**Language:** {project.get('language', 'unknown')}
-**Template:** {project.get('templateName', 'default')}
-**Created:** {project.get('createdAt', 'unknown')}
 
-**Features Enabled:**
-- Magic Zooms: {'✓' if project.get('magicZooms') else '✗'}
-- Magic B-rolls: {'✓' if project.get('magicBrolls') else '✗'}
-- Remove Bad Takes: {'✓' if project.get('removeBadTakes') else '✗'}
-"""
+async def _make_api_request(
+    method: str,
+    endpoint: str,
+    data: Optional[Dict[str, Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    *,
+    content_factory: Optional[Callable[[], AsyncIterator[bytes]]] = None,
+    extra_headers: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    response = await send_api_request(
+        method,
+        endpoint,
+        data=data,
+        params=params,
+        content_factory=content_factory,
+        extra_headers=extra_headers
+    )
+    if isinstance(response, dict):
+        return response
+    result = parse_api_response(response)
     
-    # Detailed format
-    output = f"""# Project Details: {project.get('title', 'Untitled')}
+    # New projects live in the calling key's account; keep follow-ups on that key
+    if method.upper() == "POST" and endpoint.strip("/") in CREATE_ENDPOINTS and "error" not in result:
+        pool = get_key_pool()
+        key = pool.get(response.extensions.get("api_key_id", ""))
+        if key is not None:
+            pool.pin(result.get("id") or result.get("projectId"), key)
+    return result
 
-## Basic Information
-- **Project ID:** `{project.get('id')}`
-- **Status:** {project.get('status', 'unknown')}
-- **Language:** {project.get('language', 'unknown')}
-- **Created:** {project.get('createdAt', 'unknown')}
-- **Updated:** {project.get('updatedAt', 'unknown')}
 
-## Styling
+async def fetch_catalog(endpoint: str) -> Dict[str, Any]:
+    """
+    Fetch a catalog endpoint ("languages" or "templates") through the TTL cache
+    
+    Fresh entries skip the network entirely, stale ones are refreshed in the
+    background, and concurrent misses share one upstream request.
+    """
+    return await catalog_cache.get_or_fetch(
+        endpoint,
+        lambda: make_api_request("GET", endpoint)
+    )
+
+
+async def refresh_catalogs(interval: float) -> None:
+    """
+    Keep the language and template catalogs loaded for input validation
+
+    Fetches both at startup, then re-checks every interval seconds. Fresh
+    entries cost nothing, so requests are only sent once the cache TTL lapses.
+    """
+    while True:
+        for endpoint in (LANGUAGES, TEMPLATES):
+            try:
+                await fetch_catalog(endpoint)
+            except Exception:
+                # Validation fails open until the next attempt succeeds
+                pass
+        await asyncio.sleep(interval)
+
+
+def start_catalog_refresh(interval: Optional[float] = None) -> None:
+    global _catalog_refresh_task
+    if _catalog_refresh_task is None or _catalog_refresh_task.done():
+        if interval is None:
+            interval = env_float("SUBMAGIC_CATALOG_REFRESH_INTERVAL", 600.0)
+        _catalog_refresh_task = asyncio.create_task(refresh_catalogs(max(interval, 1.0)))
+
+
+async def stop_catalog_refresh() -> None:
+    global _catalog_refresh_task
+    task, _catalog_refresh_task = _catalog_refresh_task, None
+    if task is not None and not task.done():
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+def validate_catalog_value(catalog: str, value: Any, pattern: Optional[str] = None) -> Any:
+    """
+    Return value if the cached catalog lists it, otherwise raise ValueError
+    with the closest valid options
+    
+    Runs before type and format checks, so names and case variants such as
+    "spanish" or "EN" still get a suggestion. While the catalog has not been
+    fetched, value only has to match pattern.
+    """
+    if not isinstance(value, str) or not value:
+        return value
+    if CATALOG_VALIDATION and catalog_index.values(catalog) is not None:
+        error = catalog_index.check(catalog, value)
+        if error:
+            raise ValueError(error)
+        return value
+    if pattern and not re.match(pattern, value):
+        raise ValueError(f"'{value}' is not a valid language code (expected a code like 'en'); see submagic_list_{catalog}")
+    return value
+
+
+async def fetch_project(project_id: str, revalidate: bool = False) -> Dict[str, Any]:
+    """
+    Fetch GET /projects/{id} through the project response cache
+    
+    Cached completed/failed projects and recently fetched in-progress ones are
+    returned without a request. Otherwise the cached ETag/Last-Modified are
+    sent as a conditional request, and a 304 reuses the cached body.
+    
+    Concurrent misses for the same project share one upstream request.
+    
+    Args:
+        project_id: UUID of the project
+        revalidate: Always check upstream, conditionally when validators are
+            cached (used by pollers that pace themselves)
+    """
+    if not revalidate:
+        cached = project_cache.get_fresh(project_id)
+        if cached is not None:
+            return cached
+    
+    # Keyed apart from make_api_request's GETs: this returns the project without its words
+    return await request_flight.do(("project", project_id), lambda: _fetch_project_upstream(project_id))
+
+
+async def _fetch_project_upstream(project_id: str) -> Dict[str, Any]:
+    headers: Dict[str, str] = {}
+    entry = project_cache.get(project_id)
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+    
+    response = await send_api_request(
+        "GET",
+        f"projects/{project_id}",
+        extra_headers=headers or None,
+        stream=True
+    )
+    if isinstance(response, dict):
+        return response
+    if response.status_code == 304:
+        await response.aclose()
+        refreshed = project_cache.refresh(project_id)
+        if refreshed is not None:
+            return refreshed
+        # Entry evicted while the request was in flight; fetch the full body
+        return await _fetch_project_upstream(project_id)
+    
+    # The transcript is only counted here; submagic_get_transcript pages through it
+    result = await read_project_response(response)
+    project_cache.store(project_id, result, response.headers)
+    return result
+
+
+async def read_project_response(
+    response: httpx.Response,
+    on_word: Optional[WordCallback] = None
+) -> Dict[str, Any]:
+    """
+    Parse a streamed project response without loading its words array
+    
+    Each transcript segment is passed to on_word as it arrives and then
+    discarded; the returned project carries "wordCount" instead of "words".
+    Error responses are converted by parse_api_response as usual.
+    """
+    try:
+        if not response.is_success:
+            return parse_api_response(response)
+        return await parse_project_stream(response.aiter_bytes(), on_word)
+    except (httpx.HTTPError, ValueError) as e:
+        return {
+            "error": "Request failed",
+            "message": str(e),
+            "suggestion": "Check your internet connection and API key configuration."
+        }
+    finally:
+        await response.aclose()
+
+
+def project_revision(project_id: str) -> Optional[str]:
+    """ETag or Last-Modified of the cached project response (its fetch time without either)"""
+    entry = project_cache.get(project_id)
+    if entry is None:
+        return None
+    return entry.etag or entry.last_modified or repr(entry.stored_at)
+
+
+async def get_transcript_index(project_id: str) -> Union[TranscriptIndex, Dict[str, Any]]:
+    """
+    Return the time/word index for a project's transcript, or an error dict
+    
+    Each index is kept for the project revision it was built from and served
+    from memory while the project cache still holds that revision; concurrent
+    callers share one download. An unfinished project is revalidated first
+    because its transcript may still change.
+    """
+    entry = project_cache.get(project_id)
+    if entry is not None and not is_terminal(entry.value):
+        await fetch_project(project_id)
+    index = transcript_indexes.get(project_id, project_revision(project_id))
+    if index is not None:
+        return index
+    return await _transcript_flight.do(project_id, lambda: _build_transcript_index(project_id))
+
+
+async def _build_transcript_index(project_id: str) -> Union[TranscriptIndex, Dict[str, Any]]:
+    index = TranscriptIndex()
+    response = await send_api_request("GET", f"projects/{project_id}", stream=True)
+    if isinstance(response, dict):
+        return response
+    result = await read_project_response(response, on_word=index)
+    if "error" in result:
+        return result
+    project_cache.store(project_id, result, response.headers)
+    index.project = result
+    index.finalize()
+    transcript_indexes.store(project_id, index, project_revision(project_id))
+    return index
+
+
+async def wait_for_project(
+    project_id: str,
+    timeout: float,
+    until: Callable[[Dict[str, Any]], bool] = is_terminal,
+    on_status: Optional[Callable[[str], Awaitable[None]]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Wait until a project satisfies until(), using webhooks when available
+    
+    With the webhook receiver running, waits on the event bus and polls only
+    as a slow safety net; otherwise polls with an adaptive interval.
+    
+    Args:
+        project_id: UUID of the project
+        timeout: Maximum seconds to wait
+        until: Predicate on a project object or webhook event (default: completed/failed)
+        on_status: Awaited with each new status as it is observed
+        
+    Returns:
+        The project/event that satisfied until(), an error dict for errors that
+        will not fix themselves, or None on timeout
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    schedule = AdaptivePollSchedule.from_env()
+    receiver_running = webhook_receiver is not None and webhook_receiver.running
+    last_status: Optional[str] = None
+    
+    async def observe(project: Dict[str, Any]) -> bool:
+        nonlocal last_status
+        status = project.get('status', 'unknown')
+        if status != last_status:
+            last_status = status
+            if on_status is not None:
+                await on_status(status)
+        return until(project)
+    
+    # Webhook first: the notification usually arrives before any poll would be useful
+    if receiver_running:
+        first_wait = min(env_float("SUBMAGIC_WEBHOOK_FALLBACK_POLL", 120.0), timeout)
+        event = await event_bus.wait(project_id, first_wait, until)
+        if event is not None and await observe(event):
+            return event
+    
+    while True:
+        result = await fetch_project(project_id, revalidate=True)
+        
+        if "error" in result:
+            # Rate limiting is temporary; anything else (bad ID, auth) will not fix itself
+            if result["error"] != "Rate limit exceeded":
+                return result
+            status = last_status or "unknown"
+        else:
+            status = result.get('status', 'unknown')
+            event_bus.publish(project_event(result))
+            if await observe(result):
+                return result
+        
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return None
+        
+        video_duration = (result.get('videoMetaData') or {}).get('duration') if "error" not in result else None
+        interval = min(schedule.next_interval(status, video_duration), remaining)
+        if receiver_running:
+            # Wakes only for an event satisfying until(), so a cached terminal
+            # event that is not yet good enough (e.g. no downloadUrl) still waits
+            event = await event_bus.wait(project_id, interval, until)
+            if event is not None and await observe(event):
+                return event
+        else:
+            await asyncio.sleep(interval)
+
+
+def mark_export_started(project_id: str) -> None:
+    """Forget pre-export state so waiters see the export's own result"""
+    # The earlier "completed" event belongs to processing; wait for the export's own
+    project_cache.invalidate(project_id)
+    transcript_indexes.invalidate(project_id)
+    event_bus.clear(project_id)
+    event_bus.publish({"id": project_id, "status": "exporting"})
+
+
+def export_ready(project: Dict[str, Any]) -> bool:
+    """True once an export has finished (download URL available) or the project failed"""
+    if project.get('status') == "failed":
+        return True
+    return project.get('status') == "completed" and bool(project.get('downloadUrl') or project.get('directUrl'))
+
+
+_run_store: Optional[RunStore] = None
+_pipeline_tasks: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+
+
+def get_run_store() -> RunStore:
+    """Checkpoint store for pipeline runs, at SUBMAGIC_PIPELINE_DB (default: runs.db in the state directory)"""
+    global _run_store
+    if _run_store is None:
+        path = env_str("SUBMAGIC_PIPELINE_DB") or os.path.join(state_dir(), "runs.db")
+        _run_store = RunStore(path, lease=env_float("SUBMAGIC_PIPELINE_LEASE", 60.0))
+    return _run_store
+
+
+def close_run_store() -> None:
+    global _run_store
+    if _run_store is not None:
+        store, _run_store = _run_store, None
+        store.close()
+
+
+def start_pipeline_run(run_id: str) -> "asyncio.Task[Dict[str, Any]]":
+    """Run (or resume) a pipeline in the background; one task per run_id"""
+    task = _pipeline_tasks.get(run_id)
+    if task is None:
+        # Background runs must not delay requests an agent is waiting on
+        with lane(BATCH):
+            task = asyncio.ensure_future(run_pipeline(run_id))
+        _pipeline_tasks[run_id] = task
+        task.add_done_callback(lambda _t: _pipeline_tasks.pop(run_id, None))
+    return task
+
+
+def resume_pipeline_runs() -> int:
+    """
+    Restart the unfinished runs this process can claim
+
+    Runs leased to another live server process are left to it.
+    """
+    runs = get_run_store().claim_unfinished()
+    for run in runs:
+        start_pipeline_run(run["run_id"])
+    return len(runs)
+
+
+async def cancel_pipeline_runs() -> None:
+    """Stop running pipelines at shutdown without touching their checkpoints"""
+    tasks = list(_pipeline_tasks.values())
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def run_pipeline(run_id: str) -> Dict[str, Any]:
+    """
+    Drive a run through create -> wait -> export -> wait
+    
+    Each stage is checkpointed before the next begins, so a cancelled run
+    (server shutdown) resumes from its last stage. A crash while the create
+    request itself is in flight can still create the project twice; every
+    later step is safe to repeat.
+    
+    Returns:
+        The final run record
+    """
+    store = get_run_store()
+    if not store.claim(run_id):
+        # Another server process owns the run
+        return store.get(run_id) or {}
+    run = store.get(run_id)
+    heartbeat = asyncio.ensure_future(_hold_run_lease(store, run_id, asyncio.current_task()))
+    try:
+        while run is not None and run["stage"] not in FINISHED_STAGES:
+            advanced = await _advance_pipeline(store, run)
+            run = store.get(run_id)
+            if not advanced:
+                # Taken over by another process; it carries on from our last checkpoint
+                break
+    except asyncio.CancelledError:
+        store.release(run_id)
+        raise
+    except Exception as e:
+        store.checkpoint(run_id, STAGE_FAILED, error=str(e))
+        run = store.get(run_id)
+    finally:
+        heartbeat.cancel()
+    return run or {}
+
+
+async def _hold_run_lease(store: RunStore, run_id: str, task: "Optional[asyncio.Task[Any]]") -> None:
+    """Renew the lease on run_id until cancelled; stop the run if it was taken over"""
+    while True:
+        await asyncio.sleep(store.lease / 3)
+        if not store.renew(run_id):
+            if task is not None:
+                task.cancel()
+            return
+
+
+async def _advance_pipeline(store: RunStore, run: Dict[str, Any]) -> bool:
+    """
+    Execute the run's current stage and checkpoint the next one
+
+    Returns False if the checkpoint was refused because another process has
+    taken the run over.
+    """
+    run_id, stage, project_id = run["run_id"], run["stage"], run["project_id"]
+    remaining = run["deadline_at"] - time.time()
+    task = asyncio.current_task()
+    
+    def fail(message: str) -> bool:
+        return store.checkpoint(run_id, STAGE_FAILED, error=message)
+    
+    async def note_status(status: str) -> None:
+        if not store.checkpoint(run_id, stage, project_status=status) and task is not None:
+            # Stop waiting, as _hold_run_lease does on a failed renew
+            task.cancel()
+    
+    if stage in (STAGE_PROCESSING, STAGE_RENDERING) and remaining <= 0:
+        return fail(f"Timed out while {stage}")
+    
+    elif stage == STAGE_CREATING:
+        result = await make_api_request("POST", "projects", data=run["create_body"])
+        if "error" in result:
+            return fail(f"{result['error']}: {result['message']}")
+        project_id = result.get("id") or result.get("projectId")
+        record_project_created(result, KIND_PROJECT, run["create_body"])
+        return store.checkpoint(run_id, STAGE_PROCESSING, project_id=project_id, project_status=result.get("status"))
+    
+    elif stage == STAGE_PROCESSING:
+        result = await wait_for_project(project_id, remaining, on_status=note_status)
+        if result is None:
+            return fail("Timed out waiting for processing")
+        if "error" in result and "message" in result:
+            return fail(f"{result['error']}: {result['message']}")
+        if result.get("status") == "failed":
+            return fail(f"Processing failed: {result.get('failureReason') or 'unknown reason'}")
+        return store.checkpoint(run_id, STAGE_EXPORTING, project_status=result.get("status"))
+    
+    elif stage == STAGE_EXPORTING:
+        export_body = dict(run["export_body"])
+        webhook_url = default_webhook_url()
+        if webhook_url and "webhookUrl" not in export_body:
+            export_body["webhookUrl"] = webhook_url
+        result = await make_api_request("POST", f"projects/{project_id}/export", data=export_body)
+        if "error" in result:
+            return fail(f"{result['error']}: {result['message']}")
+        mark_export_started(project_id)
+        return store.checkpoint(run_id, STAGE_RENDERING, project_status="exporting")
+    
+    elif stage == STAGE_RENDERING:
+        result = await wait_for_project(project_id, remaining, until=export_ready, on_status=note_status)
+        if result is None:
+            return fail("Timed out waiting for the export")
+        if "error" in result and "message" in result:
+            return fail(f"{result['error']}: {result['message']}")
+        if result.get("status") == "failed":
+            return fail(f"Export failed: {result.get('failureReason') or 'unknown reason'}")
+        return store.checkpoint(
+            run_id,
+            STAGE_COMPLETED,
+            project_status=result.get("status"),
+            download_url=result.get("downloadUrl"),
+            direct_url=result.get("directUrl")
+        )
+    
+    return fail(f"Unknown stage: {stage}")
+
+
+def truncate_text(text: str, max_length: int = CHARACTER_LIMIT) -> str:
+    """Truncate text to maximum length with ellipsis"""
+    if len(text) <= max_length:
+        return text
+    return text[:max_length - 3] + "..."
+
+
+def format_project_response(project: Dict[str, Any], detail_level: str = "summary") -> str:
+    """
+    Format project data for LLM consumption
+    
+    Args:
+        project: Project data from API
+        detail_level: "summary" or "detailed"
+        
+    Returns:
+        Formatted markdown string
+    """
+    if detail_level == "summary":
+        return f"""# Project: {project.get('title', 'Untitled')}
+
+**ID:** `{project.get('id')}`
+**Status:** {project.get('status', 'unknown')}
+**Language:** {project.get('language', 'unknown')}
+**Template:** {project.get('templateName', 'default')}
+**Created:** {project.get('createdAt', 'unknown')}
+
+**Features Enabled:**
+- Magic Zooms: {'✓' if project.get('magicZooms') else '✗'}
+- Magic B-rolls: {'✓' if project.get('magicBrolls') else '✗'}
+- Remove Bad Takes: {'✓' if project.get('removeBadTakes') else '✗'}
+"""
+    
+    # Detailed format
+    output = f"""# Project Details: {project.get('title', 'Untitled')}
+
+## Basic Information
+- **Project ID:** `{project.get('id')}`
+- **Status:** {project.get('status', 'unknown')}
+- **Language:** {project.get('language', 'unknown')}
+- **Created:** {project.get('createdAt', 'unknown')}
+- **Updated:** {project.get('updatedAt', 'unknown')}
+
+## Styling
 - **Template:** {project.get('templateName', 'default')}
 - **User Theme ID:** {project.get('userThemeId', 'none')}
 
@@ -362,11 +1576,544 @@ def format_project_response(project: Dict[str, Any], detail_level: str = "summar
     return truncate_text(output)
 
 
+def build_create_project_body(input_data: CreateProjectInput) -> Dict[str, Any]:
+    """Convert a validated CreateProjectInput into the POST /projects request body"""
+    request_body = {
+        "title": input_data.title,
+        "language": input_data.language,
+        "videoUrl": input_data.video_url,
+        "magicZooms": input_data.magic_zooms,
+        "magicBrolls": input_data.magic_brolls,
+        "magicBrollsPercentage": input_data.magic_brolls_percentage,
+        "removeSilencePace": input_data.remove_silence_pace,
+        "removeBadTakes": input_data.remove_bad_takes
+    }
+    
+    if input_data.template_name:
+        request_body["templateName"] = input_data.template_name
+    
+    if input_data.user_theme_id:
+        request_body["userThemeId"] = input_data.user_theme_id
+    
+    if input_data.webhook_url:
+        request_body["webhookUrl"] = input_data.webhook_url
+    
+    if input_data.dictionary:
+        request_body["dictionary"] = input_data.dictionary
+    
+    return request_body
+
+
+def build_upload_form_fields(input_data: UploadProjectInput) -> Dict[str, str]:
+    """Encode project options as the string form fields POST /projects/upload expects"""
+    fields = {}
+    for key, value in build_create_project_body(input_data).items():
+        if key == "videoUrl" or value is None:
+            continue
+        if isinstance(value, bool):
+            fields[key] = "true" if value else "false"
+        elif isinstance(value, list):
+            fields[key] = json.dumps(value)
+        else:
+            fields[key] = str(value)
+    return fields
+
+
+_batch_ledger: Optional[BatchLedger] = None
+
+
+def get_batch_ledger() -> BatchLedger:
+    """Ledger of batch items already created, stored in the state directory"""
+    global _batch_ledger
+    if _batch_ledger is None:
+        _batch_ledger = BatchLedger(
+            os.path.join(state_dir(), "batch_ledger.json"),
+            ttl=env_float("SUBMAGIC_BATCH_LEDGER_TTL", 24 * 3600)
+        )
+    return _batch_ledger
+
+
+async def create_projects_batch(
+    items: List[Dict[str, Any]],
+    max_concurrency: Optional[int] = None,
+    batch_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Create many projects concurrently
+    
+    Every item is validated with CreateProjectInput before anything is sent; if
+    any item is invalid, nothing is submitted. Valid batches are submitted with
+    at most max_concurrency requests in flight, all drawing on the shared
+    standard-operations rate limit. Items already created by an earlier run of
+    the same batch (same request body and batch_id, within the ledger TTL) are
+    not submitted again.
+    
+    Args:
+        items: Dicts with CreateProjectInput fields (title, language, video_url, ...)
+        max_concurrency: Maximum simultaneous create requests (default: SUBMAGIC_BATCH_CONCURRENCY or 10)
+        batch_id: Caller's name for this batch; only calls with the same batch_id
+            share ledger entries
+        
+    Returns:
+        One result per input, in order: {index, title, status, project_id, error}
+        where status is "created", "existing", "duplicate", "invalid", "not_submitted" or "error"
+    """
+    validated: List[Optional[CreateProjectInput]] = []
+    results: List[Dict[str, Any]] = []
+    for index, item in enumerate(items):
+        item = dict(item)
+        if not item.get("webhook_url"):
+            item["webhook_url"] = default_webhook_url()
+        try:
+            validated.append(CreateProjectInput(**item))
+            results.append({"index": index, "title": item.get("title"), "status": "pending"})
+        except Exception as e:
+            validated.append(None)
+            results.append({"index": index, "title": item.get("title"), "status": "invalid", "error": str(e)})
+    
+    if any(input_data is None for input_data in validated):
+        for result in results:
+            if result["status"] == "pending":
+                result["status"] = "not_submitted"
+        return results
+    
+    ledger = get_batch_ledger()
+    pending: Dict[str, List[int]] = {}
+    bodies: Dict[str, Dict[str, Any]] = {}
+    for index, input_data in enumerate(validated):
+        body = build_create_project_body(input_data)
+        key = request_key(body, batch_id)
+        existing = ledger.get(key)
+        if existing:
+            results[index].update(status="existing", project_id=existing)
+        elif key in pending:
+            # Identical item earlier in this batch: share its result instead of creating twice
+            pending[key].append(index)
+        else:
+            pending[key] = [index]
+            bodies[key] = body
+    
+    async def submit(key: str) -> None:
+        result = await make_api_request("POST", "projects", data=bodies[key])
+        first, *duplicates = pending[key]
+        if "error" in result:
+            results[first].update(status="error", error=f"{result['error']}: {result['message']}")
+        else:
+            project_id = result.get("id") or result.get("projectId")
+            ledger.record(key, project_id)
+            record_project_created(result, KIND_PROJECT, bodies[key])
+            results[first].update(status="created", project_id=project_id)
+        for index in duplicates:
+            results[index].update(
+                status="duplicate",
+                project_id=results[first].get("project_id"),
+                error=results[first].get("error")
+            )
+    
+    limit = max_concurrency or env_int("SUBMAGIC_BATCH_CONCURRENCY", 10)
+    with lane(BATCH):
+        await gather_bounded(list(pending), submit, limit)
+    return results
+
+
+_registry: Optional[ProjectRegistry] = None
+
+
+def get_registry() -> Optional[ProjectRegistry]:
+    """
+    Local SQLite registry of known projects, opened on first use
+    
+    Stored at SUBMAGIC_REGISTRY_PATH (default: projects.db in the state directory).
+    Returns None when disabled with SUBMAGIC_REGISTRY=false.
+    """
+    global _registry
+    if _registry is None and env_bool("SUBMAGIC_REGISTRY", True):
+        path = env_str("SUBMAGIC_REGISTRY_PATH") or os.path.join(state_dir(), "projects.db")
+        _registry = ProjectRegistry(path)
+    return _registry
+
+
+def close_registry() -> None:
+    global _registry
+    if _registry is not None:
+        registry, _registry = _registry, None
+        registry.close()
+
+
+def record_project_created(result: Dict[str, Any], kind: str, params: Dict[str, Any]) -> None:
+    """Remember a newly created project; registry problems never fail the tool call"""
+    project_id = result.get('id') or result.get('projectId')
+    registry = get_registry()
+    if not project_id or registry is None:
+        return
+    try:
+        registry.record_created(
+            project_id,
+            kind,
+            result.get('title') or params.get('title'),
+            params,
+            result.get('status')
+        )
+    except sqlite3.Error:
+        pass
+
+
+def _record_project_event(event: Dict[str, Any]) -> None:
+    """Event bus listener: keep the registry's last-known status and output URLs current"""
+    registry = get_registry()
+    if registry is None:
+        return
+    try:
+        registry.update_status(event)
+    except sqlite3.Error:
+        pass
+
+
+event_bus.add_listener(_record_project_event)
+event_bus.add_listener(project_cache.observe)
+
+
+def format_project_event(event: Dict[str, Any]) -> str:
+    """Format a webhook event (or project object) as a compact status report"""
+    project_id = event.get('projectId') or event.get('id')
+    status = event.get('status', 'unknown')
+    output = f"""# Project {project_id}
+
+**Status:** {status}
+"""
+    if event.get('title'):
+        output += f"**Title:** {event['title']}\n"
+    if event.get('downloadUrl'):
+        output += f"**Download URL:** {event['downloadUrl']}\n"
+    if event.get('directUrl'):
+        output += f"**Direct URL:** {event['directUrl']}\n"
+    if status == "failed":
+        output += f"**Reason:** {event.get('failureReason') or event.get('error') or 'Unknown error'}\n"
+    
+    clips = event.get('magicClips') or []
+    if clips:
+        output += f"\n## Magic Clips ({len(clips)})\n"
+        for clip in clips:
+            output += f"- `{clip.get('id')}` {clip.get('title', '')} ({clip.get('status', 'unknown')})\n"
+    
+    return truncate_text(output)
+
+
+def project_event(project: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a full project object to the fields carried by webhook events (drops the transcript)"""
+    keys = ("id", "title", "status", "downloadUrl", "directUrl", "previewUrl", "failureReason", "magicClips")
+    return {key: project[key] for key in keys if key in project}
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format seconds as MM:SS.ss (or H:MM:SS.ss for long videos)"""
+    minutes, secs = divmod(max(seconds, 0.0), 60)
+    hours, minutes = divmod(int(minutes), 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:05.2f}"
+    return f"{minutes:02d}:{secs:05.2f}"
+
+
+def format_transcript_segment(word: Dict[str, Any]) -> str:
+    """One transcript table row: start, end, type and text"""
+    bounds = segment_bounds(word)
+    start, end = (format_timestamp(bounds[0]), format_timestamp(bounds[1])) if bounds else ("?", "?")
+    kind = word.get('type', 'word')
+    text = str(word.get('text', '')).replace('|', '/').strip()
+    if kind == "silence" and bounds:
+        text = f"_(silence {bounds[1] - bounds[0]:.2f}s)_"
+    return f"| {start} | {end} | {kind} | {text} |"
+
+
+def format_pipeline_run(run: Dict[str, Any]) -> str:
+    """Render a pipeline run's progress, outputs or failure"""
+    stage = run['stage']
+    if stage in STAGES:
+        step = f"step {STAGES.index(stage) + 1} of {len(STAGES)}"
+    else:
+        step = "stopped"
+    elapsed = time.time() - run['created_at']
+    output = f"""# Pipeline Run: {run.get('title') or 'Untitled'}
+
+**Run ID:** `{run['run_id']}`
+**Stage:** {stage} ({step})
+**Project ID:** `{run.get('project_id') or 'not created yet'}`
+**Project Status:** {run.get('project_status') or 'unknown'}
+**Elapsed:** {elapsed / 60:.1f} min
+"""
+    if run.get('download_url') or run.get('direct_url'):
+        output += "\n## Output\n"
+        if run.get('download_url'):
+            output += f"- **Download URL:** {run['download_url']}\n"
+        if run.get('direct_url'):
+            output += f"- **Direct URL:** {run['direct_url']}\n"
+    if run.get('error'):
+        output += f"\n**Error:** {run['error']}\n"
+    if stage not in FINISHED_STAGES:
+        output += f"\nCheck again with `submagic_get_pipeline_run(\"{run['run_id']}\", wait_seconds=300)`."
+    return output
+
+
+def clip_filename(index: int, clip: Dict[str, Any]) -> str:
+    """Stable local file name for a clip: position, title and the start of its ID"""
+    clip_id = str(clip.get('id') or index)
+    return f"{index:02d}-{safe_filename(str(clip.get('title') or ''), 'clip')}-{clip_id[:8]}.mp4"
+
+
+def format_clips_table(clips: List[Dict[str, Any]]) -> str:
+    """Render magic clips as a compact markdown table"""
+    output = "| # | Clip ID | Title | Duration | Status | URL |\n|---|---|---|---|---|---|\n"
+    for i, clip in enumerate(clips, 1):
+        title = (clip.get('title') or '-').replace('|', '/')
+        duration = clip.get('duration')
+        duration_text = f"{float(duration):.1f}s" if isinstance(duration, (int, float)) else '-'
+        url = clip.get('directUrl') or clip.get('downloadUrl') or clip.get('previewUrl') or '-'
+        output += f"| {i} | `{clip.get('id', '-')}` | {title} | {duration_text} | {clip.get('status', 'unknown')} | {url} |\n"
+    return output
+
+
+def format_size(size: int) -> str:
+    """Human-readable byte count"""
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 ** 2:
+        return f"{size / 1024:.1f} KB"
+    if size < 1024 ** 3:
+        return f"{size / 1024 ** 2:.1f} MB"
+    return f"{size / 1024 ** 3:.2f} GB"
+
+
+async def download_clips(
+    clips: List[Dict[str, Any]],
+    directory: str,
+    limit: int
+) -> List[Dict[str, Any]]:
+    """
+    Download every completed clip into directory, at most limit at a time
+    
+    Failures are reported per clip; their partial files stay on disk so the
+    next call resumes them.
+    """
+    client = get_http_client()
+    chunk_size = env_int("SUBMAGIC_DOWNLOAD_CHUNK_SIZE", 1024 * 1024)
+    
+    async def fetch(item: Any) -> Dict[str, Any]:
+        index, clip = item
+        row = {"index": index, "file": clip_filename(index, clip)}
+        url = clip.get('directUrl') or clip.get('downloadUrl')
+        if clip.get('status', 'completed') != "completed" or not url:
+            return dict(row, result=f"not ready ({clip.get('status', 'unknown')})")
+        try:
+            download = await download_file(client, url, os.path.join(directory, row['file']), chunk_size)
+        except (DownloadError, httpx.HTTPError, OSError) as e:
+            return dict(row, result=f"error: {e}")
+        if download.skipped:
+            return dict(row, result="already downloaded", size=download.size)
+        DOWNLOAD_BYTES.inc(download.transferred, tool=current_tool.get())
+        result = f"resumed at {format_size(download.resumed_from)}" if download.resumed_from else "downloaded"
+        return dict(row, result=result, size=download.size)
+    
+    return await gather_bounded(list(enumerate(clips, 1)), fetch, limit)
+
+
+async def download_project_output(project_id: str, directory: str, segments: int) -> Dict[str, Any]:
+    """
+    Download one project's rendered video and verify it
+    
+    Returns a report row; errors are reported in the row rather than raised so
+    one project never fails a batch.
+    """
+    row: Dict[str, Any] = {"id": project_id}
+    project = await fetch_project(project_id)
+    if "error" in project:
+        return dict(row, result=f"error: {project['error']}: {project['message']}")
+    event_bus.publish(project_event(project))
+    
+    url = project.get('directUrl') or project.get('downloadUrl')
+    if not url:
+        status = project.get('status', 'unknown')
+        hint = "run submagic_export_project first" if status == "completed" else f"status: {status}"
+        return dict(row, result=f"not ready ({hint})")
+    
+    row['file'] = f"{safe_filename(str(project.get('title') or ''), 'video')}-{project_id[:8]}.mp4"
+    chunk_size = env_int("SUBMAGIC_DOWNLOAD_CHUNK_SIZE", 1024 * 1024)
+    try:
+        download = await download_segmented(
+            get_http_client(),
+            url,
+            os.path.join(directory, row['file']),
+            segments=segments,
+            chunk_size=chunk_size,
+            min_segment_size=env_int("SUBMAGIC_DOWNLOAD_MIN_SEGMENT_SIZE", 8 * 1024 * 1024)
+        )
+        checks = await verify_download(download, chunk_size)
+    except (DownloadError, httpx.HTTPError, OSError) as e:
+        return dict(row, result=f"error: {e}")
+    
+    if download.skipped:
+        result = "already downloaded"
+    else:
+        DOWNLOAD_BYTES.inc(download.transferred, tool=current_tool.get())
+        result = f"resumed at {format_size(download.resumed_from)}" if download.resumed_from else "downloaded"
+        if download.segments > 1:
+            result += f" ({download.segments} segments)"
+    verified = "size, md5" if checks['md5_verified'] else "size"
+    return dict(row, result=result, size=download.size, sha256=checks['sha256'], verified=verified)
+
+
+def format_status_table(rows: List[Dict[str, Any]]) -> str:
+    """Render per-project results as a compact markdown table"""
+    output = "| Project ID | Status | Title | Output / Error |\n|---|---|---|---|\n"
+    for row in rows:
+        detail = row.get('error') or row.get('directUrl') or row.get('downloadUrl') or '-'
+        title = (row.get('title') or '-').replace('|', '/')
+        output += f"| `{row['id']}` | {row['status']} | {title} | {detail} |\n"
+    return output
+
+
+def _ratio(hits: float, misses: float) -> float:
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+def collect_component_metrics() -> List[Family]:
+    """Metric families read from the caches, scheduler, key pool and connection pool at scrape time"""
+    caches = {
+        "catalog": catalog_cache.snapshot(),
+        "project": project_cache.snapshot(),
+        "transcript_index": transcript_indexes.snapshot(),
+    }
+    scheduler_stats = scheduler.snapshot()
+    connections = http_client_info()
+    families: List[Family] = [
+        ("submagic_cache_hits_total", "Cache lookups answered from memory", "counter",
+         [({"cache": name}, snap["hits"] + snap.get("stale_hits", 0)) for name, snap in caches.items()]),
+        ("submagic_cache_misses_total", "Cache lookups that went upstream", "counter",
+         [({"cache": name}, snap["misses"]) for name, snap in caches.items()]),
+        ("submagic_cache_hit_ratio", "Hits / (hits + misses) since start", "gauge",
+         [({"cache": name}, _ratio(snap["hits"] + snap.get("stale_hits", 0), snap["misses"])) for name, snap in caches.items()]),
+        ("submagic_cache_entries", "Entries currently cached", "gauge",
+         [({"cache": name}, snap["entries"]) for name, snap in caches.items()]),
+        ("submagic_coalesced_requests_total", "Requests that joined an identical in-flight request", "counter",
+         [({"source": "api"}, request_flight.coalesced),
+          ({"source": "catalog"}, caches["catalog"]["coalesced"]),
+          ({"source": "transcript_index"}, _transcript_flight.coalesced)]),
+        ("submagic_scheduler_queued", "Requests waiting for a scheduler worker", "gauge",
+         [({"lane": name}, lane_stats["queued"]) for name, lane_stats in scheduler_stats["lanes"].items()]),
+        ("submagic_scheduler_running", "Requests being executed by scheduler workers", "gauge",
+         [({}, scheduler_stats["running"])]),
+        ("submagic_scheduler_dispatched_total", "Requests handed to a scheduler worker", "counter",
+         [({"lane": name}, lane_stats["dispatched"]) for name, lane_stats in scheduler_stats["lanes"].items()]),
+        ("submagic_http_connections_opened_total", "TCP connections opened by the shared client", "counter",
+         [({}, connections["connections_opened"])]),
+        ("submagic_http_connection_reuse_ratio", "Share of requests sent on a kept-alive connection", "gauge",
+         [({}, connections["reuse_ratio"])]),
+    ]
+    if _key_pool is not None:
+        # Each key spends its own buckets; a lone key shares the module-level limiter
+        tokens = [
+            ({"key": key.id, "quota": quota}, info["tokens"])
+            for key in _key_pool.keys
+            for quota, info in (key.limiter or rate_limiter).snapshot()["classes"].items()
+        ]
+    else:
+        tokens = [({"quota": quota}, info["tokens"]) for quota, info in rate_limiter.snapshot()["classes"].items()]
+    families.append(("submagic_rate_limit_tokens", "Requests left in each client-side quota bucket", "gauge", tokens))
+    if _key_pool is not None:
+        keys = _key_pool.snapshot()["keys"]
+        families.append(("submagic_api_key_requests_in_flight", "Requests in flight per API key", "gauge",
+                         [({"key": k["id"]}, k["in_flight"]) for k in keys]))
+        families.append(("submagic_api_key_active", "1 while an API key is in rotation", "gauge",
+                         [({"key": k["id"]}, 1 if k["active"] else 0) for k in keys]))
+    return families
+
+
+metrics.add_collector(collect_component_metrics)
+
+
+def format_server_stats() -> str:
+    """Markdown summary of tool, API, cache and queue metrics"""
+    output = "# Server Statistics\n\n## Tools\n\n"
+    tool_series = TOOL_DURATION.series()
+    if tool_series:
+        output += "| Tool | Calls | Errors | Avg | p95 |\n|---|---|---|---|---|\n"
+        for labels, series in tool_series:
+            name = labels["tool"]
+            calls = TOOL_CALLS.total(tool=name)
+            errors = TOOL_CALLS.total(tool=name, outcome="error")
+            # Histogram buckets only bound the percentile from above
+            p95 = TOOL_DURATION.quantile(0.95, tool=name)
+            output += (
+                f"| {name} | {calls:.0f} | {errors:.0f} | {series.sum / series.count * 1000:.0f} ms "
+                f"| ≤ {p95 * 1000:.0f} ms |\n"
+            )
+    else:
+        output += "No tool calls yet.\n"
+    
+    output += "\n## API Endpoints\n\n"
+    endpoints = sorted({(labels["method"], labels["endpoint"]) for labels, _ in API_REQUESTS.samples()})
+    if endpoints:
+        output += "| Endpoint | Requests | Failed | Avg | Status codes |\n|---|---|---|---|---|\n"
+        for method, endpoint in endpoints:
+            requests = API_REQUESTS.total(method=method, endpoint=endpoint)
+            failed = requests - API_REQUESTS.total(method=method, endpoint=endpoint, outcome="ok")
+            durations = [s for labels, s in API_DURATION.series() if labels["method"] == method and labels["endpoint"] == endpoint]
+            total_time = sum(s.sum for s in durations)
+            count = sum(s.count for s in durations)
+            codes = ", ".join(
+                f"{labels['status']}×{value:.0f}" for labels, value in API_RESPONSES.samples()
+                if labels["method"] == method and labels["endpoint"] == endpoint
+            )
+            output += (
+                f"| {method} {endpoint} | {requests:.0f} | {failed:.0f} "
+                f"| {total_time / count * 1000 if count else 0:.0f} ms | {codes or '-'} |\n"
+            )
+        output += (
+            f"\nRetries: {API_RETRIES.total():.0f} · 429s from Submagic: "
+            f"{API_RATE_LIMITED.total(source='upstream'):.0f} · refused locally: "
+            f"{API_RATE_LIMITED.total(source='local'):.0f}\n"
+        )
+    else:
+        output += "No API requests yet.\n"
+    
+    output += "\n## Caches\n\n| Cache | Entries | Hits | Misses | Hit ratio |\n|---|---|---|---|---|\n"
+    for name, snap in (
+        ("catalog", catalog_cache.snapshot()),
+        ("project", project_cache.snapshot()),
+        ("transcript_index", transcript_indexes.snapshot()),
+    ):
+        hits = snap["hits"] + snap.get("stale_hits", 0)
+        output += f"| {name} | {snap['entries']} | {hits} | {snap['misses']} | {_ratio(hits, snap['misses']):.0%} |\n"
+    flight = request_flight.snapshot()
+    output += f"\nCoalesced GETs: {flight['coalesced']} of {flight['calls']} joined an identical request already in flight.\n"
+    checked = catalog_index.snapshot()
+    output += (
+        f"Catalog validation: {checked['rejected']} of {checked['checks']} values rejected locally "
+        f"({checked['languages']} languages, {checked['templates']} templates cached).\n"
+    )
+    
+    scheduler_stats = scheduler.snapshot()
+    connections = http_client_info()
+    output += (
+        f"\n## Queue and Connections\n\n"
+        f"- Scheduler: {scheduler_stats['running']} running, {scheduler_stats['queued']} queued, "
+        f"{scheduler_stats['dispatch_rate']:.2f} dispatches/s\n"
+        f"- HTTP pool: {connections['requests']} requests, {connections['connections_opened']} connections opened "
+        f"({connections['reuse_ratio']:.0%} reused)\n"
+    )
+    if _key_pool is not None and len(_key_pool) > 1:
+        active = sum(1 for k in _key_pool.snapshot()["keys"] if k["active"])
+        output += f"- API keys: {active} of {len(_key_pool)} in rotation\n"
+    if metrics_server is not None and metrics_server.running:
+        output += f"- Prometheus endpoint: http://{metrics_server.host}:{metrics_server.port}{metrics_server.path}\n"
+    return output
+
+
 # ==============================================================================
 # MCP Tool Implementations
 # ==============================================================================
 
-@app.tool()
+@app.tool(structured_output=False)
+@instrument_tool
 async def submagic_list_languages() -> List[TextContent]:
     """
     Get list of supported languages for transcription and captions.
@@ -380,7 +2127,7 @@ async def submagic_list_languages() -> List[TextContent]:
         
     Rate Limit: 1000 requests/hour
     """
-    result = await make_api_request("GET", "languages")
+    result = await fetch_catalog("languages")
     
     if "error" in result:
         return [TextContent(
@@ -410,7 +2157,8 @@ Available language codes for transcription and captions:
     return [TextContent(type="text", text=truncate_text(output))]
 
 
-@app.tool()
+@app.tool(structured_output=False)
+@instrument_tool
 async def submagic_list_templates() -> List[TextContent]:
     """
     Get list of available video styling templates.
@@ -434,7 +2182,7 @@ async def submagic_list_templates() -> List[TextContent]:
         Use "Sara" for general social media
         Use "Beast" for entertainment content
     """
-    result = await make_api_request("GET", "templates")
+    result = await fetch_catalog("templates")
     
     if "error" in result:
         return [TextContent(
@@ -472,7 +2220,8 @@ Choose a template name to apply professional styling to your videos:
     return [TextContent(type="text", text=truncate_text(output))]
 
 
-@app.tool()
+@app.tool(structured_output=False)
+@instrument_tool
 async def submagic_create_project(
     title: str,
     language: str,
@@ -528,6 +2277,9 @@ async def submagic_create_project(
         magic_zooms=True
         magic_brolls=True
     """
+    # Route completion notifications to the built-in receiver when one is configured
+    webhook_url = webhook_url or default_webhook_url()
+    
     # Validate inputs
     try:
         input_data = CreateProjectInput(
@@ -550,31 +2302,9 @@ async def submagic_create_project(
             text=f"Input validation error: {str(e)}\n\nPlease check your parameters and try again."
         )]
     
-    # Prepare API request body
-    request_body = {
-        "title": input_data.title,
-        "language": input_data.language,
-        "videoUrl": input_data.video_url,
-        "magicZooms": input_data.magic_zooms,
-        "magicBrolls": input_data.magic_brolls,
-        "magicBrollsPercentage": input_data.magic_brolls_percentage,
-        "removeSilencePace": input_data.remove_silence_pace,
-        "removeBadTakes": input_data.remove_bad_takes
-    }
-    
-    if input_data.template_name:
-        request_body["templateName"] = input_data.template_name
+    request_body = build_create_project_body(input_data)
     
-    if input_data.user_theme_id:
-        request_body["userThemeId"] = input_data.user_theme_id
-    
-    if input_data.webhook_url:
-        request_body["webhookUrl"] = input_data.webhook_url
-    
-    if input_data.dictionary:
-        request_body["dictionary"] = input_data.dictionary
-    
-    result = await make_api_request("POST", "projects", data=request_body)
+    result = await make_api_request("POST", "projects", data=request_body)
     
     if "error" in result:
         return [TextContent(
@@ -582,6 +2312,8 @@ async def submagic_create_project(
             text=f"Error: {result['error']}\n{result['message']}\n\n{result.get('suggestion', '')}"
         )]
     
+    record_project_created(result, KIND_PROJECT, request_body)
+    
     formatted_output = format_project_response(result, detail_level="detailed")
     
     output = f"""{formatted_output}
@@ -592,72 +2324,589 @@ async def submagic_create_project(
 3. Once status is "completed", use `submagic_export_project` to download
 
 **Processing Time:** Usually 2-10 minutes depending on video length
-**Status Check:** Poll every 30-60 seconds until complete
+**Status Check:** Call `submagic_wait_for_project("{result.get('id')}")` to wait for completion in a single call
+"""
+    
+    return [TextContent(type="text", text=truncate_text(output))]
+
+
+@app.tool(structured_output=False)
+@instrument_tool
+async def submagic_upload_project(
+    title: str,
+    language: str,
+    file_path: str,
+    template_name: Optional[str] = None,
+    user_theme_id: Optional[str] = None,
+    webhook_url: Optional[str] = None,
+    dictionary: Optional[List[str]] = None,
+    magic_zooms: bool = True,
+    magic_brolls: bool = True,
+    magic_brolls_percentage: int = 75,
+    remove_silence_pace: Optional[str] = None,
+    remove_bad_takes: bool = True,
+    ctx: Optional[Context] = None
+) -> List[TextContent]:
+    """
+    Create a new video project by uploading a local video file.
+    
+    Same options as submagic_create_project, but the video is streamed from a
+    local MP4/MOV file instead of a public URL, so renders don't need to be
+    hosted anywhere first. The file is sent in chunks straight from disk, so
+    even 2GB files use constant memory. Progress notifications report bytes sent.
+    
+    Args:
+        title: Descriptive project title (1-100 characters)
+        language: Language code (get from submagic_list_languages)
+        file_path: Path to a local MP4 or MOV file (max 2GB, max 2 hours)
+        template_name: Styling template (get from submagic_list_templates)
+        user_theme_id: Custom theme UUID (cannot use with template_name)
+        webhook_url: URL for completion notification
+        dictionary: Custom words for better transcription accuracy
+        magic_zooms: Enable AI-powered dynamic zooms (default: true)
+        magic_brolls: Auto-insert B-roll footage (default: true)
+        magic_brolls_percentage: B-roll coverage 0-100% (default: 75)
+        remove_silence_pace: Silence removal speed: natural/fast/extra-fast (default: off)
+        remove_bad_takes: Remove filler words automatically (default: true)
+    
+    Returns:
+        Project ID and initial status information
+        
+    Rate Limit: 500 uploads/hour
+    
+    Example:
+        submagic_upload_project(
+            title="Local Render",
+            language="en",
+            file_path="/Users/me/renders/final.mp4",
+            template_name="Hormozi 2"
+        )
+    """
+    webhook_url = webhook_url or default_webhook_url()
+    
+    try:
+        input_data = UploadProjectInput(
+            title=title,
+            language=language,
+            file_path=file_path,
+            template_name=template_name,
+            user_theme_id=user_theme_id,
+            webhook_url=webhook_url,
+            dictionary=dictionary,
+            magic_zooms=magic_zooms,
+            magic_brolls=magic_brolls,
+            magic_brolls_percentage=magic_brolls_percentage,
+            remove_silence_pace=remove_silence_pace,
+            remove_bad_takes=remove_bad_takes
+        )
+    except Exception as e:
+        return [TextContent(
+            type="text",
+            text=f"Input validation error: {str(e)}\n\nPlease check your parameters and try again."
+        )]
+    
+    last_reported = -1
+    
+    async def report(sent: int, total: int) -> None:
+        # One notification per ~2% keeps multi-GB uploads from flooding the client
+        nonlocal last_reported
+        step = sent * 50 // max(total, 1)
+        if ctx is not None and (step > last_reported or sent == total):
+            last_reported = step
+            await ctx.report_progress(progress=sent, total=total, message=f"Uploaded {sent // (1024 * 1024)} MB")
+    
+    upload = MultipartFileUpload(
+        input_data.file_path,
+        build_upload_form_fields(input_data),
+        progress=report
+    )
+    
+    result = await make_api_request(
+        "POST",
+        "projects/upload",
+        content_factory=upload.stream,
+        extra_headers=upload.headers
+    )
+    
+    if "error" in result:
+        return [TextContent(
+            type="text",
+            text=f"Error: {result['error']}\n{result['message']}\n\n{result.get('suggestion', '')}"
+        )]
+    
+    record_project_created(result, KIND_UPLOAD, dict(upload.fields, file=input_data.file_path))
+    
+    formatted_output = format_project_response(result, detail_level="detailed")
+    
+    output = f"""{formatted_output}
+
+**Uploaded:** {os.path.basename(input_data.file_path)} ({upload.file_size / (1024 * 1024):.1f} MB)
+
+## Next Steps
+1. Save the project ID: `{result.get('id')}`
+2. Wait for processing with: `submagic_wait_for_project("{result.get('id')}")`
+3. Once status is "completed", use `submagic_export_project` to render
+"""
+    
+    return [TextContent(type="text", text=truncate_text(output))]
+
+
+@app.tool(structured_output=False)
+@instrument_tool
+async def submagic_create_projects_batch(
+    projects: List[Dict[str, Any]],
+    max_concurrency: Optional[int] = None,
+    batch_id: Optional[str] = None
+) -> List[TextContent]:
+    """
+    Create many video projects in one call.
+    
+    Each item takes the same fields as submagic_create_project (title, language,
+    video_url, template_name, magic_zooms, ...). All items are validated first;
+    if any is invalid, nothing is submitted and every problem is listed. Valid
+    batches are submitted concurrently within the standard rate limit.
+    
+    The batch is resumable: items that were already created by an earlier call
+    with the same parameters (within the last 24 hours) are reported as
+    "existing" and not created again, so after partial failures (e.g. rate
+    limiting) simply call it again with the same list and batch_id.
+    
+    Args:
+        projects: List of project definitions (1-500 items)
+        max_concurrency: Maximum simultaneous create requests (1-50, default: 10)
+        batch_id: Optional name for this batch (e.g. "season-2"); retries with the
+            same batch_id skip created items, a different batch_id creates them again
+    
+    Returns:
+        Table mapping each input to its project ID or error
+        
+    Rate Limit: One standard request (500/hour) per new project
+    
+    Example:
+        submagic_create_projects_batch([
+            {"title": "Episode 1", "language": "en", "video_url": "https://example.com/ep1.mp4"},
+            {"title": "Episode 2", "language": "en", "video_url": "https://example.com/ep2.mp4", "template_name": "Hormozi 2"}
+        ])
+    """
+    if not projects or len(projects) > 500:
+        return [TextContent(
+            type="text",
+            text="Input validation error: projects must contain between 1 and 500 items"
+        )]
+    if max_concurrency is not None and not 1 <= max_concurrency <= 50:
+        return [TextContent(
+            type="text",
+            text="Input validation error: max_concurrency must be between 1 and 50"
+        )]
+    
+    if batch_id is not None and not 1 <= len(batch_id) <= 200:
+        return [TextContent(
+            type="text",
+            text="Input validation error: batch_id must be between 1 and 200 characters"
+        )]
+    
+    results = await create_projects_batch(projects, max_concurrency, batch_id)
+    
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    summary = ", ".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+    
+    output = f"""# Batch Project Creation ({len(results)} items)
+
+**Summary:** {summary}
+
+| # | Title | Status | Project ID / Error |
+|---|---|---|---|
+"""
+    for result in results:
+        detail = f"`{result['project_id']}`" if result.get("project_id") else result.get("error", "-")
+        detail = str(detail).replace("\n", " ").replace("|", "/")
+        title = str(result.get("title") or "-").replace("|", "/")
+        output += f"| {result['index']} | {title} | {result['status']} | {detail} |\n"
+    
+    if counts.get("invalid"):
+        output += "\n**Nothing was submitted.** Fix the invalid items and call again."
+    elif counts.get("error"):
+        output += "\n**Some items failed.** Call again with the same list and batch_id to retry only those."
+    else:
+        output += "\n**Next Step:** Track progress with `submagic_get_project_many`."
+    
+    return [TextContent(type="text", text=truncate_text(output))]
+
+
+@app.tool(structured_output=False)
+@instrument_tool
+async def submagic_get_project(project_id: str) -> List[TextContent]:
+    """
+    Get detailed information about a specific project including processing status.
+    
+    Use this tool to:
+    - Check if processing is complete
+    - Get download URL for finished videos
+    - View applied settings and features
+    - Monitor progress of ongoing renders
+    
+    Project Statuses:
+    - "processing": Video is being transcribed and edited
+    - "completed": Ready to export/download
+    - "failed": Processing encountered an error
+    - "queued": Waiting to start processing
+    
+    Args:
+        project_id: UUID of the project (from submagic_create_project)
+    
+    Returns:
+        Complete project details including status and settings
+        
+    Rate Limit: 500 requests/hour
+    
+    Example:
+        Check status every 60 seconds:
+        submagic_get_project("550e8400-e29b-41d4-a716-446655440000")
+    """
+    try:
+        input_data = GetProjectInput(project_id=project_id)
+    except Exception as e:
+        return [TextContent(
+            type="text",
+            text=f"Input validation error: {str(e)}"
+        )]
+    
+    result = await fetch_project(input_data.project_id)
+    
+    if "error" in result:
+        return [TextContent(
+            type="text",
+            text=f"Error: {result['error']}\n{result['message']}\n\n{result.get('suggestion', '')}"
+        )]
+    
+    event_bus.publish(project_event(result))
+    
+    formatted_output = format_project_response(result, detail_level="detailed")
+    
+    status = result.get('status', 'unknown')
+    
+    if status == "processing":
+        formatted_output += "\n\n**⏳ Status: Processing**\nCheck again in 30-60 seconds, or use `submagic_wait_for_project` to wait in one call."
+    elif status == "completed":
+        formatted_output += "\n\n**✅ Status: Completed**\nReady to export! Use `submagic_export_project` to download."
+    elif status == "failed":
+        formatted_output += f"\n\n**❌ Status: Failed**\nError: {result.get('error', 'Unknown error')}"
+    
+    return [TextContent(type="text", text=truncate_text(formatted_output))]
+
+
+@app.tool(structured_output=False)
+@instrument_tool
+async def submagic_get_project_many(
+    project_ids: List[str],
+    max_concurrency: Optional[int] = None
+) -> List[TextContent]:
+    """
+    Check the status of many projects at once.
+    
+    Fetches every project concurrently (bounded by max_concurrency and the
+    shared client-side rate limiter) and returns one compact status table.
+    A failure for one ID is reported in its row and never fails the batch.
+    
+    Args:
+        project_ids: List of project UUIDs (1-500)
+        max_concurrency: Maximum simultaneous requests (1-50, default: 10)
+    
+    Returns:
+        Status counts plus a table of ID, status, title and output URL or error
+        
+    Rate Limit: One standard request (500/hour) per project
+    
+    Example:
+        submagic_get_project_many(["550e8400-...", "6ba7b810-..."])
+    """
+    try:
+        input_data = GetProjectManyInput(project_ids=project_ids, max_concurrency=max_concurrency)
+    except Exception as e:
+        return [TextContent(
+            type="text",
+            text=f"Input validation error: {str(e)}"
+        )]
+    
+    unique_ids = list(dict.fromkeys(pid.strip() for pid in input_data.project_ids if pid.strip()))
+    limit = input_data.max_concurrency or env_int("SUBMAGIC_BATCH_CONCURRENCY", 10)
+    
+    async def fetch(project_id: str) -> Dict[str, Any]:
+        result = await fetch_project(project_id)
+        if "error" in result:
+            return {"id": project_id, "status": "error", "error": f"{result['error']}: {result['message']}"}
+        event_bus.publish(project_event(result))
+        return dict(project_event(result), id=project_id)
+    
+    with lane(BATCH):
+        rows = await gather_bounded(unique_ids, fetch, limit)
+    
+    counts: Dict[str, int] = {}
+    for row in rows:
+        counts[row['status']] = counts.get(row['status'], 0) + 1
+    summary = ", ".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+    
+    output = f"""# Project Status ({len(rows)} projects)
+
+**Summary:** {summary}
+
+{format_status_table(rows)}"""
+    
+    return [TextContent(type="text", text=truncate_text(output))]
+
+
+@app.tool(structured_output=False)
+@instrument_tool
+async def submagic_get_transcript(
+    project_id: str,
+    start_time: Optional[float] = None,
+    end_time: Optional[float] = None,
+    page: int = 1,
+    page_size: int = 200
+) -> List[TextContent]:
+    """
+    Read a project's transcript one window at a time.
+    
+    Returns the timed word, silence and punctuation segments of a processed
+    project, filtered to a time range and paged. The transcript is parsed as
+    it streams in and indexed once per project revision, so even 2-hour
+    videos never need to fit in one response and later pages are served
+    from memory.
+    
+    Use this tool to:
+    - Read what is said between two timestamps
+    - Find exact startTime/endTime values for B-roll or edits
+    - Page through a long transcript
+    
+    Args:
+        project_id: UUID of the project
+        start_time: Only segments ending after this time in seconds (optional)
+        end_time: Only segments starting before this time in seconds (optional)
+        page: Page of matching segments, 1-based (default: 1)
+        page_size: Segments per page, 1-500 (default: 200)
+    
+    Returns:
+        Table of segments with start/end timestamps, plus paging information
+        
+    Rate Limit: 500 requests/hour
+    
+    Example:
+        submagic_get_transcript("550e8400-...", start_time=60, end_time=120)
+    """
+    try:
+        input_data = GetTranscriptInput(
+            project_id=project_id,
+            start_time=start_time,
+            end_time=end_time,
+            page=page,
+            page_size=page_size
+        )
+    except Exception as e:
+        return [TextContent(
+            type="text",
+            text=f"Input validation error: {str(e)}"
+        )]
+    
+    # Pages are sliced from the cached index, so paging does not download the transcript again
+    index = await get_transcript_index(input_data.project_id)
+    if isinstance(index, dict):
+        return [TextContent(
+            type="text",
+            text=f"Error: {index['error']}\n{index['message']}\n\n{index.get('suggestion', '')}"
+        )]
+    result = index.project
+    
+    if not len(index):
+        return [TextContent(
+            type="text",
+            text=f"No transcript available for project `{input_data.project_id}` (status: {result.get('status', 'unknown')}). Transcripts appear once transcription has finished."
+        )]
+    
+    matching = index.window(input_data.start_time, input_data.end_time)
+    offset = (input_data.page - 1) * input_data.page_size
+    page_segments = [index.segment(i) for i in matching[offset:offset + input_data.page_size]]
+    pages = max((len(matching) + input_data.page_size - 1) // input_data.page_size, 1)
+    range_label = ""
+    if input_data.start_time is not None or input_data.end_time is not None:
+        range_start = format_timestamp(input_data.start_time or 0.0)
+        range_end = format_timestamp(input_data.end_time) if input_data.end_time is not None else "end"
+        range_label = f" ({range_start}–{range_end})"
+    
+    output = f"""# Transcript: {result.get('title', 'Untitled')}{range_label}
+
+**Project ID:** `{input_data.project_id}`
+**Duration:** {format_timestamp(index.duration)} ({len(index)} segments)
+**Page:** {input_data.page} of {pages} ({len(matching)} matching segments)
+
+| Start | End | Type | Text |
+|---|---|---|---|
+"""
+    output += "\n".join(format_transcript_segment(word) for word in page_segments)
+    
+    if input_data.page < pages:
+        output += f"\n\nMore segments available. Call again with `page={input_data.page + 1}`."
+    
+    return [TextContent(type="text", text=truncate_text(output))]
+
+
+@app.tool(structured_output=False)
+@instrument_tool
+async def submagic_find_in_transcript(
+    project_id: str,
+    phrase: Optional[str] = None,
+    min_silence_seconds: Optional[float] = None,
+    max_results: int = 50
+) -> List[TextContent]:
+    """
+    Find exact timestamps in a project's transcript.
+    
+    Locates every occurrence of a word or phrase and/or lists pauses longer
+    than a threshold, returning start/end times in seconds that can be used
+    directly as startTime/endTime in custom_broll_items of
+    submagic_update_project. The transcript of a completed project is indexed
+    once and kept in memory, so repeated searches do not call the API.
+    
+    Args:
+        project_id: UUID of the project
+        phrase: Word or phrase to locate, case and punctuation ignored (optional)
+        min_silence_seconds: List silence gaps longer than this (optional)
+        max_results: Maximum matches and gaps listed, 1-500 (default: 50)
+    
+    Returns:
+        Tables of phrase matches (with surrounding text) and silence gaps
+        
+    Rate Limit: 500 requests/hour (first search per project only)
+    
+    Example:
+        Find where the product is mentioned and pauses longer than 1.5s:
+        submagic_find_in_transcript("550e8400-...", phrase="our new app", min_silence_seconds=1.5)
+    """
+    try:
+        input_data = FindInTranscriptInput(
+            project_id=project_id,
+            phrase=phrase,
+            min_silence_seconds=min_silence_seconds,
+            max_results=max_results
+        )
+    except Exception as e:
+        return [TextContent(
+            type="text",
+            text=f"Input validation error: {str(e)}"
+        )]
+    
+    index = await get_transcript_index(input_data.project_id)
+    if isinstance(index, dict):
+        return [TextContent(
+            type="text",
+            text=f"Error: {index['error']}\n{index['message']}\n\n{index.get('suggestion', '')}"
+        )]
+    
+    if not len(index):
+        return [TextContent(
+            type="text",
+            text=f"No transcript available for project `{input_data.project_id}` yet. Transcripts appear once transcription has finished."
+        )]
+    
+    output = f"""# Transcript Search
+
+**Project ID:** `{input_data.project_id}`
+**Duration:** {format_timestamp(index.duration)} ({len(index)} segments)
 """
     
+    if input_data.phrase:
+        matches = index.find_phrase(input_data.phrase)
+        output += f'\n## "{input_data.phrase}" ({len(matches)} matches)\n\n'
+        if matches:
+            output += "| # | startTime | endTime | Timestamp | Context |\n|---|---|---|---|---|\n"
+            for i, (start, end) in enumerate(matches[:input_data.max_results], 1):
+                context = index.text_between(start - 2.0, end + 2.0).replace('|', '/')
+                output += f"| {i} | {start:.2f} | {end:.2f} | {format_timestamp(start)} | {context} |\n"
+            if len(matches) > input_data.max_results:
+                output += f"\n{len(matches) - input_data.max_results} more matches not shown.\n"
+        else:
+            output += "No matches.\n"
+    
+    if input_data.min_silence_seconds is not None:
+        gaps = index.silence_gaps(input_data.min_silence_seconds)
+        output += f"\n## Silence longer than {input_data.min_silence_seconds:g}s ({len(gaps)} gaps)\n\n"
+        if gaps:
+            output += "| # | startTime | endTime | Duration | Timestamp |\n|---|---|---|---|---|\n"
+            for i, (start, end) in enumerate(gaps[:input_data.max_results], 1):
+                output += f"| {i} | {start:.2f} | {end:.2f} | {end - start:.2f}s | {format_timestamp(start)} |\n"
+            if len(gaps) > input_data.max_results:
+                output += f"\n{len(gaps) - input_data.max_results} more gaps not shown.\n"
+        else:
+            output += "No gaps.\n"
+    
+    output += "\nUse startTime/endTime (seconds) in `custom_broll_items` of `submagic_update_project`."
+    
     return [TextContent(type="text", text=truncate_text(output))]
 
 
-@app.tool()
-async def submagic_get_project(project_id: str) -> List[TextContent]:
+@app.tool(structured_output=False)
+@instrument_tool
+async def submagic_list_local_projects(
+    status: Optional[str] = "active",
+    limit: int = 50
+) -> List[TextContent]:
     """
-    Get detailed information about a specific project including processing status.
-    
-    Use this tool to:
-    - Check if processing is complete
-    - Get download URL for finished videos
-    - View applied settings and features
-    - Monitor progress of ongoing renders
+    List projects this server has created or seen, from the local registry.
     
-    Project Statuses:
-    - "processing": Video is being transcribed and edited
-    - "completed": Ready to export/download
-    - "failed": Processing encountered an error
-    - "queued": Waiting to start processing
+    Answers questions like "what's still processing?" instantly and without
+    using any API quota. Statuses are the last ones observed through
+    submagic_get_project, submagic_wait_for_project, batch checks or webhooks;
+    call submagic_get_project_many to refresh them from the API.
     
     Args:
-        project_id: UUID of the project (from submagic_create_project)
+        status: "active" (default) for anything not completed/failed, an exact
+            status such as "completed", or null for everything
+        limit: Maximum rows to return (1-500, default: 50)
     
     Returns:
-        Complete project details including status and settings
-        
-    Rate Limit: 500 requests/hour
+        Status counts plus a table of the most recently created matching projects
     
     Example:
-        Check status every 60 seconds:
-        submagic_get_project("550e8400-e29b-41d4-a716-446655440000")
+        submagic_list_local_projects(status="active")
     """
-    try:
-        input_data = GetProjectInput(project_id=project_id)
-    except Exception as e:
-        return [TextContent(
-            type="text",
-            text=f"Input validation error: {str(e)}"
-        )]
-    
-    result = await make_api_request("GET", f"projects/{input_data.project_id}")
+    if not 1 <= limit <= 500:
+        return [TextContent(type="text", text="Input validation error: limit must be between 1 and 500")]
     
-    if "error" in result:
+    registry = get_registry()
+    if registry is None:
         return [TextContent(
             type="text",
-            text=f"Error: {result['error']}\n{result['message']}\n\n{result.get('suggestion', '')}"
+            text="The local project registry is disabled (SUBMAGIC_REGISTRY=false)."
         )]
     
-    formatted_output = format_project_response(result, detail_level="detailed")
-    
-    status = result.get('status', 'unknown')
+    rows = registry.list(status=status or None, limit=limit)
+    counts = registry.status_counts()
+    summary = ", ".join(f"{name}: {count}" for name, count in sorted(counts.items())) or "none"
     
-    if status == "processing":
-        formatted_output += "\n\n**⏳ Status: Processing**\nCheck again in 30-60 seconds."
-    elif status == "completed":
-        formatted_output += "\n\n**✅ Status: Completed**\nReady to export! Use `submagic_export_project` to download."
-    elif status == "failed":
-        formatted_output += f"\n\n**❌ Status: Failed**\nError: {result.get('error', 'Unknown error')}"
+    output = f"""# Local Projects ({status or 'all'})
+
+**Known projects by status:** {summary}
+
+"""
+    if not rows:
+        output += "No matching projects."
+        return [TextContent(type="text", text=output)]
+    
+    output += "| Project ID | Kind | Status | Title | Created | Output |\n|---|---|---|---|---|---|\n"
+    for row in rows:
+        created = time.strftime("%Y-%m-%d %H:%M", time.gmtime(row['created_at']))
+        title = (row.get('title') or '-').replace('|', '/')
+        output_url = row.get('direct_url') or row.get('download_url') or '-'
+        if row.get('clips'):
+            output_url = f"{len(row['clips'])} clips"
+        output += f"| `{row['id']}` | {row['kind']} | {row.get('status') or 'unknown'} | {title} | {created} | {output_url} |\n"
     
-    return [TextContent(type="text", text=truncate_text(formatted_output))]
+    return [TextContent(type="text", text=truncate_text(output))]
 
 
-@app.tool()
+@app.tool(structured_output=False)
+@instrument_tool
 async def submagic_update_project(
     project_id: str,
     remove_silence_pace: Optional[str] = None,
@@ -784,6 +3033,9 @@ async def submagic_update_project(
             text=f"Error: {result['error']}\n{result['message']}\n\n{result.get('suggestion', '')}"
         )]
     
+    project_cache.invalidate(input_data.project_id)
+    transcript_indexes.invalidate(input_data.project_id)
+    
     # Format response with update summary
     output = f"""# Project Updated Successfully
 
@@ -831,7 +3083,8 @@ async def submagic_update_project(
     return [TextContent(type="text", text=truncate_text(output))]
 
 
-@app.tool()
+@app.tool(structured_output=False)
+@instrument_tool
 async def submagic_export_project(
     project_id: str,
     fps: Optional[int] = None,
@@ -870,6 +3123,8 @@ async def submagic_export_project(
             fps=30
         )
     """
+    webhook_url = webhook_url or default_webhook_url()
+    
     try:
         input_data = ExportProjectInput(
             project_id=project_id,
@@ -903,6 +3158,8 @@ async def submagic_export_project(
             text=f"Error: {result['error']}\n{result['message']}\n\n{result.get('suggestion', '')}"
         )]
     
+    mark_export_started(input_data.project_id)
+    
     output = f"""# Export Started Successfully
 
 **Project ID:** {input_data.project_id}
@@ -918,14 +3175,92 @@ async def submagic_export_project(
 1. The export process is asynchronous and will take a few minutes
 2. Monitor progress with: `submagic_get_project("{input_data.project_id}")`
 3. Once complete, the project will have `downloadUrl` and `directUrl` fields
+4. Save the video locally with `submagic_download_output(["{input_data.project_id}"], download_dir="./exports")`
+
+**Tip:** `submagic_wait_for_project("{input_data.project_id}")` returns the download URL as soon as the export is ready.
+"""
+    
+    return [TextContent(type="text", text=truncate_text(output))]
+
+
+@app.tool(structured_output=False)
+@instrument_tool
+async def submagic_download_output(
+    project_ids: List[str],
+    download_dir: str,
+    segments: Optional[int] = None,
+    max_concurrency: Optional[int] = None
+) -> List[TextContent]:
+    """
+    Download the rendered videos of exported projects to a local directory.
+    
+    Each video is streamed to disk in fixed-size chunks. When the CDN supports
+    range requests, large files are split into segments fetched in parallel.
+    Interrupted downloads resume on the next call, and files that already
+    exist are checked and skipped. Every file's size is verified, and so is
+    its MD5 when the CDN's ETag carries one. The SHA-256 is reported for your
+    records.
+    
+    Args:
+        project_ids: UUIDs of exported projects (1-50)
+        download_dir: Local directory for the videos (created if needed)
+        segments: Parallel ranges per file (1-16, default: 4)
+        max_concurrency: Files downloaded at once (1-16, default: 4)
+    
+    Returns:
+        One row per project with file name, size, verification and SHA-256, or the reason it was skipped
+        
+    Rate Limit: One standard request (500/hour) per project; downloads do not count
+    
+    Example:
+        submagic_download_output(["550e8400-..."], download_dir="./exports")
+    """
+    try:
+        input_data = DownloadOutputInput(
+            project_ids=project_ids,
+            download_dir=download_dir,
+            segments=segments,
+            max_concurrency=max_concurrency
+        )
+    except Exception as e:
+        return [TextContent(
+            type="text",
+            text=f"Input validation error: {str(e)}"
+        )]
+    
+    unique_ids = list(dict.fromkeys(pid.strip() for pid in input_data.project_ids if pid.strip()))
+    directory = os.path.abspath(os.path.expanduser(input_data.download_dir))
+    per_file = input_data.segments or env_int("SUBMAGIC_DOWNLOAD_SEGMENTS", 4)
+    limit = input_data.max_concurrency or env_int("SUBMAGIC_DOWNLOAD_CONCURRENCY", 4)
+    
+    async def fetch(project_id: str) -> Dict[str, Any]:
+        return await download_project_output(project_id, directory, per_file)
+    
+    with lane(BATCH if len(unique_ids) > 1 else INTERACTIVE):
+        rows = await gather_bounded(unique_ids, fetch, limit)
+    
+    done = sum(1 for row in rows if 'size' in row)
+    output = f"""# Downloads ({done} of {len(rows)} saved)
 
-**Tip:** Use `submagic_get_project` to check when the export is ready and get the download URL.
+**Directory:** {directory}
+
+| Project ID | File | Size | Result | Verified | SHA-256 |
+|---|---|---|---|---|---|
 """
+    for row in rows:
+        size = format_size(row['size']) if 'size' in row else '-'
+        output += (
+            f"| `{row['id']}` | {row.get('file', '-')} | {size} | {row['result']} "
+            f"| {row.get('verified', '-')} | {row.get('sha256', '-')} |\n"
+        )
+    if any(row['result'].startswith("error") for row in rows):
+        output += "\n**Some downloads failed.** Call again with the same directory to resume them."
     
     return [TextContent(type="text", text=truncate_text(output))]
 
 
-@app.tool()
+@app.tool(structured_output=False)
+@instrument_tool
 async def submagic_create_magic_clips(
     title: str,
     youtube_url: str,
@@ -1006,6 +3341,8 @@ async def submagic_create_magic_clips(
             max_clip_length=180
         )
     """
+    webhook_url = webhook_url or default_webhook_url()
+    
     try:
         input_data = CreateMagicClipsInput(
             title=title,
@@ -1052,6 +3389,8 @@ async def submagic_create_magic_clips(
             text=f"Error: {result['error']}\n{result['message']}\n\n{result.get('suggestion', '')}"
         )]
     
+    record_project_created(result, KIND_MAGIC_CLIPS, request_body)
+    
     project_id = result.get('id', result.get('projectId', 'Unknown'))
     
     # Determine platform suggestion based on duration
@@ -1083,8 +3422,8 @@ async def submagic_create_magic_clips(
 
 ## Next Steps
 1. Wait 5-15 minutes for AI analysis and clip generation
-2. Check status with: `submagic_get_project("{project_id}")`
-3. Once complete, the response will include individual clip IDs with download URLs
+2. Wait for completion with: `submagic_wait_for_project("{project_id}", timeout_seconds=900)`
+3. Once complete, list or download the clips with `submagic_get_magic_clips("{project_id}", download_dir="./clips")`
 4. Each clip will be {input_data.min_clip_length}-{input_data.max_clip_length} seconds long
 
 ## What's Happening Now
@@ -1100,13 +3439,456 @@ The AI is analyzing your YouTube video to:
     return [TextContent(type="text", text=truncate_text(output))]
 
 
+@app.tool(structured_output=False)
+@instrument_tool
+async def submagic_get_magic_clips(
+    project_id: str,
+    download_dir: Optional[str] = None,
+    max_concurrency: Optional[int] = None
+) -> List[TextContent]:
+    """
+    List the clips of a magic clips project and optionally download them.
+    
+    Returns one row per generated clip with its title, duration, status and
+    URL. With download_dir, every completed clip is downloaded concurrently
+    (bounded by max_concurrency) and streamed to disk. Files that already exist
+    are skipped, and interrupted downloads resume from where they stopped, so
+    calling again after new clips complete only fetches what is missing.
+    
+    Args:
+        project_id: UUID of the magic clips project (from submagic_create_magic_clips)
+        download_dir: Local directory for the clip files (created if needed)
+        max_concurrency: Maximum simultaneous downloads (1-16, default: 4)
+    
+    Returns:
+        Clip table, plus a per-file download report when download_dir is given
+        
+    Rate Limit: One standard request (500/hour); downloads do not count
+    
+    Example:
+        submagic_get_magic_clips("550e8400-...", download_dir="./clips")
+    """
+    try:
+        input_data = GetMagicClipsInput(
+            project_id=project_id,
+            download_dir=download_dir,
+            max_concurrency=max_concurrency
+        )
+    except Exception as e:
+        return [TextContent(
+            type="text",
+            text=f"Input validation error: {str(e)}"
+        )]
+    
+    result = await fetch_project(input_data.project_id)
+    
+    if "error" in result:
+        return [TextContent(
+            type="text",
+            text=f"Error: {result['error']}\n{result['message']}\n\n{result.get('suggestion', '')}"
+        )]
+    
+    event_bus.publish(project_event(result))
+    
+    status = result.get('status', 'unknown')
+    clips = result.get('magicClips') or []
+    if not clips:
+        if status in ("completed", "failed"):
+            message = "This project has no magic clips. Use `submagic_get_project` for regular projects."
+        else:
+            message = f"Clips are still being generated (status: {status}). Use `submagic_wait_for_project` to wait for them."
+        return [TextContent(type="text", text=f"# Magic Clips: {result.get('title', 'Untitled')}\n\n{message}")]
+    
+    counts: Dict[str, int] = {}
+    for clip in clips:
+        clip_status = clip.get('status', 'unknown')
+        counts[clip_status] = counts.get(clip_status, 0) + 1
+    summary = ", ".join(f"{name}: {count}" for name, count in sorted(counts.items()))
+    
+    output = f"""# Magic Clips: {result.get('title', 'Untitled')} ({len(clips)} clips)
+
+**Project ID:** `{input_data.project_id}`
+**Project Status:** {status}
+**Clips:** {summary}
+
+{format_clips_table(clips)}"""
+    
+    if input_data.download_dir:
+        directory = os.path.abspath(os.path.expanduser(input_data.download_dir))
+        limit = input_data.max_concurrency or env_int("SUBMAGIC_DOWNLOAD_CONCURRENCY", 4)
+        rows = await download_clips(clips, directory, limit)
+        failed = sum(1 for row in rows if row['result'].startswith("error"))
+        output += f"\n## Downloads\n\n**Directory:** {directory}\n\n| # | File | Size | Result |\n|---|---|---|---|\n"
+        for row in rows:
+            size = format_size(row['size']) if 'size' in row else '-'
+            output += f"| {row['index']} | {row['file']} | {size} | {row['result']} |\n"
+        if failed:
+            output += f"\n**{failed} downloads failed.** Call again with the same directory to resume them."
+    
+    return [TextContent(type="text", text=truncate_text(output))]
+
+
+@app.tool(structured_output=False)
+@instrument_tool
+async def submagic_wait_for_project(
+    project_id: str,
+    timeout_seconds: int = 600,
+    ctx: Optional[Context] = None
+) -> List[TextContent]:
+    """
+    Wait until a project, export or magic clips job finishes, then return its result.
+    
+    One call replaces a loop of submagic_get_project calls. Use it right after
+    submagic_create_project, submagic_export_project or submagic_create_magic_clips.
+    
+    How it waits:
+    - With the webhook receiver enabled (SUBMAGIC_WEBHOOK_PORT), it resolves the
+      moment Submagic's notification arrives and makes no API calls, polling
+      only as a slow safety net.
+    - Otherwise it polls inside the server with an interval that adapts to the
+      current status (exporting is checked more often than transcribing) and the
+      video length, backing off while nothing changes.
+    
+    Progress notifications report every status change.
+    
+    Args:
+        project_id: UUID of the project to wait for
+        timeout_seconds: Maximum seconds to wait (1-3600, default: 600)
+    
+    Returns:
+        Final status with download URLs, or the last known status on timeout
+    
+    Example:
+        submagic_wait_for_project("550e8400-e29b-41d4-a716-446655440000", timeout_seconds=900)
+    """
+    try:
+        input_data = WaitForProjectInput(project_id=project_id, timeout_seconds=timeout_seconds)
+    except Exception as e:
+        return [TextContent(
+            type="text",
+            text=f"Input validation error: {str(e)}"
+        )]
+    
+    project_id = input_data.project_id
+    timeout = input_data.timeout_seconds
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    last_status: Optional[str] = None
+    
+    async def report(status: str) -> None:
+        nonlocal last_status
+        last_status = status
+        if ctx is not None:
+            await ctx.report_progress(
+                progress=min(loop.time() - started, timeout),
+                total=timeout,
+                message=f"Project {project_id}: {status}"
+            )
+    
+    result = await wait_for_project(project_id, timeout, on_status=report)
+    
+    if result is not None:
+        if "error" in result:
+            return [TextContent(
+                type="text",
+                text=f"Error: {result['error']}\n{result['message']}\n\n{result.get('suggestion', '')}"
+            )]
+        return [TextContent(type="text", text=format_project_event(result))]
+    
+    return [TextContent(
+        type="text",
+        text=f"""# Still Waiting
+
+**Project ID:** `{project_id}`
+**Last Status:** {last_status or 'unknown'}
+
+The project did not finish within {timeout} seconds.
+Call `submagic_wait_for_project("{project_id}")` again to keep waiting."""
+    )]
+
+
+@app.tool(structured_output=False)
+@instrument_tool
+async def submagic_process_video(
+    title: str,
+    language: str,
+    video_url: str,
+    template_name: Optional[str] = None,
+    user_theme_id: Optional[str] = None,
+    dictionary: Optional[List[str]] = None,
+    magic_zooms: bool = True,
+    magic_brolls: bool = True,
+    magic_brolls_percentage: int = 75,
+    remove_silence_pace: str = "natural",
+    remove_bad_takes: bool = True,
+    fps: Optional[int] = None,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    timeout_seconds: int = 7200,
+    wait_seconds: int = 0
+) -> List[TextContent]:
+    """
+    Turn a video URL into a finished, exported video in one call.
+    
+    Runs the whole workflow inside the server: create the project, wait for
+    processing, start the export, and wait for the download URL. Progress is
+    checkpointed locally, so a server restart resumes the run where it left off.
+    
+    Returns a run_id immediately (or after wait_seconds); check progress with
+    submagic_get_pipeline_run.
+    
+    Args:
+        title: Project name (1-100 characters)
+        language: Language code (e.g., "en", "es", "fr")
+        video_url: Public URL to the video file
+        template_name: Caption template (e.g., "Hormozi 2")
+        user_theme_id: Custom theme UUID (cannot use with template_name)
+        dictionary: Custom words for better transcription accuracy
+        magic_zooms: Enable AI zoom effects (default: true)
+        magic_brolls: Auto-insert B-roll footage (default: true)
+        magic_brolls_percentage: B-roll coverage 0-100% (default: 75)
+        remove_silence_pace: "natural", "fast", or "extra-fast" (default: "natural")
+        remove_bad_takes: Remove filler words automatically (default: true)
+        fps: Export frames per second 1-60 (default: project's own)
+        width: Export width 100-4000 (default: project's own)
+        height: Export height 100-4000 (default: project's own)
+        timeout_seconds: Fail the run if not exported within this time (60-86400, default: 7200)
+        wait_seconds: Wait up to this long before returning (0-3600, default: 0)
+    
+    Returns:
+        Run ID and current stage (creating, processing, exporting, rendering,
+        completed or failed), with download URLs once completed
+        
+    Rate Limit: one create and one export request, plus status checks when
+    webhooks are not configured
+    
+    Example:
+        submagic_process_video(
+            title="Product Demo",
+            language="en",
+            video_url="https://example.com/video.mp4",
+            template_name="Hormozi 2",
+            wait_seconds=600
+        )
+    """
+    try:
+        input_data = ProcessVideoInput(
+            title=title,
+            language=language,
+            video_url=video_url,
+            template_name=template_name,
+            user_theme_id=user_theme_id,
+            webhook_url=default_webhook_url(),
+            dictionary=dictionary,
+            magic_zooms=magic_zooms,
+            magic_brolls=magic_brolls,
+            magic_brolls_percentage=magic_brolls_percentage,
+            remove_silence_pace=remove_silence_pace,
+            remove_bad_takes=remove_bad_takes,
+            fps=fps,
+            width=width,
+            height=height,
+            timeout_seconds=timeout_seconds,
+            wait_seconds=wait_seconds
+        )
+    except Exception as e:
+        return [TextContent(
+            type="text",
+            text=f"Input validation error: {str(e)}\n\nPlease check your parameters and try again."
+        )]
+    
+    export_body = {
+        key: value for key, value in (
+            ("fps", input_data.fps),
+            ("width", input_data.width),
+            ("height", input_data.height),
+        ) if value is not None
+    }
+    store = get_run_store()
+    run_id = store.create(
+        input_data.title,
+        build_create_project_body(input_data),
+        export_body,
+        input_data.timeout_seconds
+    )
+    task = start_pipeline_run(run_id)
+    
+    if input_data.wait_seconds:
+        await asyncio.wait({task}, timeout=input_data.wait_seconds)
+    
+    return [TextContent(type="text", text=truncate_text(format_pipeline_run(store.get(run_id))))]
+
+
+@app.tool(structured_output=False)
+@instrument_tool
+async def submagic_get_pipeline_run(
+    run_id: Optional[str] = None,
+    wait_seconds: int = 0
+) -> List[TextContent]:
+    """
+    Check the progress of submagic_process_video runs.
+    
+    Args:
+        run_id: Run ID from submagic_process_video; omit to list the 20 most recent runs
+        wait_seconds: Wait up to this long for the run to finish before returning (0-3600, default: 0)
+    
+    Returns:
+        The run's stage, project status and download URLs once completed, or
+        a table of recent runs
+    
+    Example:
+        submagic_get_pipeline_run("run_3f9a1c2b7d4e5f60", wait_seconds=300)
+    """
+    try:
+        input_data = PipelineRunInput(run_id=run_id, wait_seconds=wait_seconds)
+    except Exception as e:
+        return [TextContent(
+            type="text",
+            text=f"Input validation error: {str(e)}"
+        )]
+    
+    store = get_run_store()
+    
+    if not input_data.run_id:
+        runs = store.list(limit=20)
+        if not runs:
+            return [TextContent(type="text", text="No pipeline runs yet. Start one with `submagic_process_video`.")]
+        output = "# Pipeline Runs\n\n| Run ID | Stage | Title | Project ID | Output / Error |\n|---|---|---|---|---|\n"
+        for run in runs:
+            title = (run.get('title') or '-').replace('|', '/')
+            detail = run.get('error') or run.get('direct_url') or run.get('download_url') or '-'
+            output += f"| `{run['run_id']}` | {run['stage']} | {title} | `{run.get('project_id') or '-'}` | {detail} |\n"
+        return [TextContent(type="text", text=truncate_text(output))]
+    
+    run = store.get(input_data.run_id)
+    if run is None:
+        return [TextContent(
+            type="text",
+            text=f"Error: Run not found\nNo pipeline run with ID `{input_data.run_id}`.\n\nCall `submagic_get_pipeline_run()` to list recent runs."
+        )]
+    
+    task = _pipeline_tasks.get(input_data.run_id)
+    if task is not None and input_data.wait_seconds:
+        await asyncio.wait({task}, timeout=input_data.wait_seconds)
+        run = store.get(input_data.run_id)
+    
+    return [TextContent(type="text", text=truncate_text(format_pipeline_run(run)))]
+
+
+@app.tool(structured_output=False)
+@instrument_tool
+async def submagic_server_stats(output_format: str = "markdown") -> List[TextContent]:
+    """
+    Show this server's own metrics: tool latency and errors, API requests by
+    endpoint and status code, retries, 429s, cache hit ratios and queue depth.
+    
+    Makes no API requests and uses no quota.
+    
+    Args:
+        output_format: "markdown" (default) for a readable report, or
+            "prometheus" for the raw Prometheus text exposition (histogram
+            buckets omitted; scrape the metrics listener for those)
+    
+    Returns:
+        Statistics collected since the server started
+    
+    Example:
+        submagic_server_stats()
+    """
+    try:
+        input_data = ServerStatsInput(output_format=output_format)
+    except Exception as e:
+        return [TextContent(
+            type="text",
+            text=f"Input validation error: {str(e)}\n\nPlease check your parameters and try again."
+        )]
+    
+    if input_data.output_format == "prometheus":
+        # Per-bucket histogram lines would overflow the tool output limit; the
+        # SUBMAGIC_METRICS_PORT listener serves them in full
+        return [TextContent(type="text", text=truncate_text(f"```\n{metrics.render(buckets=False)}```"))]
+    return [TextContent(type="text", text=truncate_text(format_server_stats()))]
+
+
 # ==============================================================================
 # Server Lifecycle
 # ==============================================================================
 
-def main():
+TRANSPORTS = ("stdio", "sse", "streamable-http")
+
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> Any:
+    """Command line options; each falls back to a SUBMAGIC_* environment variable"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="submagic-mcp", description="Submagic MCP server")
+    parser.add_argument(
+        "--transport",
+        choices=TRANSPORTS,
+        default=env_str("SUBMAGIC_TRANSPORT", "stdio"),
+        help="stdio (one client, default), or sse / streamable-http to serve many clients from one process"
+    )
+    parser.add_argument("--host", default=env_str("SUBMAGIC_HOST", "127.0.0.1"), help="Interface for the HTTP transports")
+    parser.add_argument("--port", type=int, default=env_int("SUBMAGIC_PORT", 8000), help="Port for the HTTP transports")
+    parser.add_argument(
+        "--stateless",
+        action="store_true",
+        default=env_bool("SUBMAGIC_STATELESS_HTTP", False),
+        help="streamable-http only: no per-client session state (for load-balanced replicas)"
+    )
+    parser.add_argument(
+        "--max-sessions",
+        type=int,
+        default=env_int("SUBMAGIC_MAX_SESSIONS", 0),
+        help="streamable-http only: refuse new sessions beyond this many (0 keeps the MCP SDK default)"
+    )
+    args = parser.parse_args(argv)
+    if args.transport not in TRANSPORTS:
+        parser.error(f"invalid transport {args.transport!r} (choose from {', '.join(TRANSPORTS)})")
+    return args
+
+
+def configure_http_transport(args: Any) -> None:
+    """Apply host/port/session options to the FastMCP settings"""
+    settings = app.settings
+    settings.host = args.host
+    settings.port = args.port
+    settings.stateless_http = args.stateless
+    if args.max_sessions and hasattr(settings, "max_sessions"):
+        settings.max_sessions = args.max_sessions
+    # FastMCP only enables DNS-rebinding protection for loopback hosts it was
+    # constructed with; keep that behaviour when binding elsewhere
+    if args.host not in LOOPBACK_HOSTS and hasattr(settings, "transport_security"):
+        settings.transport_security = None
+
+
+async def serve_http(transport: str) -> None:
+    """Serve the SSE or streamable HTTP app, holding shared resources for the server's lifetime"""
+    import uvicorn
+    
+    starlette_app = app.sse_app() if transport == "sse" else app.streamable_http_app()
+    config = uvicorn.Config(
+        starlette_app,
+        host=app.settings.host,
+        port=app.settings.port,
+        log_level=app.settings.log_level.lower()
+    )
+    # Sessions come and go (stateless mode opens one per request); this
+    # reference keeps pools and caches warm between them
+    async with shared_resources():
+        await uvicorn.Server(config).serve()
+
+
+def main(argv: Optional[List[str]] = None):
     """Main entry point for the MCP server"""
-    app.run()
+    args = parse_args(argv)
+    if args.transport == "stdio":
+        app.run()
+        return
+    configure_http_transport(args)
+    asyncio.run(serve_http(args.transport))
 
 
 if __name__ == "__main__":
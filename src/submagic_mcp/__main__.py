@@ -0,0 +1,5 @@
+"""Allow running the server with python -m submagic_mcp"""
+
+from . import main
+
+main()
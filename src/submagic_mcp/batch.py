@@ -0,0 +1,102 @@
+"""
+Ledger for resumable batch project creation
+
+Each batch item is keyed by a hash of its exact request body (scoped to the
+caller's batch ID, when one is given). Once an item has been created its
+project ID is recorded here, so handing the same batch to
+submagic_create_projects_batch again only submits what is still missing.
+
+Entries expire after a TTL: resubmitting the same video and settings days
+later is a new request, not a retry. Several server processes can share the
+file, so every write re-reads it and merges under an exclusive file lock.
+"""
+
+import hashlib
+import json
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .statefile import FileVersion, file_version, locked, read_json, write_json
+
+# Long enough to retry a partially failed batch, short enough that a later
+# identical submission is created again
+DEFAULT_TTL = 24 * 3600
+
+
+def request_key(body: Dict[str, Any], batch_id: Optional[str] = None) -> str:
+    """Stable idempotency key for a request body, optionally scoped to a batch"""
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"))
+    if batch_id:
+        canonical = f"{batch_id}\n{canonical}"
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+class BatchLedger:
+    """
+    Maps request keys to created project IDs, persisted as JSON.
+
+    Args:
+        path: JSON file to load from and save to; None keeps the ledger in memory
+        ttl: Seconds an entry answers for its request key
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: float = DEFAULT_TTL) -> None:
+        self.path = path
+        self.ttl = ttl
+        # key -> (project_id, recorded_at)
+        self._entries: Dict[str, Tuple[str, float]] = {}
+        self._version: Optional[FileVersion] = None
+
+    def _read(self) -> Dict[str, Tuple[str, float]]:
+        if not self.path:
+            return dict(self._entries)
+        data = read_json(self.path)
+        entries = {}
+        if isinstance(data, dict):
+            for key, value in data.items():
+                # Entries written by older versions have no timestamp (and may
+                # hold the string "None"); they are dropped
+                if isinstance(value, dict) and value.get("project_id"):
+                    entries[str(key)] = (str(value["project_id"]), float(value.get("recorded_at") or 0))
+        return entries
+
+    def _refresh(self) -> None:
+        """Reload when another process has rewritten the file"""
+        if not self.path:
+            return
+        version = file_version(self.path)
+        if version != self._version:
+            self._version = version
+            self._entries = self._read()
+
+    def _fresh(self, recorded_at: float, now: float) -> bool:
+        return now - recorded_at < self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        self._refresh()
+        entry = self._entries.get(key)
+        if entry is None or not self._fresh(entry[1], time.time()):
+            return None
+        return entry[0]
+
+    def record(self, key: str, project_id: Optional[str]) -> None:
+        """Remember project_id for key; responses without an ID are not recorded"""
+        if not project_id:
+            return
+        now = time.time()
+        with locked(self.path):
+            entries = self._read()
+            entries[key] = (str(project_id), now)
+            self._entries = {k: v for k, v in entries.items() if self._fresh(v[1], now)}
+            self._save()
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        data = {key: {"project_id": pid, "recorded_at": at} for key, (pid, at) in self._entries.items()}
+        self._version = write_json(self.path, data) or file_version(self.path)
+
+    def __len__(self) -> int:
+        self._refresh()
+        now = time.time()
+        return sum(1 for _, recorded_at in self._entries.values() if self._fresh(recorded_at, now))
@@ -0,0 +1,271 @@
+"""
+In-process response caches
+
+TTLCache serves slow-changing catalog endpoints (languages, templates). Fresh
+entries are served directly, stale entries are served while a background
+refresh runs, and concurrent misses share a single upstream request.
+
+ProjectResponseCache keeps GET /projects/{id} responses keyed on the project's
+status: finished projects never change on their own, so they are kept until
+invalidated, while in-progress ones expire quickly.
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Set
+
+from .events import event_project_id, is_terminal
+from .singleflight import SingleFlight
+
+Fetcher = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+class CacheEntry:
+    __slots__ = ("value", "fetched_at")
+
+    def __init__(self, value: Dict[str, Any], fetched_at: float) -> None:
+        self.value = value
+        self.fetched_at = fetched_at
+
+    def age(self, now: Optional[float] = None) -> float:
+        return (now if now is not None else time.time()) - self.fetched_at
+
+
+class TTLCache:
+    """
+    In-process cache for API responses.
+
+    Args:
+        ttl: Seconds an entry is served without revalidation
+        max_stale: Extra seconds a stale entry may still be served while it is
+            refreshed in the background; older entries block on a fresh fetch
+        snapshot_path: Optional JSON file used to persist entries across restarts
+
+    Responses containing an "error" key are never cached. When a refresh fails,
+    the previous entry is kept so callers keep getting the last good data.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_stale: float = 0.0,
+        snapshot_path: Optional[str] = None
+    ) -> None:
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.snapshot_path = snapshot_path
+        self._entries: Dict[str, CacheEntry] = {}
+        self._flight = SingleFlight()
+        self._refreshes: Set["asyncio.Task[Any]"] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def peek(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value regardless of age, without fetching"""
+        entry = self._entries.get(key)
+        return entry.value if entry else None
+
+    async def get_or_fetch(self, key: str, fetcher: Fetcher) -> Dict[str, Any]:
+        """Serve key from cache, refreshing it with fetcher() as needed"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = entry.age()
+            if age < self.ttl:
+                self.hits += 1
+                return entry.value
+            if age < self.ttl + self.max_stale:
+                self.stale_hits += 1
+                self._refresh_in_background(key, fetcher)
+                return entry.value
+
+        self.misses += 1
+        result = await self._flight.do(key, lambda: self._fetch(key, fetcher))
+        if "error" in result and entry is not None:
+            return entry.value
+        return result
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop one entry, or everything when key is None"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    async def _fetch(self, key: str, fetcher: Fetcher) -> Dict[str, Any]:
+        result = await fetcher()
+        if "error" not in result:
+            self._entries[key] = CacheEntry(result, time.time())
+            self.save_snapshot()
+        return result
+
+    def _refresh_in_background(self, key: str, fetcher: Fetcher) -> None:
+        if self._flight.inflight(key):
+            return
+        task = asyncio.ensure_future(self._flight.do(key, lambda: self._fetch(key, fetcher)))
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+
+    async def aclose(self) -> None:
+        """Cancel background refreshes still running at shutdown"""
+        for task in list(self._refreshes):
+            task.cancel()
+        if self._refreshes:
+            await asyncio.gather(*self._refreshes, return_exceptions=True)
+
+    def load_snapshot(self) -> int:
+        """Warm the cache from snapshot_path; returns the number of entries loaded"""
+        if not self.snapshot_path:
+            return 0
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+
+        loaded = 0
+        for key, raw in data.items():
+            if isinstance(raw, dict) and isinstance(raw.get("value"), dict):
+                self._entries[key] = CacheEntry(raw["value"], float(raw.get("fetched_at", 0)))
+                loaded += 1
+        return loaded
+
+    def save_snapshot(self) -> None:
+        """Persist all entries to snapshot_path (atomic replace)"""
+        if not self.snapshot_path:
+            return
+        data = {
+            key: {"value": entry.value, "fetched_at": entry.fetched_at}
+            for key, entry in self._entries.items()
+        }
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            directory = os.path.dirname(self.snapshot_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError:
+            # A snapshot is only a warm-start optimisation; never fail a request over it
+            pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self._flight.coalesced,
+        }
+
+
+class ProjectEntry:
+    __slots__ = ("value", "etag", "last_modified", "stored_at")
+
+    def __init__(
+        self,
+        value: Dict[str, Any],
+        etag: Optional[str],
+        last_modified: Optional[str],
+        stored_at: float
+    ) -> None:
+        self.value = value
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+    @property
+    def status(self) -> Optional[str]:
+        return self.value.get("status")
+
+
+class ProjectResponseCache:
+    """
+    Per-project cache for GET /projects/{id}.
+
+    Args:
+        ttl: Seconds a non-terminal project is served without asking upstream
+        max_entries: Least recently used projects are evicted beyond this
+
+    Completed and failed projects are served until invalidate() is called
+    (after an update or export). Expired entries are kept for revalidation:
+    their ETag/Last-Modified validators are sent upstream and a 304 refreshes
+    the entry without transferring the project body again.
+    """
+
+    def __init__(self, ttl: float = 10.0, max_entries: int = 256) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, ProjectEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def get(self, project_id: str) -> Optional[ProjectEntry]:
+        """Return the entry regardless of freshness (for conditional requests)"""
+        return self._entries.get(project_id)
+
+    def get_fresh(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """Return the cached project if it can be served without a request"""
+        entry = self._entries.get(project_id)
+        if entry is not None and (
+            is_terminal(entry.value) or time.time() - entry.stored_at < self.ttl
+        ):
+            self._entries.move_to_end(project_id)
+            self.hits += 1
+            return entry.value
+        self.misses += 1
+        return None
+
+    def store(
+        self,
+        project_id: str,
+        value: Dict[str, Any],
+        headers: Optional[Mapping[str, str]] = None
+    ) -> None:
+        """Cache a successful response along with its validators"""
+        if "error" in value:
+            return
+        headers = headers or {}
+        self._entries[project_id] = ProjectEntry(
+            value, headers.get("etag"), headers.get("last-modified"), time.time()
+        )
+        self._entries.move_to_end(project_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def refresh(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """Mark an entry as just revalidated (upstream answered 304)"""
+        entry = self._entries.get(project_id)
+        if entry is None:
+            return None
+        entry.stored_at = time.time()
+        self._entries.move_to_end(project_id)
+        self.revalidated += 1
+        return entry.value
+
+    def invalidate(self, project_id: Optional[str] = None) -> None:
+        """Drop one project, or everything when project_id is None"""
+        if project_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(project_id, None)
+
+    def observe(self, event: Dict[str, Any]) -> None:
+        """Drop a project whose status moved on (e.g. from a webhook)"""
+        project_id = event_project_id(event)
+        entry = self._entries.get(project_id) if project_id else None
+        if entry is not None and event.get("status") and event.get("status") != entry.status:
+            self._entries.pop(project_id, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+        }
@@ -0,0 +1,137 @@
+"""
+Language and template checks against the cached Submagic catalogs
+
+CatalogIndex turns the cached GET /languages and GET /templates responses into
+frozensets, so input models can reject an unknown language or template name
+with a "did you mean" hint before any request is sent. Lookups never touch the
+network: the index is rebuilt only when the cached response object changes,
+and while a catalog has not been fetched yet every value is accepted and left
+to the API to judge.
+"""
+
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+CatalogSource = Callable[[str], Optional[Dict[str, Any]]]
+
+LANGUAGES = "languages"
+TEMPLATES = "templates"
+
+
+class _Catalog:
+    """Lookup tables built from one catalog response"""
+
+    __slots__ = ("payload", "values", "folded", "aliases")
+
+    def __init__(self, payload: Dict[str, Any], values: FrozenSet[str], aliases: Dict[str, str]) -> None:
+        self.payload = payload
+        self.values = values
+        # casefolded value -> canonical value, for case-only mistakes and fuzzy matching
+        self.folded = {value.casefold(): value for value in values}
+        # casefolded display name -> value (e.g. "english" -> "en")
+        self.aliases = aliases
+
+
+def _language_entries(payload: Dict[str, Any]) -> Tuple[FrozenSet[str], Dict[str, str]]:
+    codes = []
+    aliases = {}
+    for item in payload.get(LANGUAGES) or []:
+        if isinstance(item, dict):
+            code = str(item.get("code") or "")
+            if code:
+                codes.append(code)
+                if item.get("name"):
+                    aliases[str(item["name"]).casefold()] = code
+        elif item:
+            # Some responses list bare codes
+            codes.append(str(item))
+    return frozenset(codes), aliases
+
+
+def _template_entries(payload: Dict[str, Any]) -> Tuple[FrozenSet[str], Dict[str, str]]:
+    names = []
+    for item in payload.get(TEMPLATES) or []:
+        name = item.get("name") if isinstance(item, dict) else item
+        if name:
+            names.append(str(name))
+    return frozenset(names), {}
+
+
+class CatalogIndex:
+    """
+    Args:
+        source: Returns the cached response for "languages" or "templates"
+            (or None when it has not been fetched), e.g. TTLCache.peek
+        max_suggestions: Close matches offered in an error message
+    """
+
+    def __init__(self, source: CatalogSource, max_suggestions: int = 3) -> None:
+        self.source = source
+        self.max_suggestions = max_suggestions
+        self._catalogs: Dict[str, _Catalog] = {}
+        self.checks = 0
+        self.rejected = 0
+
+    def _catalog(self, name: str) -> Optional[_Catalog]:
+        payload = self.source(name)
+        if not payload or "error" in payload:
+            return None
+        catalog = self._catalogs.get(name)
+        if catalog is None or catalog.payload is not payload:
+            values, aliases = (_language_entries if name == LANGUAGES else _template_entries)(payload)
+            if not values:
+                return None
+            catalog = _Catalog(payload, values, aliases)
+            self._catalogs[name] = catalog
+        return catalog
+
+    def values(self, name: str) -> Optional[FrozenSet[str]]:
+        """Known values of a catalog, or None while it is unknown"""
+        catalog = self._catalog(name)
+        return catalog.values if catalog else None
+
+    def suggest(self, name: str, value: str) -> List[str]:
+        """Closest known values to value, best first"""
+        catalog = self._catalog(name)
+        if catalog is None:
+            return []
+        folded = value.casefold()
+        exact = catalog.folded.get(folded) or catalog.aliases.get(folded)
+        if exact:
+            return [exact]
+        # Imported on the first miss only; it is not needed on the startup path
+        import difflib
+
+        candidates = list(catalog.folded) + list(catalog.aliases)
+        matches = difflib.get_close_matches(folded, candidates, n=self.max_suggestions * 2, cutoff=0.6)
+        suggestions: List[str] = []
+        for match in matches:
+            canonical = catalog.folded.get(match) or catalog.aliases[match]
+            if canonical not in suggestions:
+                suggestions.append(canonical)
+        return suggestions[:self.max_suggestions]
+
+    def check(self, name: str, value: str) -> Optional[str]:
+        """
+        Error message for a value missing from a known catalog.
+
+        None when the value is listed or the catalog has not been fetched yet.
+        """
+        self.checks += 1
+        catalog = self._catalog(name)
+        if catalog is None or value in catalog.values:
+            return None
+        self.rejected += 1
+        kind = "language" if name == LANGUAGES else "template"
+        message = f"Unknown {kind} '{value}'."
+        suggestions = self.suggest(name, value)
+        if suggestions:
+            message += " Did you mean " + " or ".join(f"'{s}'" for s in suggestions) + "?"
+        return message + f" See submagic_list_{name} for all options."
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "languages": len(self.values(LANGUAGES) or ()),
+            "templates": len(self.values(TEMPLATES) or ()),
+            "checks": self.checks,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,34 @@
+"""
+Bounded-concurrency helpers for batch tools
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Iterable, List, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def gather_bounded(
+    items: Iterable[T],
+    fn: Callable[[T], Awaitable[R]],
+    limit: int
+) -> List[R]:
+    """
+    Run fn over items with at most limit calls in flight, preserving order.
+
+    fn is expected to handle its own errors (batch tools report failures per
+    item); an exception escaping fn cancels nothing else and is re-raised once
+    every call has finished.
+    """
+    semaphore = asyncio.Semaphore(max(limit, 1))
+
+    async def run(item: T) -> R:
+        async with semaphore:
+            return await fn(item)
+
+    results = await asyncio.gather(*(run(item) for item in items), return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results  # type: ignore[return-value]
@@ -0,0 +1,62 @@
+"""
+Environment-driven configuration helpers
+
+Every tunable in the server is read from a SUBMAGIC_* environment variable so
+it can be set from the MCP client config alongside SUBMAGIC_API_KEY.
+"""
+
+import os
+from typing import Optional
+
+_TRUE_VALUES = {"1", "true", "yes", "on"}
+_FALSE_VALUES = {"0", "false", "no", "off"}
+
+
+def env_str(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Read a string setting, treating empty values as unset"""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip()
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting, falling back to default on missing or bad values"""
+    value = env_str(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float setting, falling back to default on missing or bad values"""
+    value = env_str(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting ("1/true/yes/on" or "0/false/no/off")"""
+    value = env_str(name)
+    if value is None:
+        return default
+    value = value.lower()
+    if value in _TRUE_VALUES:
+        return True
+    if value in _FALSE_VALUES:
+        return False
+    return default
+
+
+def state_dir() -> str:
+    """Directory for local state (ledgers, databases); SUBMAGIC_STATE_DIR or ~/.submagic-mcp"""
+    path = env_str("SUBMAGIC_STATE_DIR") or os.path.join(os.path.expanduser("~"), ".submagic-mcp")
+    os.makedirs(path, exist_ok=True)
+    return path
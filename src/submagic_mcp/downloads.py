@@ -0,0 +1,413 @@
+"""
+Streaming, resumable downloads of rendered videos and clips
+
+Files are written in fixed-size chunks (off the event loop) to "<name>.part"
+and renamed into place only once every byte has arrived, so memory use stays
+flat and an interrupted download never looks complete. Calling again picks
+up where the partial file stopped with a Range request; servers that ignore
+Range simply send the whole file again.
+
+download_segmented() splits large files into byte ranges fetched in parallel
+when the server supports Range. Per-segment progress is kept next to the
+partial file in "<name>.part.json" so a segmented download resumes too.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from .tracing import tracer
+
+ProgressCallback = Callable[[int, Optional[int]], Awaitable[None]]
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+PART_SUFFIX = ".part"
+STATE_SUFFIX = ".part.json"
+# Strong ETag of the file a single-stream partial download came from
+ETAG_SUFFIX = ".part.etag"
+
+# Files smaller than two segments of this size are fetched in one stream
+DEFAULT_MIN_SEGMENT_SIZE = 8 * 1024 * 1024
+
+# Seconds between saves of segment progress while downloading
+STATE_SAVE_INTERVAL = 1.0
+
+_PLAIN_MD5_ETAG = re.compile(r'^"?([0-9a-fA-F]{32})"?$')
+
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+
+class DownloadError(Exception):
+    """The server refused the file or the transfer ended early (the partial file is kept for resuming)"""
+
+
+@dataclass
+class DownloadResult:
+    """Outcome of one download"""
+    path: str
+    size: int
+    transferred: int = 0
+    resumed_from: int = 0
+    skipped: bool = False
+    segments: int = 1
+    etag: Optional[str] = None
+
+
+def parse_content_range(value: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """(first byte, total size) from a Content-Range header; None for parts that are missing or unknown"""
+    match = _CONTENT_RANGE.match((value or "").strip())
+    if not match:
+        return None, None
+    total = match.group(3)
+    return int(match.group(1)), None if total == "*" else int(total)
+
+
+def safe_filename(title: str, fallback: str = "video", max_length: int = 60) -> str:
+    """Turn a clip or project title into a portable file name stem"""
+    stem = re.sub(r"[^A-Za-z0-9._-]+", "-", title).strip("-._")[:max_length].rstrip("-._")
+    return stem or fallback
+
+
+def etag_md5(etag: Optional[str]) -> Optional[str]:
+    """
+    The MD5 hex digest an ETag stands for, when it is a plain one.
+
+    S3/CloudFront ETags of single-part uploads are the MD5 of the body;
+    multipart ("-N" suffix) and weak ETags are not, and give None.
+    """
+    match = _PLAIN_MD5_ETAG.match((etag or "").strip())
+    return match.group(1).lower() if match else None
+
+
+def strong_etag(etag: Optional[str]) -> Optional[str]:
+    """etag if it can be sent as If-Range; weak (W/...) validators never match there and give None"""
+    etag = (etag or "").strip()
+    return etag if etag and not etag.startswith("W/") else None
+
+
+def _read_validator(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return strong_etag(f.read())
+    except OSError:
+        return None
+
+
+def _write_validator(path: str, etag: Optional[str]) -> None:
+    if etag:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(etag)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def _file_digests(path: str, chunk_size: int) -> Dict[str, str]:
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            sha256.update(chunk)
+            md5.update(chunk)
+    return {"sha256": sha256.hexdigest(), "md5": md5.hexdigest()}
+
+
+async def verify_download(result: DownloadResult, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Hash a finished file (off the event loop) and check it against the ETag.
+
+    Returns sha256 plus md5_verified: True when the ETag carries an MD5 that
+    matched, None when there was nothing to compare against.
+
+    Raises:
+        DownloadError: the MD5 does not match; a file fetched by this call is deleted
+    """
+    loop = asyncio.get_running_loop()
+    digests = await loop.run_in_executor(None, _file_digests, result.path, chunk_size)
+    expected = etag_md5(result.etag)
+    if expected is not None and digests["md5"] != expected:
+        if not result.skipped:
+            os.remove(result.path)
+        raise DownloadError(
+            f"Checksum mismatch for {os.path.basename(result.path)}: md5 {digests['md5']} != ETag {expected}"
+        )
+    return {"sha256": digests["sha256"], "md5_verified": None if expected is None else True}
+
+
+def _expected_size(response: httpx.Response) -> Optional[int]:
+    # Content-Length counts encoded bytes, which only match what is written
+    # to disk when the body is not compressed
+    if response.headers.get("Content-Encoding", "identity") != "identity":
+        return None
+    length = response.headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else None
+
+
+async def download_file(
+    client: httpx.AsyncClient,
+    url: str,
+    path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: Optional[ProgressCallback] = None
+) -> DownloadResult:
+    """
+    Download url to path, resuming from an existing partial file.
+
+    A resumed request carries If-Range with the strong ETag the partial file
+    was fetched under, so a file that changed upstream comes back whole (200)
+    and the download starts over instead of splicing old and new bytes.
+    An existing file at path is left alone and reported as skipped.
+
+    Raises:
+        DownloadError: on an HTTP error status or a short transfer
+        httpx.HTTPError: on network failures (the partial file is kept)
+    """
+    if os.path.exists(path):
+        return DownloadResult(path, os.path.getsize(path), skipped=True)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    part = path + PART_SUFFIX
+    validator_path = path + ETAG_SUFFIX
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    headers = {}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        validator = _read_validator(validator_path)
+        if validator:
+            headers["If-Range"] = validator
+    loop = asyncio.get_running_loop()
+
+    with tracer.span("download", **{"http.host": urlsplit(url).hostname, "download.resume_from": offset}) as span:
+        async with client.stream("GET", url, headers=headers, follow_redirects=True) as response:
+            etag = response.headers.get("ETag")
+            if response.status_code == 416 and offset:
+                # The range starts at or past the end: either the partial file
+                # is already complete or the file changed and must start over
+                _, total = parse_content_range(response.headers.get("Content-Range"))
+                if total == offset:
+                    os.replace(part, path)
+                    _write_validator(validator_path, None)
+                    return DownloadResult(path, offset, resumed_from=offset, etag=etag)
+                os.remove(part)
+                _write_validator(validator_path, None)
+                return await download_file(client, url, path, chunk_size, progress)
+            if response.status_code >= 400:
+                raise DownloadError(f"HTTP {response.status_code} downloading {url}")
+
+            if response.status_code == 206:
+                start, total = parse_content_range(response.headers.get("Content-Range"))
+                if start != offset:
+                    raise DownloadError(f"Server answered a request for byte {offset} with byte {start}")
+                mode = "ab"
+            else:
+                # Range ignored, If-Range saw a changed file, or nothing to
+                # resume: start from the beginning
+                offset = 0
+                total = _expected_size(response)
+                mode = "wb"
+                _write_validator(validator_path, strong_etag(etag))
+
+            written = offset
+            f = open(part, mode)
+            try:
+                async for chunk in response.aiter_bytes(chunk_size):
+                    await loop.run_in_executor(None, f.write, chunk)
+                    written += len(chunk)
+                    if progress is not None:
+                        await progress(written, total)
+            finally:
+                f.close()
+
+        span.set_attribute("download.bytes", written - offset)
+        if total is not None and written != total:
+            raise DownloadError(f"Received {written} of {total} bytes from {url}; call again to resume")
+        os.replace(part, path)
+        _write_validator(validator_path, None)
+    return DownloadResult(path, written, transferred=written - offset, resumed_from=offset, etag=etag)
+
+
+async def probe(client: httpx.AsyncClient, url: str) -> Tuple[Optional[int], bool, Optional[str]]:
+    """
+    (size, accepts ranges, ETag) of url, from a one-byte Range request.
+
+    A GET is used rather than HEAD because signed CDN URLs are often valid
+    for GET only; the body is never read.
+    """
+    async with client.stream("GET", url, headers={"Range": "bytes=0-0"}, follow_redirects=True) as response:
+        if response.status_code >= 400:
+            raise DownloadError(f"HTTP {response.status_code} downloading {url}")
+        etag = response.headers.get("ETag")
+        if response.status_code == 206:
+            _, total = parse_content_range(response.headers.get("Content-Range"))
+            return total, total is not None, etag
+        return _expected_size(response), False, etag
+
+
+def plan_segments(size: int, segments: int, min_segment_size: int) -> List[List[int]]:
+    """Split size bytes into up to segments [start, end, done] ranges of at least min_segment_size"""
+    count = max(1, min(segments, size // max(min_segment_size, 1)))
+    step = -(-size // count)
+    return [[start, min(start + step, size) - 1, 0] for start in range(0, size, step)]
+
+
+class _SegmentState:
+    """Per-segment progress of one partial file, saved beside it as JSON"""
+
+    def __init__(self, path: str, size: int, etag: Optional[str], segments: List[List[int]]) -> None:
+        self.path = path
+        self.size = size
+        self.etag = etag
+        self.segments = segments
+        self._saved_at = 0.0
+
+    @classmethod
+    def load(cls, path: str, size: int, etag: Optional[str]) -> Optional["_SegmentState"]:
+        """Saved progress, if it describes the same remote file"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("size") != size or data.get("etag") != etag:
+            return None
+        return cls(path, size, etag, data["segments"])
+
+    @property
+    def done(self) -> int:
+        return sum(segment[2] for segment in self.segments)
+
+    def save(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._saved_at < STATE_SAVE_INTERVAL:
+            return
+        self._saved_at = now
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"size": self.size, "etag": self.etag, "segments": self.segments}, f)
+
+
+async def download_segmented(
+    client: httpx.AsyncClient,
+    url: str,
+    path: str,
+    segments: int = 4,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    min_segment_size: int = DEFAULT_MIN_SEGMENT_SIZE,
+    progress: Optional[ProgressCallback] = None
+) -> DownloadResult:
+    """
+    Download url to path over up to segments parallel Range requests.
+
+    Falls back to download_file() when the server ignores Range, the file is
+    too small to split, or a single-stream partial file is already waiting
+    to be resumed. An existing file at path is checked against the remote
+    size and reported as skipped.
+
+    Raises:
+        DownloadError: on an HTTP error status, a file that changed upstream
+            mid-download, a short transfer or an existing file of the wrong size
+        httpx.HTTPError: on network failures (progress so far is kept)
+    """
+    size, ranges, etag = await probe(client, url)
+    part = path + PART_SUFFIX
+    state_path = path + STATE_SUFFIX
+    if os.path.exists(path):
+        local_size = os.path.getsize(path)
+        if size is not None and local_size != size:
+            raise DownloadError(f"{path} exists but has {local_size} bytes, expected {size}")
+        return DownloadResult(path, local_size, skipped=True, etag=etag)
+
+    resuming_single = os.path.exists(part) and not os.path.exists(state_path)
+    if not ranges or size is None or size < 2 * min_segment_size or segments < 2 or resuming_single:
+        return await download_file(client, url, path, chunk_size, progress)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    state = _SegmentState.load(state_path, size, etag) if os.path.exists(part) else None
+    if state is None:
+        state = _SegmentState(state_path, size, etag, plan_segments(size, segments, min_segment_size))
+        with open(part, "wb") as f:
+            f.truncate(size)
+        state.save(force=True)
+    resumed_from = state.done
+    # A weak ETag must not be honoured in If-Range, so sending one would only get 200s
+    if_range = strong_etag(etag)
+    loop = asyncio.get_running_loop()
+
+    async def fetch(segment: List[int]) -> None:
+        start, end = segment[0], segment[1]
+        if start + segment[2] > end:
+            return
+        headers = {"Range": f"bytes={start + segment[2]}-{end}"}
+        if if_range:
+            headers["If-Range"] = if_range
+        async with client.stream("GET", url, headers=headers, follow_redirects=True) as response:
+            if response.status_code != 206:
+                # If-Range answered with the whole (changed) file, or an error
+                raise DownloadError(f"HTTP {response.status_code} for bytes {start + segment[2]}-{end} of {url}")
+            first, _ = parse_content_range(response.headers.get("Content-Range"))
+            if first != start + segment[2]:
+                raise DownloadError(f"Server answered a request for byte {start + segment[2]} with byte {first}")
+            # Unbuffered, so saved progress never covers bytes still in a buffer
+            f = open(part, "r+b", buffering=0)
+            try:
+                async for chunk in response.aiter_bytes(chunk_size):
+                    offset = start + segment[2]
+                    if offset + len(chunk) > end + 1:
+                        raise DownloadError(f"Server sent more than bytes {start}-{end} of {url}")
+                    await loop.run_in_executor(None, _write_at, f, offset, chunk)
+                    segment[2] += len(chunk)
+                    state.save()
+                    if progress is not None:
+                        await progress(state.done, size)
+            finally:
+                f.close()
+
+    with tracer.span("download", **{
+        "http.host": urlsplit(url).hostname,
+        "download.resume_from": resumed_from,
+        "download.segments": len(state.segments),
+    }) as span:
+        tasks = [asyncio.ensure_future(fetch(segment)) for segment in state.segments]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException as e:
+            # One failed segment stops the rest; their progress is saved below
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if isinstance(e, DownloadError):
+                # The remote file changed (or misbehaved): start over next time
+                for leftover in (part, state_path):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+            raise
+        finally:
+            if os.path.exists(state_path):
+                state.save(force=True)
+        span.set_attribute("download.bytes", state.done - resumed_from)
+
+    if state.done != size:
+        raise DownloadError(f"Received {state.done} of {size} bytes from {url}; call again to resume")
+    os.replace(part, path)
+    os.remove(state_path)
+    return DownloadResult(
+        path, size,
+        transferred=size - resumed_from,
+        resumed_from=resumed_from,
+        segments=len(state.segments),
+        etag=etag,
+    )
+
+
+def _write_at(f: Any, offset: int, data: bytes) -> None:
+    f.seek(offset)
+    f.write(data)
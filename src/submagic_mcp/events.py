@@ -0,0 +1,118 @@
+"""
+In-process event bus for project status changes
+
+Webhook deliveries (and anything else that learns a project's new status)
+publish here; tools that need to know when a project finishes wait here
+instead of polling the API.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set
+
+TERMINAL_STATUSES = frozenset({"completed", "failed"})
+
+
+def event_project_id(event: Dict[str, Any]) -> Optional[str]:
+    """Webhooks carry projectId; project objects from the API carry id"""
+    return event.get("projectId") or event.get("id")
+
+
+def is_terminal(event: Optional[Dict[str, Any]]) -> bool:
+    return bool(event) and event.get("status") in TERMINAL_STATUSES
+
+
+class ProjectEventBus:
+    """
+    Latest-event store plus waiters keyed by project ID.
+
+    Args:
+        max_projects: How many projects' latest events to remember
+    """
+
+    def __init__(self, max_projects: int = 10000) -> None:
+        self.max_projects = max_projects
+        self._latest: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._waiters: Dict[str, Set["asyncio.Future[Dict[str, Any]]"]] = {}
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self.published = 0
+
+    def publish(self, event: Dict[str, Any]) -> bool:
+        """Record an event and wake everyone waiting on its project; False if it has no ID"""
+        project_id = event_project_id(event)
+        if not project_id:
+            return False
+
+        event = dict(event, receivedAt=time.time())
+        self._latest[project_id] = event
+        self._latest.move_to_end(project_id)
+        while len(self._latest) > self.max_projects:
+            self._latest.popitem(last=False)
+        self.published += 1
+
+        for future in self._waiters.pop(project_id, ()):
+            if not future.done():
+                future.set_result(event)
+        for listener in self._listeners:
+            listener(event)
+        return True
+
+    def latest(self, project_id: str) -> Optional[Dict[str, Any]]:
+        return self._latest.get(project_id)
+
+    def clear(self, project_id: str) -> None:
+        """Forget the last event, e.g. when a finished project is exported again"""
+        self._latest.pop(project_id, None)
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Call listener(event) synchronously for every published event"""
+        self._listeners.append(listener)
+
+    async def wait(
+        self,
+        project_id: str,
+        timeout: float,
+        until: Callable[[Dict[str, Any]], bool] = is_terminal
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Wait until the latest event for project_id satisfies until()
+        (default: a terminal status).
+
+        Returns that event, or the latest other event (possibly None) if
+        timeout seconds pass first.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            # Re-checked every pass: the awaited event may land between wake-ups
+            event = self._latest.get(project_id)
+            if event is not None and until(event):
+                return event
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return self._latest.get(project_id)
+
+            future: "asyncio.Future[Dict[str, Any]]" = loop.create_future()
+            self._waiters.setdefault(project_id, set()).add(future)
+            try:
+                await asyncio.wait_for(future, remaining)
+            except asyncio.TimeoutError:
+                return self._latest.get(project_id)
+            finally:
+                waiters = self._waiters.get(project_id)
+                if waiters is not None:
+                    waiters.discard(future)
+                    if not waiters:
+                        del self._waiters[project_id]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "published": self.published,
+            "tracked_projects": len(self._latest),
+            "waiters": sum(len(w) for w in self._waiters.values()),
+        }
+
+
+event_bus = ProjectEventBus()
@@ -0,0 +1,158 @@
+"""
+Shared HTTP client for the Submagic API
+
+A single pooled httpx.AsyncClient is kept open for the lifetime of the server so
+tool calls reuse TCP/TLS connections instead of paying a new handshake each time.
+"""
+
+import importlib.util
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+
+from .config import env_bool, env_float, env_int
+from .tracing import record_http_event
+
+
+@dataclass
+class HTTPClientConfig:
+    """Connection pool settings for the shared client"""
+    timeout: float = 120.0
+    connect_timeout: float = 10.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+
+    @classmethod
+    def from_env(cls) -> "HTTPClientConfig":
+        """Build settings from SUBMAGIC_HTTP_* environment variables"""
+        return cls(
+            timeout=env_float("SUBMAGIC_HTTP_TIMEOUT", cls.timeout),
+            connect_timeout=env_float("SUBMAGIC_HTTP_CONNECT_TIMEOUT", cls.connect_timeout),
+            max_connections=env_int("SUBMAGIC_HTTP_MAX_CONNECTIONS", cls.max_connections),
+            max_keepalive_connections=env_int(
+                "SUBMAGIC_HTTP_MAX_KEEPALIVE", cls.max_keepalive_connections
+            ),
+            keepalive_expiry=env_float("SUBMAGIC_HTTP_KEEPALIVE_EXPIRY", cls.keepalive_expiry),
+            http2=env_bool("SUBMAGIC_HTTP2", cls.http2),
+        )
+
+
+class ConnectionStats:
+    """
+    Counts requests against newly opened connections.
+
+    Every request sent through the shared client is tagged with an httpcore
+    trace callback; a "connect_tcp" event means the pool had to open a fresh
+    connection, anything else was served from a kept-alive one.
+    """
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.connections_opened = 0
+
+    @property
+    def connections_reused(self) -> int:
+        return max(self.requests - self.connections_opened, 0)
+
+    @property
+    def reuse_ratio(self) -> float:
+        if not self.requests:
+            return 0.0
+        return self.connections_reused / self.requests
+
+    async def on_request(self, request: httpx.Request) -> None:
+        """httpx request hook: count the request and attach the trace callback"""
+        self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.started":
+            self.connections_opened += 1
+        record_http_event(event_name)
+
+    def reset(self) -> None:
+        self.requests = 0
+        self.connections_opened = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused,
+            "reuse_ratio": round(self.reuse_ratio, 4),
+        }
+
+
+connection_stats = ConnectionStats()
+
+_client: Optional[httpx.AsyncClient] = None
+_config: Optional[HTTPClientConfig] = None
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package (pip install 'httpx[http2]')"""
+    return importlib.util.find_spec("h2") is not None
+
+
+def build_http_client(
+    config: Optional[HTTPClientConfig] = None,
+    transport: Optional[httpx.AsyncBaseTransport] = None
+) -> httpx.AsyncClient:
+    """Create a pooled AsyncClient from the given settings"""
+    config = config or HTTPClientConfig.from_env()
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(config.timeout, connect=config.connect_timeout),
+        limits=httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        ),
+        http2=config.http2 and http2_available(),
+        transport=transport,
+        event_hooks={"request": [connection_stats.on_request]},
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared client, creating it on first use.
+
+    The server lifespan opens the client at startup; lazy creation covers
+    callers that invoke tools without going through the lifespan (tests, scripts).
+    """
+    global _client, _config
+    if _client is None or _client.is_closed:
+        _config = HTTPClientConfig.from_env()
+        _client = build_http_client(_config)
+    return _client
+
+
+def set_http_client(client: Optional[httpx.AsyncClient]) -> None:
+    """Replace the shared client (used by tests and benchmarks to inject a transport)"""
+    global _client
+    _client = client
+
+
+async def close_http_client() -> None:
+    """Close the shared client and release its pooled connections"""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+
+def http_client_info() -> Dict[str, Any]:
+    """Current pool settings plus connection reuse counters"""
+    config = _config or HTTPClientConfig.from_env()
+    info = {
+        "http2": config.http2 and http2_available(),
+        "max_connections": config.max_connections,
+        "max_keepalive_connections": config.max_keepalive_connections,
+        "keepalive_expiry": config.keepalive_expiry,
+        "open": _client is not None and not _client.is_closed,
+    }
+    info.update(connection_stats.snapshot())
+    return info
@@ -0,0 +1,264 @@
+"""
+Pool of Submagic API keys
+
+Each Submagic account has its own hourly quotas, so several keys multiply
+throughput. Keys come from SUBMAGIC_API_KEY, SUBMAGIC_API_KEYS (comma
+separated), SUBMAGIC_API_KEY_1..N and/or SUBMAGIC_API_KEYS_FILE (one key per
+line). Requests are spread across keys by least use or by remaining quota;
+a key the API rejects with 401 is taken out of rotation. Projects only exist
+in the account that created them, so follow-up calls on a project are pinned
+to the key that created it.
+"""
+
+import hashlib
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import env_str
+from .rate_limit import RateLimiter
+from .statefile import FileVersion, file_version, locked, read_json, write_json
+
+POLICY_LEAST_USED = "least_used"
+POLICY_REMAINING_QUOTA = "remaining_quota"
+
+# Endpoints whose response is a new project (or magic clips job) owned by the calling key
+CREATE_ENDPOINTS = frozenset({"projects", "projects/upload", "projects/magic-clips"})
+
+# Pins older than this are dropped (follow-up calls on a project come within days)
+DEFAULT_PIN_TTL = 30 * 24 * 3600
+# Most pins kept; the oldest are dropped beyond this
+DEFAULT_MAX_PINS = 10000
+
+_PROJECT_ENDPOINT = re.compile(r"^projects/([^/]+)")
+
+_file_cache: Dict[str, Tuple[float, List[str]]] = {}
+
+
+class NoApiKeyAvailable(Exception):
+    """Every configured key has been rejected, or the project's key is gone"""
+
+
+def key_id(api_key: str) -> str:
+    """Short non-secret identifier for logs, stats and pins"""
+    return "key_" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8]
+
+
+def project_id_from_endpoint(endpoint: str) -> Optional[str]:
+    """The project a request is about (projects/{id}, projects/{id}/export, ...)"""
+    match = _PROJECT_ENDPOINT.match(endpoint.strip("/"))
+    if match is None or f"projects/{match.group(1)}" in CREATE_ENDPOINTS:
+        return None
+    return match.group(1)
+
+
+def _read_key_file(path: str) -> List[str]:
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return []
+    cached = _file_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            keys = [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    except OSError:
+        return []
+    _file_cache[path] = (mtime, keys)
+    return keys
+
+
+def load_api_keys() -> List[str]:
+    """All configured keys, in configuration order, without duplicates"""
+    keys: List[str] = []
+    single = env_str("SUBMAGIC_API_KEY")
+    if single:
+        keys.append(single)
+    keys.extend(k.strip() for k in (env_str("SUBMAGIC_API_KEYS") or "").split(",") if k.strip())
+    index = 1
+    while True:
+        numbered = env_str(f"SUBMAGIC_API_KEY_{index}")
+        if numbered is None:
+            break
+        keys.append(numbered)
+        index += 1
+    path = env_str("SUBMAGIC_API_KEYS_FILE")
+    if path:
+        keys.extend(_read_key_file(os.path.expanduser(path)))
+    return list(dict.fromkeys(keys))
+
+
+class ApiKey:
+    """
+    Args:
+        key: The secret API key
+        limiter: Rate limiter for this account (None shares the module-level limiter)
+    """
+
+    def __init__(self, key: str, limiter: Optional[RateLimiter] = None) -> None:
+        self.key = key
+        self.id = key_id(key)
+        self.limiter = limiter
+        self.in_flight = 0
+        self.requests = 0
+        self.ejected: Optional[str] = None
+
+
+class KeyPool:
+    """
+    Args:
+        keys: API keys; with more than one, each gets its own RateLimiter
+        policy: "least_used" or "remaining_quota"
+        pins_path: Optional JSON file persisting project -> key pins across
+            restarts; several processes can share it
+        pin_ttl: Seconds a pin is kept
+        max_pins: Most pins kept (oldest dropped first)
+    """
+
+    def __init__(
+        self,
+        keys: List[str],
+        policy: str = POLICY_LEAST_USED,
+        pins_path: Optional[str] = None,
+        pin_ttl: float = DEFAULT_PIN_TTL,
+        max_pins: int = DEFAULT_MAX_PINS
+    ) -> None:
+        shared = len(keys) <= 1
+        self.keys = [ApiKey(k, None if shared else RateLimiter.from_env()) for k in keys]
+        self.policy = policy if policy in (POLICY_LEAST_USED, POLICY_REMAINING_QUOTA) else POLICY_LEAST_USED
+        self.pins_path = pins_path
+        self.pin_ttl = pin_ttl
+        self.max_pins = max(max_pins, 1)
+        self._by_id = {k.id: k for k in self.keys}
+        # project_id -> (key id, pinned_at)
+        self._pins: Dict[str, Tuple[str, float]] = {}
+        self._pins_version: Optional[FileVersion] = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def signature(self) -> Tuple[str, ...]:
+        return tuple(k.key for k in self.keys)
+
+    def active(self) -> List[ApiKey]:
+        return [k for k in self.keys if k.ejected is None]
+
+    def _read_pins(self) -> Dict[str, Tuple[str, float]]:
+        if not self.pins_path:
+            return dict(self._pins)
+        data = read_json(self.pins_path)
+        pins = {}
+        if isinstance(data, dict):
+            # Pins written by older versions are bare key IDs; date them by the file
+            try:
+                written = os.path.getmtime(self.pins_path)
+            except OSError:
+                written = 0.0
+            for project_id, value in data.items():
+                if isinstance(value, dict) and value.get("key"):
+                    pins[str(project_id)] = (str(value["key"]), float(value.get("pinned_at") or 0))
+                elif isinstance(value, str) and value:
+                    pins[str(project_id)] = (value, written)
+        return pins
+
+    def _load_pins(self) -> Dict[str, Tuple[str, float]]:
+        """Current pins, reloaded when another process has rewritten the file"""
+        if self.pins_path:
+            version = file_version(self.pins_path)
+            if version != self._pins_version:
+                self._pins_version = version
+                self._pins = self._read_pins()
+        return self._pins
+
+    def _live(self, pinned_at: float, now: float) -> bool:
+        return now - pinned_at < self.pin_ttl
+
+    def pin(self, project_id: Optional[str], key: ApiKey) -> None:
+        """Route future requests about project_id to key"""
+        if not project_id or len(self.keys) <= 1:
+            return
+        current = self._load_pins().get(project_id)
+        now = time.time()
+        if current is not None and current[0] == key.id and self._live(current[1], now):
+            return
+        # Re-read and merge under the lock so concurrent processes keep each other's pins
+        with locked(self.pins_path):
+            pins = self._read_pins()
+            pins[project_id] = (key.id, now)
+            live = sorted(
+                ((p, entry) for p, entry in pins.items() if self._live(entry[1], now)),
+                key=lambda item: item[1][1]
+            )
+            self._pins = dict(live[-self.max_pins:])
+            if self.pins_path:
+                data = {p: {"key": k, "pinned_at": at} for p, (k, at) in self._pins.items()}
+                # On a failed write, keep the in-memory pins instead of reloading the old file
+                self._pins_version = write_json(self.pins_path, data) or file_version(self.pins_path)
+
+    def pinned(self, project_id: Optional[str]) -> Optional[ApiKey]:
+        if not project_id or len(self.keys) <= 1:
+            return None
+        entry = self._load_pins().get(project_id)
+        if entry is None or not self._live(entry[1], time.time()):
+            return None
+        return self._by_id.get(entry[0])
+
+    def get(self, id_: str) -> Optional[ApiKey]:
+        return self._by_id.get(id_)
+
+    def select(self, quota: str, project_id: Optional[str] = None) -> ApiKey:
+        """
+        Pick the key for one request.
+
+        Requests about a pinned project always use its key. Otherwise the
+        active key with the fewest requests in flight (then fewest overall)
+        wins, or with "remaining_quota" the one with the most budget left in
+        this quota class.
+        """
+        pinned = self.pinned(project_id)
+        if pinned is not None:
+            if pinned.ejected is not None:
+                raise NoApiKeyAvailable(
+                    f"Project {project_id} belongs to API key {pinned.id}, which was rejected ({pinned.ejected})"
+                )
+            return pinned
+
+        candidates = self.active()
+        if not candidates:
+            raise NoApiKeyAvailable("Every configured API key was rejected by the API")
+        if self.policy == POLICY_REMAINING_QUOTA:
+            return max(candidates, key=lambda k: (self._available(k, quota), -k.in_flight, -k.requests))
+        # Least used, but never a key whose quota is exhausted while another has budget
+        return min(candidates, key=lambda k: (self._available(k, quota) < 1.0, k.in_flight, k.requests))
+
+    @staticmethod
+    def _available(key: ApiKey, quota: str) -> float:
+        if key.limiter is None or quota not in key.limiter.buckets:
+            return float("inf")
+        return key.limiter.buckets[quota].available()
+
+    def eject(self, key: ApiKey, reason: str) -> bool:
+        """Take key out of rotation; the last remaining key is never ejected"""
+        if key.ejected is not None or len(self.active()) <= 1:
+            return False
+        key.ejected = reason
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "keys": [
+                {
+                    "id": k.id,
+                    "active": k.ejected is None,
+                    "ejected": k.ejected,
+                    "in_flight": k.in_flight,
+                    "requests": k.requests,
+                }
+                for k in self.keys
+            ],
+            "pinned_projects": len(self._load_pins()),
+        }
@@ -0,0 +1,437 @@
+"""
+Prometheus-style metrics for tool calls and API requests
+
+Counters, gauges and histograms are kept in process and rendered in the
+Prometheus text exposition format, either by the submagic_server_stats tool or
+by a small HTTP listener enabled with SUBMAGIC_METRICS_PORT. Values that other
+components already count (cache hits, scheduler queues, key usage) are read
+from their snapshot() at render time through collectors instead of being
+tracked twice.
+"""
+
+import asyncio
+import functools
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+from .config import env_float, env_int, env_str
+from .keys import project_id_from_endpoint
+from .tracing import STATUS_ERROR, tracer
+
+# Seconds; covers cached lookups up to slow uploads and long polls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+NO_TOOL = "none"
+
+# Scrape requests are a request line and a few headers
+MAX_HEADER_LINE_BYTES = 8 * 1024
+MAX_HEADERS = 100
+DEFAULT_READ_TIMEOUT = 10.0
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    431: "Request Header Fields Too Large",
+}
+
+current_tool: "ContextVar[str]" = ContextVar("submagic_tool", default=NO_TOOL)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[Dict[str, str], float]
+# (name, help, type, samples) produced by a collector at render time
+Family = Tuple[str, str, str, List[Sample]]
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+def endpoint_label(endpoint: str) -> str:
+    """Endpoint path with the project ID replaced, so labels stay low-cardinality"""
+    path = endpoint.strip("/")
+    project_id = project_id_from_endpoint(path)
+    if project_id is not None:
+        path = "projects/{id}" + path[len("projects/") + len(project_id):]
+    return path
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[Sample]:
+        return [(self._labels(key), value) for key, value in sorted(self._values.items())]
+
+    def total(self, **labels: Any) -> float:
+        """Sum over every series matching the given labels"""
+        wanted = {name: str(value) for name, value in labels.items()}
+        return sum(
+            value for key, value in self._values.items()
+            if all(self._labels(key).get(name) == value for name, value in wanted.items())
+        )
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(value)}" for labels, value in self.samples()]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        self._values[self._key(labels)] = value
+
+
+class HistogramSeries:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, HistogramSeries] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = HistogramSeries(len(self.buckets))
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series.counts[i] += 1
+                break
+        series.sum += value
+        series.count += 1
+
+    def series(self) -> List[Tuple[Dict[str, str], HistogramSeries]]:
+        return [(self._labels(key), series) for key, series in sorted(self._series.items())]
+
+    def quantile(self, q: float, **labels: Any) -> Optional[float]:
+        """Upper bucket bound containing quantile q of one series (None without data)"""
+        series = self._series.get(self._key(labels))
+        if series is None or series.count == 0:
+            return None
+        rank = q * series.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, series.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+    def render(self, buckets: bool = True) -> List[str]:
+        """Exposition lines; without buckets only the +Inf bucket, sum and count are kept"""
+        lines = []
+        for labels, series in self.series():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series.counts):
+                cumulative += count
+                if buckets:
+                    bucket_labels = dict(labels, le=_format_value(bound))
+                    lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(dict(labels, le='+Inf'))} {series.count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(series.sum)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {series.count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def _register(self, metric: Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """Register a callable returning metric families computed at render time"""
+        self._collectors.append(collector)
+
+    def render(self, buckets: bool = True) -> str:
+        """
+        All metrics in the Prometheus text exposition format (version 0.0.4)
+
+        buckets=False drops the finite histogram buckets, which make up most of
+        the output, for callers with a size limit.
+        """
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render(buckets) if isinstance(metric, Histogram) else metric.render())
+        for collector in self._collectors:
+            for name, help, type_, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {type_}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+TOOL_CALLS = metrics.counter(
+    "submagic_tool_calls_total", "MCP tool calls by outcome (ok or error)", ("tool", "outcome")
+)
+TOOL_DURATION = metrics.histogram(
+    "submagic_tool_duration_seconds", "MCP tool call latency", ("tool",)
+)
+TOOL_IN_FLIGHT = metrics.gauge(
+    "submagic_tool_calls_in_flight", "MCP tool calls currently running", ("tool",)
+)
+API_REQUESTS = metrics.counter(
+    "submagic_api_requests_total",
+    "Submagic API requests by final outcome, retries included in one request",
+    ("tool", "endpoint", "method", "outcome"),
+)
+API_DURATION = metrics.histogram(
+    "submagic_api_request_duration_seconds",
+    "Submagic API request latency including queueing, rate-limit waits and retries",
+    ("tool", "endpoint", "method"),
+)
+API_IN_FLIGHT = metrics.gauge(
+    "submagic_api_requests_in_flight", "Submagic API requests currently running", ("tool", "endpoint")
+)
+API_RESPONSES = metrics.counter(
+    "submagic_api_responses_total", "HTTP responses received per attempt, by status code", ("endpoint", "method", "status")
+)
+API_RETRIES = metrics.counter(
+    "submagic_api_retries_total", "Request attempts repeated after a transient failure", ("endpoint", "method", "reason")
+)
+API_RATE_LIMITED = metrics.counter(
+    "submagic_api_rate_limited_total",
+    "Requests held back by a 429 (upstream) or refused by the local limiter (local)",
+    ("endpoint", "source"),
+)
+DOWNLOAD_BYTES = metrics.counter(
+    "submagic_download_bytes_total", "Bytes of rendered videos and clips written to disk", ("tool",)
+)
+
+
+def tool_failed(result: Any) -> bool:
+    """Whether a tool's List[TextContent] output reports an error"""
+    if not result:
+        return False
+    text = getattr(result[0], "text", "") or ""
+    return text.startswith("Error:") or text.startswith("Input validation error")
+
+
+def instrument_tool(fn: F) -> F:
+    """
+    Record calls, errors, latency and concurrency of an MCP tool under its
+    function name, and trace each call as the root span of its requests
+    """
+    name = fn.__name__
+    span_name = f"tool {name}"
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        token = current_tool.set(name)
+        TOOL_IN_FLIGHT.inc(tool=name)
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            with tracer.span(span_name, **{"mcp.tool": name}) as span:
+                result = await fn(*args, **kwargs)
+                outcome = "error" if tool_failed(result) else "ok"
+                if span.recording:
+                    span.set_attribute("mcp.tool.outcome", outcome)
+                    span.set_attribute("mcp.tool.output_chars", sum(len(getattr(c, "text", "") or "") for c in result or ()))
+                    if outcome == "error":
+                        span.set_status(STATUS_ERROR, result[0].text.split("\n", 1)[0])
+            return result
+        finally:
+            TOOL_DURATION.observe(time.perf_counter() - started, tool=name)
+            TOOL_CALLS.inc(tool=name, outcome=outcome)
+            TOOL_IN_FLIGHT.dec(tool=name)
+            current_tool.reset(token)
+
+    return wrapper  # type: ignore[return-value]
+
+
+class MetricsServer:
+    """
+    Serves GET {path} in Prometheus text format.
+
+    Args:
+        registry: Metrics to expose
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        path: URL path scraped by Prometheus
+        read_timeout: Seconds a client has to send its whole request
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        host: str = "127.0.0.1",
+        port: int = 9464,
+        path: str = "/metrics",
+        read_timeout: float = DEFAULT_READ_TIMEOUT
+    ) -> None:
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.path = path
+        self.read_timeout = read_timeout
+        self.scrapes = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, limit=MAX_HEADER_LINE_BYTES
+        )
+        sockets = self._server.sockets or []
+        if sockets:
+            self.port = sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            server, self._server = self._server, None
+            server.close()
+            await server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        method = ""
+        try:
+            method, status, body = await asyncio.wait_for(self._process(reader), self.read_timeout)
+        except asyncio.TimeoutError:
+            status, body = 408, "request timeout\n"
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            # ValueError also covers a header line longer than the stream limit
+            status, body = 400, "malformed request\n"
+
+        payload = body.encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+            "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode("latin-1")
+        try:
+            writer.write(head if method == "HEAD" else head + payload)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _process(self, reader: asyncio.StreamReader) -> Tuple[str, int, str]:
+        request_line = (await reader.readline()).decode("latin-1").split()
+        # Drain the headers; scrapes never carry a body
+        headers = 0
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            headers += 1
+            if headers > MAX_HEADERS:
+                return "", 431, "too many headers\n"
+        if len(request_line) < 2:
+            return "", 400, "malformed request\n"
+        method, target = request_line[0], request_line[1]
+        if target.split("?", 1)[0] != self.path:
+            return method, 404, "not found\n"
+        if method not in ("GET", "HEAD"):
+            return method, 405, "method not allowed\n"
+        self.scrapes += 1
+        return method, 200, self.registry.render()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "listen": f"{self.host}:{self.port}{self.path}",
+            "scrapes": self.scrapes,
+        }
+
+
+def metrics_server_from_env(registry: MetricsRegistry) -> Optional[MetricsServer]:
+    """Build a metrics listener if SUBMAGIC_METRICS_PORT is set, otherwise None"""
+    if env_str("SUBMAGIC_METRICS_PORT") is None:
+        return None
+    return MetricsServer(
+        registry,
+        host=env_str("SUBMAGIC_METRICS_HOST", "127.0.0.1"),
+        port=env_int("SUBMAGIC_METRICS_PORT", 9464),
+        path=env_str("SUBMAGIC_METRICS_PATH", "/metrics"),
+        read_timeout=env_float("SUBMAGIC_METRICS_READ_TIMEOUT", DEFAULT_READ_TIMEOUT),
+    )
@@ -0,0 +1,252 @@
+"""
+Local stand-in for the Submagic API
+
+MockSubmagicAPI answers the endpoints the server uses (languages, templates,
+projects, export, magic clips, upload) entirely in memory, with configurable
+latency and injected 5xx/429 responses. Rendered videos and clips are served
+from CDN_HOST with Range support. Plug it into the shared client with
+httpx.MockTransport to test or benchmark the server without an API key or
+network access:
+
+    api = MockSubmagicAPI(latency=0.05, error_rate=0.01)
+    set_http_client(build_http_client(transport=api.transport()))
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+LANGUAGES = [
+    {"code": "en", "name": "English"},
+    {"code": "es", "name": "Spanish"},
+    {"code": "fr", "name": "French"},
+    {"code": "de", "name": "German"},
+    {"code": "pt", "name": "Portuguese"},
+    {"code": "cmn_en", "name": "Mandarin / English"},
+]
+
+TEMPLATES = ["Sara", "Beast", "Hormozi 1", "Hormozi 2", "Hormozi 3", "Daniel", "Ella"]
+
+CDN_HOST = "cdn.example.com"
+
+_RANGE = re.compile(r"^bytes=(\d+)-(\d*)$")
+
+_PROJECT = re.compile(r"^/v1/projects/([^/]+)(/export)?$")
+
+
+class MockSubmagicAPI:
+    """
+    Args:
+        latency: Seconds every response is delayed by
+        jitter: Extra random delay of up to this many seconds
+        error_rate: Fraction of requests answered with a 503
+        rate_limit_rate: Fraction of requests answered with a 429
+        retry_after: Retry-After seconds sent with injected 429s
+        polls_to_complete: GETs of a project before it reports completed
+        words: Transcript segments included in completed projects
+        clips: Clips generated by each magic clips project
+        file_size: Bytes in every file served from CDN_HOST
+        accept_ranges: Whether CDN_HOST honours Range requests
+        seed: Seed for the injection and jitter RNG, for repeatable runs
+
+    Requests are counted per (method, route) in self.requests.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        polls_to_complete: int = 2,
+        words: int = 0,
+        clips: int = 3,
+        file_size: int = 64 * 1024,
+        accept_ranges: bool = True,
+        weak_etags: bool = False,
+        seed: Optional[int] = None
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.polls_to_complete = polls_to_complete
+        self.words = words
+        self.clips = clips
+        self.file_size = file_size
+        self.accept_ranges = accept_ranges
+        self.weak_etags = weak_etags
+        # Bump to make every CDN file change its content (and ETag)
+        self.file_revision = 0
+        self.projects: Dict[str, Dict[str, Any]] = {}
+        self.requests: Counter = Counter()
+        self.injected: Counter = Counter()
+        self._random = random.Random(seed)
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if request.url.host == CDN_HOST:
+            self.requests[(request.method, "cdn")] += 1
+            return self._serve_file(request)
+
+        method, route, project_id = self._route(request)
+        self.requests[(method, route)] += 1
+
+        roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            self.injected[429] += 1
+            return httpx.Response(
+                429,
+                headers={"Retry-After": str(self.retry_after)},
+                json={"error": "RATE_LIMIT_EXCEEDED", "message": "Too many requests"},
+            )
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.injected[503] += 1
+            return httpx.Response(503, json={"error": "SERVICE_UNAVAILABLE", "message": "Injected failure"})
+
+        if method == "GET" and route == "/languages":
+            return httpx.Response(200, json={"languages": LANGUAGES})
+        if method == "GET" and route == "/templates":
+            return httpx.Response(200, json={"templates": TEMPLATES})
+        if method == "POST" and route in ("/projects", "/projects/upload"):
+            return httpx.Response(201, json=self._create(request, "project"))
+        if method == "POST" and route == "/projects/magic-clips":
+            return httpx.Response(201, json=self._create(request, "magic_clips"))
+        if project_id is None or project_id not in self.projects:
+            return httpx.Response(404, json={"error": "NOT_FOUND", "message": "Project not found"})
+
+        project = self.projects[project_id]
+        if method == "GET" and route == "/projects/{id}":
+            return httpx.Response(200, json=self._poll(project))
+        if method == "PUT" and route == "/projects/{id}":
+            project.update(_json_body(request))
+            return httpx.Response(200, json={"id": project_id, "status": project["status"]})
+        if method == "POST" and route == "/projects/{id}/export":
+            project["status"] = "exporting"
+            project["exportPolls"] = 0
+            return httpx.Response(200, json={"id": project_id, "status": "exporting"})
+        return httpx.Response(405, json={"error": "METHOD_NOT_ALLOWED", "message": f"{method} {route}"})
+
+    def _route(self, request: httpx.Request) -> Tuple[str, str, Optional[str]]:
+        path = request.url.path.rstrip("/")
+        match = _PROJECT.match(path)
+        if match and match.group(1) not in ("upload", "magic-clips"):
+            return request.method, "/projects/{id}" + (match.group(2) or ""), match.group(1)
+        return request.method, path[len("/v1"):] if path.startswith("/v1") else path, None
+
+    def _create(self, request: httpx.Request, kind: str) -> Dict[str, Any]:
+        body = _json_body(request)
+        project_id = self.add_project(status="processing", kind=kind)
+        project = self.projects[project_id]
+        project["title"] = body.get("title", "Untitled")
+        project["language"] = body.get("language", "en")
+        return {"id": project_id, "title": project["title"], "status": "processing"}
+
+    def add_project(self, status: str = "completed", kind: str = "project") -> str:
+        """Seed a project directly (no request counted) and return its ID"""
+        project_id = str(uuid.UUID(int=self._random.getrandbits(128)))
+        self.projects[project_id] = {
+            "id": project_id,
+            "title": f"Seeded {len(self.projects) + 1}",
+            "language": "en",
+            "status": status,
+            "kind": kind,
+            "polls": 0,
+        }
+        return project_id
+
+    def _poll(self, project: Dict[str, Any]) -> Dict[str, Any]:
+        project["polls"] += 1
+        if project["status"] == "processing" and project["polls"] >= self.polls_to_complete:
+            project["status"] = "completed"
+        elif project["status"] == "exporting":
+            project["exportPolls"] += 1
+            if project["exportPolls"] >= self.polls_to_complete:
+                project["status"] = "completed"
+                project["downloadUrl"] = f"https://{CDN_HOST}/{project['id']}.mp4"
+
+        body = {k: v for k, v in project.items() if k not in ("polls", "exportPolls", "kind")}
+        if project["status"] == "completed":
+            body["videoMetaData"] = {"width": 1080, "height": 1920, "duration": self.words * 0.4, "fps": 30}
+            body["words"] = self._words()
+        if project["kind"] == "magic_clips" and project["status"] == "completed":
+            body["magicClips"] = [
+                {
+                    "id": f"{project['id']}-{i}",
+                    "title": f"Clip {i + 1}",
+                    "duration": 30,
+                    "viralityScore": 80 - i,
+                    "status": "completed",
+                    "previewUrl": f"https://app.submagic.co/view/{project['id']}-{i}",
+                    "downloadUrl": f"https://{CDN_HOST}/{project['id']}-{i}-download.mp4",
+                    "directUrl": f"https://{CDN_HOST}/{project['id']}-{i}.mp4",
+                }
+                for i in range(self.clips)
+            ]
+        return body
+
+    def _words(self) -> List[Dict[str, Any]]:
+        words = []
+        for i in range(self.words):
+            start = round(i * 0.4, 2)
+            if i % 10 == 9:
+                words.append({"id": str(i), "text": "", "type": "silence", "startTime": start, "endTime": start + 0.4})
+            else:
+                words.append({"id": str(i), "text": f"word{i % 50}", "type": "word", "startTime": start, "endTime": start + 0.35})
+        return words
+
+    def file_content(self, path: str) -> bytes:
+        """The bytes served for path on CDN_HOST (deterministic, file_size long)"""
+        seed = f"{path}#{self.file_revision}" if self.file_revision else path
+        block = hashlib.sha256(seed.encode("utf-8")).digest()
+        return (block * (self.file_size // len(block) + 1))[:self.file_size]
+
+    def _serve_file(self, request: httpx.Request) -> httpx.Response:
+        content = self.file_content(request.url.path)
+        size = len(content)
+        # Like S3, the ETag of a single-part object is the MD5 of its body
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+        headers = {"Content-Type": "video/mp4", "ETag": f"W/{etag}" if self.weak_etags else etag}
+        match = _RANGE.match(request.headers.get("Range", ""))
+        if_range = request.headers.get("If-Range")
+        # If-Range only matches a strong ETag (RFC 9110 13.1.5)
+        if not self.accept_ranges or match is None or (if_range and (if_range != etag or self.weak_etags)):
+            return httpx.Response(200, content=content, headers=headers)
+        start = int(match.group(1))
+        end = min(int(match.group(2)) if match.group(2) else size - 1, size - 1)
+        if start >= size:
+            return httpx.Response(416, headers={"Content-Range": f"bytes */{size}"})
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return httpx.Response(206, content=content[start:end + 1], headers=headers)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "projects": len(self.projects),
+            "requests": {f"{method} {route}": count for (method, route), count in sorted(self.requests.items())},
+            "injected": dict(self.injected),
+        }
+
+
+def _json_body(request: httpx.Request) -> Dict[str, Any]:
+    if request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            body = json.loads(request.content)
+        except ValueError:
+            return {}
+        return body if isinstance(body, dict) else {}
+    return {}
@@ -0,0 +1,220 @@
+"""
+Checkpoint store for submagic_process_video runs
+
+A run walks one video through create -> wait -> export -> wait inside the
+server. Every stage transition is written to SQLite before the next step
+starts, so a restarted server picks each unfinished run up at the stage it
+had reached instead of starting over.
+
+Several server processes can share one database (every stdio session is its
+own process). Each run is leased to the process driving it: a process resumes
+only runs it claimed with a conditional UPDATE, and renews the lease while it
+works, so two sessions never create or export the same run twice.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    stage TEXT NOT NULL,
+    title TEXT,
+    project_id TEXT,
+    create_body TEXT NOT NULL,
+    export_body TEXT NOT NULL,
+    project_status TEXT,
+    download_url TEXT,
+    direct_url TEXT,
+    error TEXT,
+    deadline_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    owner TEXT,
+    lease_expires_at REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_runs_stage ON runs (stage);
+CREATE INDEX IF NOT EXISTS idx_runs_created_at ON runs (created_at);
+"""
+
+# Stages, in order
+STAGE_CREATING = "creating"
+STAGE_PROCESSING = "processing"
+STAGE_EXPORTING = "exporting"
+STAGE_RENDERING = "rendering"
+STAGE_COMPLETED = "completed"
+STAGE_FAILED = "failed"
+
+STAGES = (STAGE_CREATING, STAGE_PROCESSING, STAGE_EXPORTING, STAGE_RENDERING, STAGE_COMPLETED)
+FINISHED_STAGES = frozenset({STAGE_COMPLETED, STAGE_FAILED})
+
+_UPDATABLE = frozenset({
+    "project_id", "project_status", "download_url", "direct_url", "error",
+})
+
+
+def new_run_id() -> str:
+    return f"run_{uuid.uuid4().hex[:16]}"
+
+
+def process_owner() -> str:
+    """Lease owner for this process: host:pid"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def owner_is_dead(owner: Optional[str]) -> bool:
+    """True if owner is another process on this host that no longer exists"""
+    host, _, pid = (owner or "").rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit() or int(pid) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        # Exists but belongs to another user
+        return False
+    return False
+
+
+class RunStore:
+    """
+    Args:
+        path: SQLite database file (":memory:" for an in-memory store)
+        lease: Seconds a claimed run stays owned without a renew()
+        owner: Lease owner name (default: this host and process ID)
+    """
+
+    def __init__(self, path: str, lease: float = 60.0, owner: Optional[str] = None) -> None:
+        self.path = path
+        self.lease = lease
+        self.owner = owner or process_owner()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def create(
+        self,
+        title: Optional[str],
+        create_body: Dict[str, Any],
+        export_body: Dict[str, Any],
+        timeout: float
+    ) -> str:
+        """Record a new run at the creating stage, leased to this store, and return its run_id"""
+        run_id = new_run_id()
+        now = time.time()
+        self._conn.execute(
+            """
+            INSERT INTO runs
+                (run_id, stage, title, create_body, export_body, deadline_at, created_at, updated_at,
+                 owner, lease_expires_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                run_id,
+                STAGE_CREATING,
+                title,
+                json.dumps(create_body),
+                json.dumps(export_body),
+                now + timeout,
+                now,
+                now,
+                self.owner,
+                now + self.lease,
+            ),
+        )
+        return run_id
+
+    def claim(self, run_id: str, stale_owner: Optional[str] = None) -> bool:
+        """
+        Take the lease on an unfinished run; False if another owner holds it
+
+        The lease is free when it has expired, is already ours, or belongs to
+        stale_owner (a process known to be gone).
+        """
+        now = time.time()
+        placeholders = ", ".join("?" for _ in FINISHED_STAGES)
+        cursor = self._conn.execute(
+            f"""
+            UPDATE runs SET owner = ?, lease_expires_at = ?
+            WHERE run_id = ? AND stage NOT IN ({placeholders})
+              AND (owner IS NULL OR owner = ? OR lease_expires_at < ? OR owner = ?)
+            """,
+            (self.owner, now + self.lease, run_id, *sorted(FINISHED_STAGES), self.owner, now, stale_owner),
+        )
+        return cursor.rowcount == 1
+
+    def claim_unfinished(self) -> List[Dict[str, Any]]:
+        """Claim every unfinished run whose lease is free; returns the runs claimed"""
+        claimed = []
+        for run in self.unfinished():
+            stale_owner = run["owner"] if owner_is_dead(run["owner"]) else None
+            if self.claim(run["run_id"], stale_owner):
+                claimed.append(self.get(run["run_id"]))
+        return claimed
+
+    def renew(self, run_id: str) -> bool:
+        """Extend our lease on run_id; False if it has been taken over"""
+        cursor = self._conn.execute(
+            "UPDATE runs SET lease_expires_at = ? WHERE run_id = ? AND owner = ?",
+            (time.time() + self.lease, run_id, self.owner),
+        )
+        return cursor.rowcount == 1
+
+    def release(self, run_id: str) -> None:
+        """Give up our lease so another process can resume the run at once"""
+        self._conn.execute(
+            "UPDATE runs SET lease_expires_at = 0 WHERE run_id = ? AND owner = ?",
+            (run_id, self.owner),
+        )
+
+    def checkpoint(self, run_id: str, stage: str, **fields: Any) -> bool:
+        """
+        Move a run to stage, updating any of the _UPDATABLE columns given
+
+        Returns False, writing nothing, if the run is leased to another owner.
+        """
+        unknown = set(fields) - _UPDATABLE
+        if unknown:
+            raise ValueError(f"Unknown run fields: {', '.join(sorted(unknown))}")
+        assignments = "".join(f", {name} = ?" for name in fields)
+        cursor = self._conn.execute(
+            f"UPDATE runs SET stage = ?, updated_at = ?{assignments} WHERE run_id = ? AND owner = ?",
+            (stage, time.time(), *fields.values(), run_id, self.owner),
+        )
+        return cursor.rowcount == 1
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """Runs that have not reached completed/failed, oldest first"""
+        placeholders = ", ".join("?" for _ in FINISHED_STAGES)
+        rows = self._conn.execute(
+            f"SELECT * FROM runs WHERE stage NOT IN ({placeholders}) ORDER BY created_at",
+            tuple(sorted(FINISHED_STAGES)),
+        )
+        return [_row_to_dict(row) for row in rows]
+
+    def list(self, limit: int = 20) -> List[Dict[str, Any]]:
+        rows = self._conn.execute("SELECT * FROM runs ORDER BY created_at DESC LIMIT ?", (limit,))
+        return [_row_to_dict(row) for row in rows]
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    data = dict(row)
+    for key in ("create_body", "export_body"):
+        data[key] = json.loads(data[key])
+    return data
@@ -0,0 +1,71 @@
+"""
+Adaptive poll schedule for waiting on Submagic projects
+
+Used by submagic_wait_for_project when no webhook arrives. The interval starts
+from a per-status base (exports finish faster than transcription), is scaled
+by the source video's length, and backs off geometrically while the status
+stays the same.
+"""
+
+from typing import Optional
+
+from .config import env_float
+
+# Typical seconds between meaningful changes for each status
+STATUS_BASE_INTERVALS = {
+    "queued": 10.0,
+    "uploading": 10.0,
+    "processing": 15.0,
+    "transcribing": 15.0,
+    "exporting": 8.0,
+}
+DEFAULT_BASE_INTERVAL = 10.0
+
+# Video length (seconds) for which the base intervals are tuned
+REFERENCE_VIDEO_SECONDS = 300.0
+
+
+class AdaptivePollSchedule:
+    """
+    Args:
+        min_interval: Floor for any single wait
+        max_interval: Ceiling for any single wait
+        growth: Multiplier applied while the status is unchanged
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 3.0,
+        max_interval: float = 60.0,
+        growth: float = 1.5
+    ) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.growth = growth
+        self._status: Optional[str] = None
+        self._interval = 0.0
+
+    @classmethod
+    def from_env(cls) -> "AdaptivePollSchedule":
+        return cls(
+            min_interval=env_float("SUBMAGIC_POLL_MIN_INTERVAL", 3.0),
+            max_interval=env_float("SUBMAGIC_POLL_MAX_INTERVAL", 60.0),
+        )
+
+    def base_interval(self, status: str, video_duration: Optional[float] = None) -> float:
+        base = STATUS_BASE_INTERVALS.get(status, DEFAULT_BASE_INTERVAL)
+        if video_duration:
+            # Long sources take proportionally longer; clamp so short clips stay snappy
+            scale = min(max(video_duration / REFERENCE_VIDEO_SECONDS, 0.5), 4.0)
+            base *= scale
+        return base
+
+    def next_interval(self, status: str, video_duration: Optional[float] = None) -> float:
+        """Seconds to wait before the next poll, given the status just observed"""
+        if status != self._status:
+            self._status = status
+            self._interval = self.base_interval(status, video_duration)
+        else:
+            self._interval *= self.growth
+        self._interval = min(max(self._interval, self.min_interval), self.max_interval)
+        return self._interval
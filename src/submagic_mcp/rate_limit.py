@@ -0,0 +1,265 @@
+"""
+Client-side rate limiting for Submagic's quota classes
+
+Submagic meters requests in three independent hourly quotas. Each class gets
+its own token bucket so a burst of project creations cannot starve catalog
+lookups, and calls that would certainly be rejected with 429 are queued or
+refused locally instead of spending quota.
+"""
+
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+
+from .config import env_float, env_int, env_str
+
+LIGHTWEIGHT = "lightweight"
+STANDARD = "standard"
+UPLOAD = "upload"
+
+QUOTA_CLASSES = (LIGHTWEIGHT, STANDARD, UPLOAD)
+
+DEFAULT_HOURLY_LIMITS = {
+    LIGHTWEIGHT: 1000,
+    STANDARD: 500,
+    UPLOAD: 500,
+}
+
+POLICY_QUEUE = "queue"
+POLICY_FAIL_FAST = "fail_fast"
+
+_LIGHTWEIGHT_ENDPOINTS = {"languages", "templates"}
+
+
+def classify_endpoint(method: str, endpoint: str) -> str:
+    """
+    Map an API call to its quota class.
+
+    languages/templates are lightweight, projects/upload is an upload, and
+    everything else (create, get, update, export, magic-clips) is standard.
+    """
+    path = endpoint.strip("/").split("?", 1)[0]
+    if path in _LIGHTWEIGHT_ENDPOINTS:
+        return LIGHTWEIGHT
+    if path == "projects/upload":
+        return UPLOAD
+    return STANDARD
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call cannot get a token within the configured wait budget"""
+
+    def __init__(self, quota: str, retry_after: float) -> None:
+        self.quota = quota
+        self.retry_after = retry_after
+        super().__init__(
+            f"Local {quota} rate limit budget exhausted; retry in {retry_after:.0f}s"
+        )
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at hourly_limit / 3600 tokens per second.
+
+    The bucket starts full (an hour's worth of burst, matching the server's
+    hourly window) and can be drained or paused when the server reports that
+    the real budget is lower than ours.
+    """
+
+    def __init__(self, quota: str, hourly_limit: int) -> None:
+        self.quota = quota
+        self.capacity = float(max(hourly_limit, 1))
+        self.rate = self.capacity / 3600.0
+        self.tokens = self.capacity
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self._updated = now
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """Seconds until one token is available"""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        wait = max(self.blocked_until - now, 0.0)
+        if self.tokens < 1.0:
+            wait = max(wait, (1.0 - self.tokens) / self.rate)
+        return wait
+
+    def available(self, now: Optional[float] = None) -> float:
+        """Tokens that could be spent right now (none while paused after a 429)"""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.blocked_until > now:
+            return 0.0
+        return max(self.tokens, 0.0)
+
+    async def acquire(self, max_wait: float) -> None:
+        """Take one token, sleeping up to max_wait seconds; raises RateLimitExceeded otherwise"""
+        # The lock keeps waiters FIFO so a queued call cannot be overtaken
+        async with self._lock:
+            wait = self.delay()
+            if wait > max_wait:
+                raise RateLimitExceeded(self.quota, wait)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                self._refill(time.monotonic())
+            self.tokens -= 1.0
+
+    def sync(self, remaining: Optional[float] = None, retry_after: Optional[float] = None) -> None:
+        """Resynchronise with budget information reported by the server"""
+        now = time.monotonic()
+        self._refill(now)
+        if remaining is not None:
+            self.tokens = min(self.tokens, max(remaining, 0.0))
+        if retry_after is not None:
+            self.tokens = min(self.tokens, 0.0)
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+
+class RateLimiter:
+    """
+    One token bucket per quota class.
+
+    Args:
+        limits: Hourly request limit per quota class
+        policy: "queue" waits for a token (up to max_wait seconds),
+            "fail_fast" refuses immediately when no token is available
+        max_wait: Longest a queued call may wait before it is refused
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Mapping[str, int]] = None,
+        policy: str = POLICY_QUEUE,
+        max_wait: float = 30.0
+    ) -> None:
+        limits = dict(DEFAULT_HOURLY_LIMITS, **(limits or {}))
+        self.limits = limits
+        self.policy = policy
+        self.max_wait = max_wait
+        self.buckets = {quota: TokenBucket(quota, limit) for quota, limit in limits.items()}
+        self.throttled = {quota: 0 for quota in limits}
+        self.rejected = {quota: 0 for quota in limits}
+        self.upstream_429 = {quota: 0 for quota in limits}
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        """Build a limiter from SUBMAGIC_RATE_LIMIT_* environment variables"""
+        policy = env_str("SUBMAGIC_RATE_LIMIT_POLICY", POLICY_QUEUE)
+        if policy not in (POLICY_QUEUE, POLICY_FAIL_FAST):
+            policy = POLICY_QUEUE
+        return cls(
+            limits={
+                quota: env_int(f"SUBMAGIC_RATE_LIMIT_{quota.upper()}", DEFAULT_HOURLY_LIMITS[quota])
+                for quota in QUOTA_CLASSES
+            },
+            policy=policy,
+            max_wait=env_float("SUBMAGIC_RATE_LIMIT_MAX_WAIT", 30.0),
+        )
+
+    async def acquire(self, quota: str) -> None:
+        """Reserve one request in quota, honouring the queue/fail-fast policy"""
+        bucket = self.buckets[quota]
+        max_wait = 0.0 if self.policy == POLICY_FAIL_FAST else self.max_wait
+        if bucket.delay() > 0:
+            self.throttled[quota] += 1
+        try:
+            await bucket.acquire(max_wait)
+        except RateLimitExceeded:
+            self.rejected[quota] += 1
+            raise
+
+    def observe(
+        self,
+        quota: str,
+        status_code: int,
+        headers: Mapping[str, str],
+        retry_after_hint: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        Feed a response back into the limiter.
+
+        Reads X-RateLimit-Remaining / RateLimit-Remaining to shrink our local
+        budget and, on 429, pauses the class for Retry-After seconds (falling
+        back to X-RateLimit-Reset, then retry_after_hint from the error body).
+        Returns the pause in seconds when one applies.
+        """
+        remaining = None
+        for name in ("x-ratelimit-remaining", "ratelimit-remaining"):
+            if name in headers:
+                try:
+                    remaining = float(headers[name])
+                except ValueError:
+                    pass
+                break
+
+        retry_after = None
+        if status_code == 429:
+            self.upstream_429[quota] += 1
+            retry_after = parse_retry_after(headers.get("retry-after"))
+            if retry_after is None:
+                retry_after = _reset_delay(headers)
+            if retry_after is None:
+                retry_after = retry_after_hint
+            if retry_after is None:
+                retry_after = 60.0
+
+        self.buckets[quota].sync(remaining=remaining, retry_after=retry_after)
+        return retry_after
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "policy": self.policy,
+            "classes": {
+                quota: {
+                    "hourly_limit": self.limits[quota],
+                    "tokens": round(bucket.tokens, 2),
+                    "wait_seconds": round(bucket.delay(now), 2),
+                    "throttled": self.throttled[quota],
+                    "rejected": self.rejected[quota],
+                    "upstream_429": self.upstream_429[quota],
+                }
+                for quota, bucket in self.buckets.items()
+            },
+        }
+
+
+def _reset_delay(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds until the window resets, from X-RateLimit-Reset (epoch or delta)"""
+    for name in ("x-ratelimit-reset", "ratelimit-reset"):
+        if name not in headers:
+            continue
+        try:
+            value = float(headers[name])
+        except ValueError:
+            return None
+        # Values larger than a day are epoch timestamps, smaller ones are deltas
+        if value > 86400:
+            value -= time.time()
+        return max(value, 0.0)
+    return None
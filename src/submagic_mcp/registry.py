@@ -0,0 +1,159 @@
+"""
+Local project registry backed by SQLite
+
+Remembers every project and magic clips job created through this server, the
+parameters it was created with, its last-known status and its output URLs, so
+"what's still processing?" can be answered without an API call.
+"""
+
+import json
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+from .events import TERMINAL_STATUSES
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    title TEXT,
+    status TEXT,
+    params TEXT,
+    download_url TEXT,
+    direct_url TEXT,
+    preview_url TEXT,
+    clips TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_projects_status ON projects (status);
+CREATE INDEX IF NOT EXISTS idx_projects_created_at ON projects (created_at);
+"""
+
+KIND_PROJECT = "project"
+KIND_UPLOAD = "upload"
+KIND_MAGIC_CLIPS = "magic_clips"
+
+ACTIVE = "active"
+
+
+class ProjectRegistry:
+    """
+    Args:
+        path: SQLite database file (":memory:" for an in-memory registry)
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def record_created(
+        self,
+        project_id: str,
+        kind: str,
+        title: Optional[str],
+        params: Dict[str, Any],
+        status: Optional[str] = None
+    ) -> None:
+        """Insert a newly created project together with its creation parameters"""
+        now = time.time()
+        self._conn.execute(
+            """
+            INSERT INTO projects (id, kind, title, status, params, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                kind = excluded.kind,
+                title = COALESCE(excluded.title, projects.title),
+                status = COALESCE(excluded.status, projects.status),
+                params = excluded.params,
+                updated_at = excluded.updated_at
+            """,
+            (project_id, kind, title, status, json.dumps(params), now, now),
+        )
+
+    def update_status(self, event: Dict[str, Any]) -> None:
+        """Upsert status and output URLs from a project object or webhook payload"""
+        project_id = event.get("projectId") or event.get("id")
+        if not project_id:
+            return
+        now = time.time()
+        clips = event.get("magicClips")
+        self._conn.execute(
+            """
+            INSERT INTO projects
+                (id, kind, title, status, download_url, direct_url, preview_url, clips, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                title = COALESCE(excluded.title, projects.title),
+                status = COALESCE(excluded.status, projects.status),
+                download_url = COALESCE(excluded.download_url, projects.download_url),
+                direct_url = COALESCE(excluded.direct_url, projects.direct_url),
+                preview_url = COALESCE(excluded.preview_url, projects.preview_url),
+                clips = COALESCE(excluded.clips, projects.clips),
+                updated_at = excluded.updated_at
+            """,
+            (
+                project_id,
+                KIND_MAGIC_CLIPS if clips else KIND_PROJECT,
+                event.get("title"),
+                event.get("status"),
+                event.get("downloadUrl"),
+                event.get("directUrl"),
+                event.get("previewUrl"),
+                json.dumps(clips) if clips else None,
+                now,
+                now,
+            ),
+        )
+
+    def get(self, project_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT * FROM projects WHERE id = ?", (project_id,)).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Most recently created projects first.
+
+        status filters on an exact status, or "active" for anything that has
+        not reached completed/failed yet.
+        """
+        if status == ACTIVE:
+            placeholders = ", ".join("?" for _ in TERMINAL_STATUSES)
+            rows = self._conn.execute(
+                f"SELECT * FROM projects WHERE status IS NULL OR status NOT IN ({placeholders}) "
+                "ORDER BY created_at DESC LIMIT ?",
+                (*sorted(TERMINAL_STATUSES), limit),
+            )
+        elif status:
+            rows = self._conn.execute(
+                "SELECT * FROM projects WHERE status = ? ORDER BY created_at DESC LIMIT ?",
+                (status, limit),
+            )
+        else:
+            rows = self._conn.execute(
+                "SELECT * FROM projects ORDER BY created_at DESC LIMIT ?", (limit,)
+            )
+        return [_row_to_dict(row) for row in rows]
+
+    def status_counts(self) -> Dict[str, int]:
+        rows = self._conn.execute(
+            "SELECT COALESCE(status, 'unknown') AS status, COUNT(*) AS n FROM projects GROUP BY 1"
+        )
+        return {row["status"]: row["n"] for row in rows}
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    data = dict(row)
+    for key in ("params", "clips"):
+        if data.get(key):
+            data[key] = json.loads(data[key])
+    return data
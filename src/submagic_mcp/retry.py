@@ -0,0 +1,97 @@
+"""
+Retry policy for Submagic API requests
+
+Exponential backoff with full jitter, bounded by a per-request deadline.
+Idempotent methods retry on transient failures; POSTs that create resources
+(projects, magic clips, exports) only retry when the request provably never
+reached the server, so a retry can never create a duplicate project.
+"""
+
+import random
+import time
+from dataclasses import dataclass, field
+from typing import FrozenSet, Optional
+
+import httpx
+
+from .config import env_float, env_int
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Failures raised before any bytes of the request were sent
+PRE_SEND_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# Failures where the request may or may not have been processed
+TRANSIENT_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+
+
+def is_idempotent(method: str) -> bool:
+    return method.upper() in IDEMPOTENT_METHODS
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Args:
+        max_attempts: Total attempts including the first one
+        base_delay: Backoff base in seconds (attempt n sleeps up to base * 2**n)
+        max_delay: Cap on a single backoff sleep
+        deadline: Total seconds a request may spend across all attempts and sleeps
+        retry_statuses: Response codes worth retrying for idempotent requests
+    """
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 20.0
+    deadline: float = 150.0
+    retry_statuses: FrozenSet[int] = field(
+        default_factory=lambda: frozenset({429, 500, 502, 503, 504})
+    )
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        """Build a policy from SUBMAGIC_RETRY_* environment variables"""
+        return cls(
+            max_attempts=max(env_int("SUBMAGIC_RETRY_MAX_ATTEMPTS", cls.max_attempts), 1),
+            base_delay=env_float("SUBMAGIC_RETRY_BASE_DELAY", cls.base_delay),
+            max_delay=env_float("SUBMAGIC_RETRY_MAX_DELAY", cls.max_delay),
+            deadline=env_float("SUBMAGIC_RETRY_DEADLINE", cls.deadline),
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter backoff for the given (1-based) attempt that just failed"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def should_retry_status(self, method: str, endpoint: str, status_code: int) -> bool:
+        if status_code not in self.retry_statuses:
+            return False
+        # A 429 is rejected before any work is done, so even creates can retry it
+        return status_code == 429 or is_idempotent(method)
+
+    def should_retry_error(self, method: str, endpoint: str, error: Exception) -> bool:
+        if isinstance(error, PRE_SEND_ERRORS):
+            return True
+        return is_idempotent(method) and isinstance(error, TRANSIENT_ERRORS)
+
+
+class RetryState:
+    """Tracks attempts and the deadline for one logical request"""
+
+    def __init__(self, policy: RetryPolicy) -> None:
+        self.policy = policy
+        self.attempt = 0
+        self.deadline_at = time.monotonic() + policy.deadline
+
+    def next_delay(self, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Seconds to sleep before the next attempt, or None to give up.
+
+        Retry-After, when present, replaces the jittered backoff. Gives up once
+        attempts are exhausted or the sleep would overrun the deadline.
+        """
+        if self.attempt >= self.policy.max_attempts:
+            return None
+        delay = retry_after if retry_after is not None else self.policy.backoff(self.attempt)
+        if time.monotonic() + delay >= self.deadline_at:
+            return None
+        return delay
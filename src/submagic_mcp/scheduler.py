@@ -0,0 +1,252 @@
+"""
+Priority scheduler for outgoing API requests
+
+Every request attempt is queued here and executed by a fixed pool of worker
+tasks. Jobs wait in per-priority lanes (interactive ahead of batch, with batch
+still guaranteed a share of dispatches) and, within a lane, tenants are served
+round-robin so one busy tenant cannot starve the others. The queue is bounded:
+when it is full, submitters wait for room instead of having work dropped.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional
+
+from .config import env_bool, env_int
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+# Out of every five dispatches while both lanes are waiting, four go to interactive
+DEFAULT_WEIGHTS = {INTERACTIVE: 4, BATCH: 1}
+
+DEFAULT_TENANT = "default"
+
+# Window over which the dispatch rate is reported
+RATE_WINDOW = 60.0
+
+current_lane: "ContextVar[str]" = ContextVar("submagic_lane", default=INTERACTIVE)
+current_tenant: "ContextVar[str]" = ContextVar("submagic_tenant", default=DEFAULT_TENANT)
+
+
+@contextmanager
+def lane(name: str) -> Iterator[None]:
+    """Route requests made inside the block (and tasks started from it) to lane name"""
+    token = current_lane.set(name)
+    try:
+        yield
+    finally:
+        current_lane.reset(token)
+
+
+class Job:
+    __slots__ = ("fn", "lane", "tenant", "future", "enqueued_at")
+
+    def __init__(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        lane: str,
+        tenant: str,
+        future: "asyncio.Future[Any]"
+    ) -> None:
+        self.fn = fn
+        self.lane = lane
+        self.tenant = tenant
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class LaneStats:
+    __slots__ = ("submitted", "dispatched", "wait_total", "wait_max")
+
+    def __init__(self) -> None:
+        self.submitted = 0
+        self.dispatched = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class RequestScheduler:
+    """
+    Args:
+        workers: Requests executed concurrently
+        max_queue: Jobs allowed to wait; further submitters block until there is room
+        weights: Relative dispatch share per lane while several lanes have work
+        enabled: When False, run() executes jobs directly without queueing
+    """
+
+    def __init__(
+        self,
+        workers: int = 8,
+        max_queue: int = 1000,
+        weights: Optional[Dict[str, int]] = None,
+        enabled: bool = True
+    ) -> None:
+        self.workers = max(workers, 1)
+        self.max_queue = max(max_queue, 1)
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self.enabled = enabled
+        # Dispatch order, e.g. [interactive x4, batch x1]; a lane with no work is skipped
+        self._cycle: List[str] = [name for name, weight in self.weights.items() for _ in range(max(weight, 1))]
+        self._cycle_pos = 0
+        self._lanes: Dict[str, "OrderedDict[str, Deque[Job]]"] = {name: OrderedDict() for name in self.weights}
+        self._depth = 0
+        self._running = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._cond: Optional[asyncio.Condition] = None
+        self._tasks: List["asyncio.Task[None]"] = []
+        self._dispatch_times: Deque[float] = deque()
+        self.stats = {name: LaneStats() for name in self.weights}
+        self.backpressure_waits = 0
+
+    @classmethod
+    def from_env(cls) -> "RequestScheduler":
+        return cls(
+            workers=env_int("SUBMAGIC_SCHEDULER_WORKERS", 8),
+            max_queue=env_int("SUBMAGIC_SCHEDULER_QUEUE_SIZE", 1000),
+            weights={
+                INTERACTIVE: env_int("SUBMAGIC_SCHEDULER_INTERACTIVE_WEIGHT", DEFAULT_WEIGHTS[INTERACTIVE]),
+                BATCH: env_int("SUBMAGIC_SCHEDULER_BATCH_WEIGHT", DEFAULT_WEIGHTS[BATCH]),
+            },
+            enabled=env_bool("SUBMAGIC_SCHEDULER", True),
+        )
+
+    def _ensure_started(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._cond is None:
+            # First use, or a new event loop (e.g. between test runs): start fresh workers
+            self._loop = loop
+            self._cond = asyncio.Condition()
+            self._lanes = {name: OrderedDict() for name in self.weights}
+            self._depth = 0
+            self._running = 0
+            self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        return self._cond
+
+    async def run(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        lane: Optional[str] = None,
+        tenant: Optional[str] = None
+    ) -> Any:
+        """Queue fn() and return its result (or raise its exception) once a worker ran it"""
+        if not self.enabled:
+            return await fn()
+        cond = self._ensure_started()
+        lane = lane if lane in self._lanes else current_lane.get()
+        if lane not in self._lanes:
+            lane = INTERACTIVE if INTERACTIVE in self._lanes else next(iter(self._lanes))
+        tenant = tenant or current_tenant.get()
+
+        job = Job(fn, lane, tenant, asyncio.get_running_loop().create_future())
+        async with cond:
+            if self._depth >= self.max_queue:
+                self.backpressure_waits += 1
+                await cond.wait_for(lambda: self._depth < self.max_queue)
+            self._lanes[lane].setdefault(tenant, deque()).append(job)
+            self._depth += 1
+            self.stats[lane].submitted += 1
+            cond.notify_all()
+        return await job.future
+
+    def _next_job(self) -> Job:
+        """Pick by weighted lane cycle, then round-robin across the lane's tenants"""
+        for _ in range(len(self._cycle)):
+            name = self._cycle[self._cycle_pos]
+            self._cycle_pos = (self._cycle_pos + 1) % len(self._cycle)
+            tenants = self._lanes[name]
+            if not tenants:
+                continue
+            tenant, jobs = next(iter(tenants.items()))
+            job = jobs.popleft()
+            del tenants[tenant]
+            if jobs:
+                tenants[tenant] = jobs
+            self._depth -= 1
+            return job
+        raise LookupError("no queued jobs")
+
+    async def _worker(self) -> None:
+        cond = self._cond
+        assert cond is not None
+        while True:
+            async with cond:
+                await cond.wait_for(lambda: self._depth > 0)
+                job = self._next_job()
+                cond.notify_all()
+            if job.future.done():
+                # Submitter was cancelled while queued
+                continue
+
+            now = time.monotonic()
+            waited = now - job.enqueued_at
+            stats = self.stats[job.lane]
+            stats.dispatched += 1
+            stats.wait_total += waited
+            stats.wait_max = max(stats.wait_max, waited)
+            self._dispatch_times.append(now)
+
+            self._running += 1
+            try:
+                result = await job.fn()
+            except asyncio.CancelledError:
+                if not job.future.done():
+                    job.future.cancel()
+                raise
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                self._running -= 1
+
+    async def aclose(self) -> None:
+        """Stop the workers; jobs still queued are cancelled"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for tenants in self._lanes.values():
+            for jobs in tenants.values():
+                for job in jobs:
+                    if not job.future.done():
+                        job.future.cancel()
+            tenants.clear()
+        self._depth = 0
+        self._cond = None
+        self._loop = None
+
+    def dispatch_rate(self) -> float:
+        """Dispatches per second over the last RATE_WINDOW seconds"""
+        cutoff = time.monotonic() - RATE_WINDOW
+        while self._dispatch_times and self._dispatch_times[0] < cutoff:
+            self._dispatch_times.popleft()
+        return len(self._dispatch_times) / RATE_WINDOW
+
+    def snapshot(self) -> Dict[str, Any]:
+        lanes = {}
+        for name, stats in self.stats.items():
+            lanes[name] = {
+                "queued": sum(len(jobs) for jobs in self._lanes[name].values()),
+                "tenants_waiting": len(self._lanes[name]),
+                "submitted": stats.submitted,
+                "dispatched": stats.dispatched,
+                "avg_wait": round(stats.wait_total / stats.dispatched, 4) if stats.dispatched else 0.0,
+                "max_wait": round(stats.wait_max, 4),
+            }
+        return {
+            "enabled": self.enabled,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queued": self._depth,
+            "running": self._running,
+            "dispatch_rate": round(self.dispatch_rate(), 4),
+            "backpressure_waits": self.backpressure_waits,
+            "lanes": lanes,
+        }
@@ -0,0 +1,75 @@
+"""
+Single-flight request coalescing
+
+Concurrent callers asking for the same key share one in-flight coroutine and
+its result instead of each starting their own upstream request.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls by key.
+
+    The first caller for a key starts the work as a task; callers arriving while
+    it is still running await the same task. The task is shielded, so a caller
+    that gets cancelled does not cancel the work for everyone else.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        # Callers still waiting on each task
+        self._callers: Dict["asyncio.Task[Any]", int] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def inflight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        copy: Optional[Callable[[Any], Any]] = None
+    ) -> Any:
+        """
+        Run fn() for key, or join the call already running for it
+
+        With copy, callers that shared a result each get copy(result) except
+        the last one to resume, which gets the original; a call nobody joined
+        is never copied.
+        """
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._forget(k, _t))
+        else:
+            self.coalesced += 1
+        self._callers[task] = self._callers.get(task, 0) + 1
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            others = self._callers.pop(task) - 1
+            if others:
+                self._callers[task] = others
+        if copy is not None and others:
+            return copy(result)
+        return result
+
+    def _forget(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so an unawaited failure is not logged as "never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
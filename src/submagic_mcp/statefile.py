@@ -0,0 +1,73 @@
+"""
+Helpers for small JSON state files shared by several server processes
+
+Every stdio session is its own process, and they all share the state
+directory. Writers take an exclusive lock on "<file>.lock", re-read the file,
+merge their change and replace it atomically, so concurrent processes never
+overwrite each other's entries.
+"""
+
+import json
+import os
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Tuple
+
+# (inode, mtime_ns, size): every write replaces the file, so the inode changes
+# even when two writes land within one mtime tick
+FileVersion = Tuple[int, int, int]
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are still atomic, just not merged under a lock
+    fcntl = None  # type: ignore[assignment]
+
+
+@contextmanager
+def locked(path: Optional[str]) -> Iterator[None]:
+    """Hold an exclusive lock for path (a no-op without a path or fcntl)"""
+    if not path or fcntl is None:
+        yield
+        return
+    try:
+        lock = open(f"{path}.lock", "a")
+    except OSError:
+        yield
+        return
+    with lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def read_json(path: str) -> Any:
+    """Parsed contents of path, or None when it is missing or not JSON"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path: str, data: Any) -> Optional[FileVersion]:
+    """Atomically replace path with data; returns the new file_version, or None on failure"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        return None
+    return file_version(path)
+
+
+def file_version(path: Optional[str]) -> Optional[FileVersion]:
+    """Changes whenever path is rewritten; None when it does not exist"""
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,316 @@
+"""
+Opt-in tracing spans for tool calls and API requests
+
+Spans use W3C trace/span IDs and are exported as OTLP-style JSON records, so
+they can be loaded into OpenTelemetry tooling. Exporting works without any
+collector: SUBMAGIC_TRACING=console writes one line per span to stderr (stdout
+carries the MCP stdio protocol), and SUBMAGIC_TRACING=json appends records to
+SUBMAGIC_TRACE_FILE. Any object with export(span) and shutdown() can be
+plugged in with tracer.configure(). With tracing off, span() does no work
+beyond a single check.
+"""
+
+import json
+import os
+import random
+import sys
+import time
+import traceback
+from contextvars import ContextVar, Token
+from typing import IO, Any, Dict, List, Optional
+
+from .config import env_float, env_str, state_dir
+
+SERVICE_NAME = "submagic-mcp"
+
+STATUS_UNSET = "UNSET"
+STATUS_OK = "OK"
+STATUS_ERROR = "ERROR"
+
+# httpcore trace events recorded on the active span (connection setup and request phases)
+HTTP_EVENTS = frozenset({
+    "connection.connect_tcp.started",
+    "connection.connect_tcp.complete",
+    "connection.start_tls.complete",
+    "http11.send_request_headers.started",
+    "http2.send_request_headers.started",
+    "http11.receive_response_headers.complete",
+    "http2.receive_response_headers.complete",
+})
+
+
+class Span:
+    """
+    One timed operation.
+
+    Args:
+        name: Operation name, e.g. "tool submagic_get_project"
+        trace_id: 32 hex chars shared by every span of one tool call
+        parent_id: span_id of the enclosing span, None for a root span
+        attributes: Initial key/value attributes
+    """
+
+    recording = True
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None
+    ) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Dict[str, Any]] = []
+        self.status = STATUS_UNSET
+        self.status_message: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self._started = time.perf_counter()
+        self.duration = 0.0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        self.events.append({"name": name, "timeUnixNano": time.time_ns(), "attributes": attributes or {}})
+
+    def set_status(self, status: str, message: Optional[str] = None) -> None:
+        self.status = status
+        self.status_message = message
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.add_event("exception", {
+            "exception.type": type(exc).__name__,
+            "exception.message": str(exc),
+            "exception.stacktrace": "".join(traceback.format_exception(type(exc), exc, exc.__traceback__)),
+        })
+        self.set_status(STATUS_ERROR, str(exc) or type(exc).__name__)
+
+    def end(self) -> None:
+        self.duration = time.perf_counter() - self._started
+        self.end_ns = self.start_ns + int(self.duration * 1e9)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round(self.duration * 1000, 3),
+            "status": {"code": self.status, "message": self.status_message or ""},
+            "attributes": self.attributes,
+            "events": self.events,
+            "resource": {"service.name": SERVICE_NAME},
+        }
+
+
+class _NoopSpan(Span):
+    """Stands in for spans that are not recorded (tracing off or trace not sampled)"""
+
+    recording = False
+
+    def __init__(self) -> None:
+        self.name = ""
+        self.trace_id = ""
+        self.span_id = ""
+        self.parent_id = None
+        self.attributes = {}
+        self.events = []
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    def set_status(self, status: str, message: Optional[str] = None) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+current_span: "ContextVar[Optional[Span]]" = ContextVar("submagic_span", default=None)
+
+_CURRENT = object()
+
+
+class SpanExporter:
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class ConsoleSpanExporter(SpanExporter):
+    """One human-readable line per span"""
+
+    def __init__(self, stream: Optional[IO[str]] = None) -> None:
+        self.stream = stream or sys.stderr
+
+    def export(self, span: Span) -> None:
+        attributes = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+        self.stream.write(
+            f"[trace {span.trace_id[:8]}] {span.name} {span.duration * 1000:.1f}ms "
+            f"status={span.status} {attributes}\n"
+        )
+        self.stream.flush()
+
+
+class JsonFileSpanExporter(SpanExporter):
+    """Appends one JSON record per span (JSON Lines) to path"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file: Optional[IO[str]] = None
+
+    def export(self, span: Span) -> None:
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(span.to_dict(), default=str) + "\n")
+        self._file.flush()
+
+    def shutdown(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _SpanScope:
+    """Context manager that makes a span current and exports it on exit"""
+
+    __slots__ = ("tracer", "span", "token")
+
+    def __init__(self, tracer: "Tracer", span: Span) -> None:
+        self.tracer = tracer
+        self.span = span
+        self.token: Optional[Token] = None
+
+    def __enter__(self) -> Span:
+        self.token = current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type: Any, exc: Optional[BaseException], tb: Any) -> None:
+        if self.token is not None:
+            current_span.reset(self.token)
+        span = self.span
+        if not span.recording:
+            return
+        if exc is not None:
+            span.record_exception(exc)
+        elif span.status == STATUS_UNSET:
+            span.set_status(STATUS_OK)
+        span.end()
+        self.tracer.export(span)
+
+
+class _Disabled:
+    """Shared no-op scope used while tracing is off"""
+
+    def __enter__(self) -> Span:
+        return NOOP_SPAN
+
+    def __exit__(self, exc_type: Any, exc: Optional[BaseException], tb: Any) -> None:
+        pass
+
+
+_DISABLED = _Disabled()
+
+
+class Tracer:
+    """
+    Args:
+        exporter: Where finished spans go; None disables tracing
+        sample_rate: Fraction of root spans (tool calls) that are recorded,
+            together with everything beneath them
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter] = None, sample_rate: float = 1.0) -> None:
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.exported = 0
+        self.export_errors = 0
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        mode = (env_str("SUBMAGIC_TRACING") or "").lower()
+        exporter: Optional[SpanExporter] = None
+        if mode == "console":
+            exporter = ConsoleSpanExporter()
+        elif mode == "json":
+            exporter = JsonFileSpanExporter(
+                env_str("SUBMAGIC_TRACE_FILE") or os.path.join(state_dir(), "traces.jsonl")
+            )
+        return cls(exporter, sample_rate=env_float("SUBMAGIC_TRACE_SAMPLE_RATE", 1.0))
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def configure(self, exporter: Optional[SpanExporter], sample_rate: float = 1.0) -> None:
+        """Swap the exporter (None turns tracing off)"""
+        if self.exporter is not None and self.exporter is not exporter:
+            self.exporter.shutdown()
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def span(self, name: str, parent: Any = _CURRENT, **attributes: Any) -> Any:
+        """
+        Context manager for a child of the current span (or of parent).
+
+        A span with no parent starts a new trace, which is sampled at
+        sample_rate; unsampled traces record nothing below them either.
+        """
+        if self.exporter is None:
+            return _DISABLED
+        if parent is _CURRENT:
+            parent = current_span.get()
+        if parent is None:
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return _SpanScope(self, NOOP_SPAN)
+            span = Span(name, f"{random.getrandbits(128):032x}", None, attributes)
+        elif not parent.recording:
+            return _SpanScope(self, NOOP_SPAN)
+        else:
+            span = Span(name, parent.trace_id, parent.span_id, attributes)
+        return _SpanScope(self, span)
+
+    def export(self, span: Span) -> None:
+        if self.exporter is None:
+            return
+        try:
+            self.exporter.export(span)
+            self.exported += 1
+        except Exception:
+            # Tracing must never break a tool call
+            self.export_errors += 1
+
+    def shutdown(self) -> None:
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+tracer = Tracer.from_env()
+
+
+def record_http_event(event_name: str) -> None:
+    """httpcore trace hook: note connection and request phases on the active span"""
+    if tracer.exporter is None or event_name not in HTTP_EVENTS:
+        return
+    span = current_span.get()
+    if span is not None:
+        span.add_event(event_name)
@@ -0,0 +1,240 @@
+"""
+Incremental parsing of project responses and their "words" transcript
+
+GET /projects/{id} embeds every word, silence and punctuation segment of the
+video, which runs to tens of thousands of entries for long sources. The parser
+here consumes the response body chunk by chunk and hands each segment to a
+callback as soon as it is complete, so the full array is never held in memory;
+everything else in the project object is returned as a normal dict.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+WordCallback = Callable[[Dict[str, Any]], None]
+
+WORDS_KEY = "words"
+
+# Consumed input is dropped from the buffer once it grows past this many characters
+_COMPACT_AT = 64 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+_DELIMITERS = frozenset(",:]} \t\n\r")
+
+_INCOMPLETE = object()
+
+# Parser states
+_START = "start"
+_KEY = "key"
+_COLON = "colon"
+_VALUE = "value"
+_AFTER_VALUE = "after_value"
+_ITEM = "item"
+_AFTER_ITEM = "after_item"
+_DONE = "done"
+
+
+class ProjectStreamParser:
+    """
+    Push parser for a project JSON object.
+
+    Args:
+        on_word: Called with each element of the "words" array, in order
+        array_key: Top-level key whose array is streamed instead of collected
+
+    feed() accepts raw bytes in arbitrarily sized chunks; close() returns the
+    top-level object without the streamed array. Malformed input raises
+    ValueError.
+    """
+
+    def __init__(self, on_word: WordCallback, array_key: str = WORDS_KEY) -> None:
+        self.on_word = on_word
+        self.array_key = array_key
+        self.word_count = 0
+        self._decoder = json.JSONDecoder()
+        self._bytes = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._state = _START
+        self._key: Optional[str] = None
+        self._result: Dict[str, Any] = {}
+
+    def feed(self, data: bytes) -> None:
+        self._buf += self._bytes.decode(data)
+        self._run()
+
+    def close(self) -> Dict[str, Any]:
+        self._buf += self._bytes.decode(b"", final=True)
+        self._eof = True
+        self._run()
+        if self._state != _DONE:
+            raise ValueError("Truncated project JSON")
+        return self._result
+
+    def _run(self) -> None:
+        while self._step():
+            pass
+        if self._pos > _COMPACT_AT:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+
+    def _next_char(self) -> Optional[str]:
+        self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+        if self._pos >= len(self._buf):
+            return None
+        return self._buf[self._pos]
+
+    def _decode(self) -> Any:
+        """Decode one complete JSON value at the cursor, or return _INCOMPLETE"""
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError as e:
+            if self._eof:
+                raise ValueError(f"Invalid project JSON: {e}") from None
+            return _INCOMPLETE
+        # "12" followed by nothing (or by "." or "e") may be a prefix of a longer
+        # number still in flight; only accept a value once its delimiter arrived
+        if not self._eof and (end >= len(self._buf) or self._buf[end] not in _DELIMITERS):
+            return _INCOMPLETE
+        self._pos = end
+        return value
+
+    def _expect(self, char: str, allowed: str) -> None:
+        if char not in allowed:
+            raise ValueError(f"Invalid project JSON: unexpected {char!r} at offset {self._pos}")
+
+    def _step(self) -> bool:
+        """Advance one token; returns False when more input is needed"""
+        if self._state == _DONE:
+            return False
+        char = self._next_char()
+        if char is None:
+            return False
+
+        if self._state == _START:
+            self._expect(char, "{")
+            self._pos += 1
+            self._state = _KEY
+        elif self._state == _KEY:
+            if char == "}" and not self._result and self._key is None:
+                self._pos += 1
+                self._state = _DONE
+                return False
+            self._expect(char, '"')
+            key = self._decode()
+            if key is _INCOMPLETE:
+                return False
+            self._key = key
+            self._state = _COLON
+        elif self._state == _COLON:
+            self._expect(char, ":")
+            self._pos += 1
+            self._state = _VALUE
+        elif self._state == _VALUE:
+            if self._key == self.array_key and char == "[":
+                self._pos += 1
+                self._state = _ITEM
+                return True
+            value = self._decode()
+            if value is _INCOMPLETE:
+                return False
+            self._result[self._key] = value
+            self._state = _AFTER_VALUE
+        elif self._state == _AFTER_VALUE:
+            self._expect(char, ",}")
+            self._pos += 1
+            self._state = _KEY if char == "," else _DONE
+        elif self._state == _ITEM:
+            if char == "]" and self.word_count == 0:
+                self._pos += 1
+                self._state = _AFTER_VALUE
+                return True
+            word = self._decode()
+            if word is _INCOMPLETE:
+                return False
+            self.word_count += 1
+            if isinstance(word, dict):
+                self.on_word(word)
+            self._state = _AFTER_ITEM
+        elif self._state == _AFTER_ITEM:
+            self._expect(char, ",]")
+            self._pos += 1
+            self._state = _ITEM if char == "," else _AFTER_VALUE
+        return True
+
+
+async def parse_project_stream(
+    chunks: AsyncIterator[bytes],
+    on_word: Optional[WordCallback] = None
+) -> Dict[str, Any]:
+    """
+    Parse a streamed project body, feeding transcript segments to on_word.
+
+    The returned project has no "words" key; "wordCount" holds the number of
+    segments that were streamed instead.
+    """
+    parser = ProjectStreamParser(on_word if on_word is not None else (lambda word: None))
+    async for chunk in chunks:
+        parser.feed(chunk)
+    project = parser.close()
+    project["wordCount"] = parser.word_count
+    return project
+
+
+def segment_bounds(word: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """(startTime, endTime) of a segment as floats, or None if it carries no timing"""
+    try:
+        return float(word["startTime"]), float(word["endTime"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class TranscriptWindow:
+    """
+    on_word callback that keeps only one page of a time range.
+
+    Args:
+        start_time: Skip segments ending at or before this (seconds)
+        end_time: Skip segments starting at or after this (seconds)
+        offset: Matching segments to skip before the page starts
+        limit: Maximum segments kept
+
+    Segments outside the page are only counted, so memory stays bounded by
+    limit however long the transcript is.
+    """
+
+    def __init__(
+        self,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+        offset: int = 0,
+        limit: int = 200
+    ) -> None:
+        self.start_time = start_time
+        self.end_time = end_time
+        self.offset = offset
+        self.limit = limit
+        self.segments: List[Dict[str, Any]] = []
+        self.total = 0
+        self.matched = 0
+        self.duration = 0.0
+
+    def __call__(self, word: Dict[str, Any]) -> None:
+        self.total += 1
+        bounds = segment_bounds(word)
+        if bounds is not None:
+            start, end = bounds
+            self.duration = max(self.duration, end)
+            if self.start_time is not None and end <= self.start_time:
+                return
+            if self.end_time is not None and start >= self.end_time:
+                return
+        elif self.start_time is not None or self.end_time is not None:
+            return
+        self.matched += 1
+        if self.offset < self.matched <= self.offset + self.limit:
+            self.segments.append(word)
@@ -0,0 +1,211 @@
+"""
+Time and word indexes over a project's transcript
+
+Built once per project revision from the streamed "words" segments and kept
+in memory, so phrase lookups, silence-gap listings for B-roll placement and
+transcript pages are answered with bisect and dictionary lookups instead of
+rescanning (or refetching) tens of thousands of segments.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .transcript import segment_bounds
+
+_TOKEN = re.compile(r"[\w']+")
+
+SILENCE = "silence"
+PUNCTUATION = "punctuation"
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with punctuation stripped"""
+    return _TOKEN.findall(text.lower())
+
+
+def _contains(sorted_values: List[int], value: int) -> bool:
+    i = bisect_left(sorted_values, value)
+    return i < len(sorted_values) and sorted_values[i] == value
+
+
+class TranscriptIndex:
+    """
+    Interval index plus inverted word index for one transcript.
+
+    Segments are fed in order with add() (it doubles as a streaming on_word
+    callback) and become searchable after finalize(). Segment times are kept
+    in parallel sorted arrays; the running maximum of end times keeps bisect
+    correct even if segments overlap.
+    """
+
+    def __init__(self) -> None:
+        # The project object the segments came with, without its "words"
+        self.project: Dict[str, Any] = {}
+        self.starts: List[float] = []
+        self.ends: List[float] = []
+        self.types: List[str] = []
+        self.texts: List[str] = []
+        # token position -> segment index, and token -> token positions
+        self._token_segments: List[int] = []
+        self._postings: Dict[str, List[int]] = {}
+        self._max_ends: List[float] = []
+        # (duration, start, end) sorted by duration
+        self._gaps: List[Tuple[float, float, float]] = []
+        self._gap_durations: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def duration(self) -> float:
+        return self._max_ends[-1] if self._max_ends else 0.0
+
+    def add(self, word: Dict[str, Any]) -> None:
+        bounds = segment_bounds(word)
+        if bounds is None:
+            return
+        self.starts.append(bounds[0])
+        self.ends.append(bounds[1])
+        self.types.append(str(word.get("type") or "word"))
+        self.texts.append(str(word.get("text") or ""))
+
+    __call__ = add
+
+    def finalize(self) -> "TranscriptIndex":
+        """Sort segments by start time and build the word and gap indexes"""
+        order = sorted(range(len(self.starts)), key=self.starts.__getitem__)
+        if order != list(range(len(order))):
+            self.starts = [self.starts[i] for i in order]
+            self.ends = [self.ends[i] for i in order]
+            self.types = [self.types[i] for i in order]
+            self.texts = [self.texts[i] for i in order]
+
+        running = 0.0
+        self._max_ends = []
+        for end in self.ends:
+            running = max(running, end)
+            self._max_ends.append(running)
+
+        self._token_segments = []
+        self._postings = {}
+        for i, (kind, text) in enumerate(zip(self.types, self.texts)):
+            if kind in (SILENCE, PUNCTUATION):
+                continue
+            for token in tokenize(text):
+                self._postings.setdefault(token, []).append(len(self._token_segments))
+                self._token_segments.append(i)
+
+        self._gaps = []
+        previous_end: Optional[float] = None
+        for start, end, kind in zip(self.starts, self.ends, self.types):
+            if kind == SILENCE:
+                continue
+            # Explicit silence segments and untranscribed time both count as gaps
+            if previous_end is not None and start > previous_end:
+                self._gaps.append((start - previous_end, previous_end, start))
+            previous_end = end if previous_end is None else max(previous_end, end)
+        self._gaps.sort()
+        self._gap_durations = [gap[0] for gap in self._gaps]
+        return self
+
+    def segments_between(self, start: float, end: float) -> range:
+        """Indexes of segments overlapping [start, end)"""
+        first = bisect_right(self._max_ends, start)
+        last = bisect_left(self.starts, end)
+        return range(first, max(first, last))
+
+    def segment(self, i: int) -> Dict[str, Any]:
+        """Segment i in the shape of a "words" entry"""
+        return {"startTime": self.starts[i], "endTime": self.ends[i], "type": self.types[i], "text": self.texts[i]}
+
+    def window(self, start: Optional[float] = None, end: Optional[float] = None) -> List[int]:
+        """Indexes of segments ending after start and starting before end, in time order"""
+        low = float("-inf") if start is None else start
+        return [
+            i for i in self.segments_between(low, float("inf") if end is None else end)
+            if self.ends[i] > low
+        ]
+
+    def text_between(self, start: float, end: float) -> str:
+        return " ".join(
+            self.texts[i] for i in self.segments_between(start, end)
+            if self.types[i] != SILENCE and self.texts[i]
+        )
+
+    def find_phrase(self, phrase: str, limit: Optional[int] = None) -> List[Tuple[float, float]]:
+        """(start, end) of every occurrence of phrase, ignoring case and punctuation"""
+        tokens = tokenize(phrase)
+        if not tokens:
+            return []
+        postings = [self._postings.get(token) for token in tokens]
+        if not all(postings):
+            return []
+
+        # Walk the rarest token's postings and check the others by position
+        anchor = min(range(len(tokens)), key=lambda i: len(postings[i]))
+        others = [(i, postings[i]) for i in range(len(tokens)) if i != anchor]
+        matches: List[Tuple[float, float]] = []
+        for position in postings[anchor]:
+            first = position - anchor
+            if first < 0 or first + len(tokens) > len(self._token_segments):
+                continue
+            if all(_contains(positions, first + i) for i, positions in others):
+                start_segment = self._token_segments[first]
+                end_segment = self._token_segments[first + len(tokens) - 1]
+                matches.append((self.starts[start_segment], self.ends[end_segment]))
+                if limit is not None and len(matches) >= limit:
+                    break
+        return matches
+
+    def silence_gaps(self, min_seconds: float) -> List[Tuple[float, float]]:
+        """(start, end) of gaps between spoken segments longer than min_seconds, in time order"""
+        first = bisect_right(self._gap_durations, min_seconds)
+        return sorted((start, end) for _, start, end in self._gaps[first:])
+
+
+class TranscriptIndexCache:
+    """
+    LRU of built indexes keyed by project ID, each tagged with the project
+    revision (e.g. ETag) it was built from.
+
+    Args:
+        max_entries: Least recently used transcripts are dropped beyond this
+    """
+
+    def __init__(self, max_entries: int = 32) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Optional[str], TranscriptIndex]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, project_id: str, revision: Optional[str] = None) -> Optional[TranscriptIndex]:
+        """The cached index, unless a revision is given and it was built from another one"""
+        entry = self._entries.get(project_id)
+        if entry is None or (revision is not None and entry[0] != revision):
+            self.misses += 1
+            return None
+        self._entries.move_to_end(project_id)
+        self.hits += 1
+        return entry[1]
+
+    def store(self, project_id: str, index: TranscriptIndex, revision: Optional[str] = None) -> None:
+        self._entries[project_id] = (revision, index)
+        self._entries.move_to_end(project_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, project_id: Optional[str] = None) -> None:
+        """Drop one project, or everything when project_id is None"""
+        if project_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(project_id, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
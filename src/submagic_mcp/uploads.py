@@ -0,0 +1,102 @@
+"""
+Streaming multipart/form-data encoder for POST /projects/upload
+
+The file is read from disk in fixed-size chunks (off the event loop) while the
+request is being sent, so memory use stays flat regardless of file size. The
+exact Content-Length is computed up front from the file size, which avoids
+chunked transfer encoding.
+"""
+
+import asyncio
+import os
+import secrets
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+CONTENT_TYPES = {
+    ".mp4": "video/mp4",
+    ".mov": "video/quicktime",
+}
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def _quote(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\r", "").replace("\n", "")
+
+
+class MultipartFileUpload:
+    """
+    Args:
+        path: Local file to upload
+        fields: Plain form fields sent before the file (already string-encoded)
+        file_field: Form field name for the file
+        chunk_size: Bytes read from disk per chunk
+        progress: Optional async callback(bytes_sent, total_bytes) called per chunk
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fields: Dict[str, str],
+        file_field: str = "file",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        progress: Optional[ProgressCallback] = None
+    ) -> None:
+        self.path = path
+        self.fields = fields
+        self.file_field = file_field
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.boundary = secrets.token_hex(16)
+        self.file_size = os.path.getsize(path)
+
+        filename = os.path.basename(path)
+        file_type = CONTENT_TYPES.get(os.path.splitext(filename)[1].lower(), "application/octet-stream")
+        self._preamble = b"".join(
+            self._field_part(name, value) for name, value in fields.items()
+        ) + (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{_quote(file_field)}"; filename="{_quote(filename)}"\r\n'
+            f"Content-Type: {file_type}\r\n\r\n"
+        ).encode("utf-8")
+        self._epilogue = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+
+    def _field_part(self, name: str, value: str) -> bytes:
+        return (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{_quote(name)}"\r\n\r\n'
+            f"{value}\r\n"
+        ).encode("utf-8")
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    @property
+    def content_length(self) -> int:
+        return len(self._preamble) + self.file_size + len(self._epilogue)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
+            "Content-Type": self.content_type,
+            "Content-Length": str(self.content_length),
+        }
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """Yield the encoded body; each call starts a fresh pass over the file"""
+        loop = asyncio.get_running_loop()
+        yield self._preamble
+        sent = 0
+        with open(self.path, "rb") as f:
+            while True:
+                chunk = await loop.run_in_executor(None, f.read, self.chunk_size)
+                if not chunk:
+                    break
+                sent += len(chunk)
+                yield chunk
+                if self.progress is not None:
+                    await self.progress(sent, self.file_size)
+        yield self._epilogue
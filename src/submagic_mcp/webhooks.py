@@ -0,0 +1,201 @@
+"""
+Built-in receiver for Submagic webhook notifications
+
+A small asyncio HTTP listener that accepts the POST Submagic sends when a
+project, export or magic-clips job finishes ({projectId, status, downloadUrl,
+directUrl, ...}) and publishes it on the project event bus.
+
+Enabled by setting SUBMAGIC_WEBHOOK_PORT. Submagic must be able to reach the
+listener, so SUBMAGIC_WEBHOOK_PUBLIC_URL should be the externally visible URL
+(e.g. a reverse proxy or tunnel) that forwards to it.
+
+Listening on anything but a loopback address requires SUBMAGIC_WEBHOOK_TOKEN,
+since a forged event would drive waiters and pipeline runs. Every request
+must arrive within a read timeout and stay under small header and body
+limits, so slow or oversized clients cannot tie the listener up.
+"""
+
+import asyncio
+import hmac
+import ipaddress
+import json
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .config import env_float, env_int, env_str
+from .events import ProjectEventBus
+
+# Webhook payloads are a few hundred bytes of JSON
+MAX_BODY_BYTES = 64 * 1024
+MAX_HEADER_LINE_BYTES = 8 * 1024
+MAX_HEADERS = 100
+DEFAULT_READ_TIMEOUT = 10.0
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+}
+
+
+def is_loopback(host: str) -> bool:
+    """True if host only accepts connections from this machine"""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class WebhookReceiver:
+    """
+    Args:
+        bus: Event bus that receives every accepted payload
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        path: URL path Submagic posts to
+        token: Shared secret expected as ?token=... on the webhook URL;
+            required unless host is a loopback address
+        read_timeout: Seconds a client has to send its whole request
+    """
+
+    def __init__(
+        self,
+        bus: ProjectEventBus,
+        host: str = "127.0.0.1",
+        port: int = 8787,
+        path: str = "/webhook/submagic",
+        token: Optional[str] = None,
+        read_timeout: float = DEFAULT_READ_TIMEOUT
+    ) -> None:
+        self.bus = bus
+        self.host = host
+        self.port = port
+        self.path = path
+        self.token = token
+        self.read_timeout = read_timeout
+        self.received = 0
+        self.rejected = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    async def start(self) -> None:
+        """
+        Raises:
+            ValueError: host is reachable from other machines but no token is set
+        """
+        if not self.token and not is_loopback(self.host):
+            raise ValueError(
+                f"Refusing to receive webhooks on {self.host or 'all interfaces'} without a token; "
+                "set SUBMAGIC_WEBHOOK_TOKEN or bind SUBMAGIC_WEBHOOK_HOST to 127.0.0.1"
+            )
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, limit=MAX_HEADER_LINE_BYTES
+        )
+        sockets = self._server.sockets or []
+        if sockets:
+            self.port = sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            server, self._server = self._server, None
+            server.close()
+            await server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            status, body = await asyncio.wait_for(self._process(reader), self.read_timeout)
+        except asyncio.TimeoutError:
+            status, body = 408, {"error": "request timeout"}
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            # ValueError also covers a header line longer than the stream limit
+            status, body = 400, {"error": "malformed request"}
+        if status != 200:
+            self.rejected += 1
+
+        payload = json.dumps(body).encode()
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        try:
+            writer.write(head.encode() + payload)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _process(self, reader: asyncio.StreamReader) -> Tuple[int, Dict[str, Any]]:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        method, target, _ = request_line.split(" ", 2)
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            if len(headers) >= MAX_HEADERS:
+                return 431, {"error": "too many headers"}
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        url = urlsplit(target)
+        if url.path != self.path:
+            return 404, {"error": "not found"}
+        if method != "POST":
+            return 405, {"error": "method not allowed"}
+        if self.token:
+            given = parse_qs(url.query).get("token", [""])[0]
+            if not hmac.compare_digest(given.encode("utf-8"), self.token.encode("utf-8")):
+                return 401, {"error": "invalid token"}
+
+        length = int(headers.get("content-length", "0"))
+        if length < 0:
+            return 400, {"error": "invalid Content-Length"}
+        if length > MAX_BODY_BYTES:
+            return 413, {"error": "payload too large"}
+        raw = await reader.readexactly(length)
+        try:
+            event = json.loads(raw or b"{}")
+        except ValueError:
+            return 400, {"error": "body must be JSON"}
+        if not isinstance(event, dict) or not self.bus.publish(event):
+            return 400, {"error": "payload has no projectId"}
+
+        self.received += 1
+        return 200, {"received": True}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "listen": f"{self.host}:{self.port}{self.path}",
+            "received": self.received,
+            "rejected": self.rejected,
+        }
+
+
+def receiver_from_env(bus: ProjectEventBus) -> Optional[WebhookReceiver]:
+    """Build a receiver if SUBMAGIC_WEBHOOK_PORT is set, otherwise None"""
+    port = env_str("SUBMAGIC_WEBHOOK_PORT")
+    if port is None:
+        return None
+    return WebhookReceiver(
+        bus,
+        host=env_str("SUBMAGIC_WEBHOOK_HOST", "127.0.0.1"),
+        port=env_int("SUBMAGIC_WEBHOOK_PORT", 8787),
+        path=env_str("SUBMAGIC_WEBHOOK_PATH", "/webhook/submagic"),
+        token=env_str("SUBMAGIC_WEBHOOK_TOKEN"),
+        read_timeout=env_float("SUBMAGIC_WEBHOOK_READ_TIMEOUT", DEFAULT_READ_TIMEOUT),
+    )
@@ -0,0 +1,22 @@
+"""
+Shared fixtures: keep local state (ledgers, registry, pipeline runs) out of the user's home directory
+and start every test with empty project and transcript caches
+"""
+
+import pytest
+
+import submagic_mcp
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(monkeypatch, tmp_path):
+    monkeypatch.setenv("SUBMAGIC_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setattr(submagic_mcp, "_batch_ledger", None)
+    monkeypatch.setattr(submagic_mcp, "_registry", None)
+    monkeypatch.setattr(submagic_mcp, "_run_store", None)
+    monkeypatch.setattr(submagic_mcp, "_key_pool", None)
+    submagic_mcp.project_cache.invalidate()
+    submagic_mcp.transcript_indexes.invalidate()
+    yield
+    submagic_mcp.close_registry()
+    submagic_mcp.close_run_store()
@@ -0,0 +1,154 @@
+"""
+Tests for the batch project tools
+"""
+
+import asyncio
+import json
+
+import httpx
+
+import submagic_mcp
+from submagic_mcp.events import ProjectEventBus
+from submagic_mcp.http_client import build_http_client, set_http_client
+from submagic_mcp.rate_limit import RateLimiter
+from submagic_mcp.retry import RetryPolicy
+
+
+def _call(monkeypatch, handler, coro_factory):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setattr(submagic_mcp, "rate_limiter", RateLimiter())
+    monkeypatch.setattr(submagic_mcp, "retry_policy", RetryPolicy(max_attempts=1))
+    monkeypatch.setattr(submagic_mcp, "event_bus", ProjectEventBus())
+
+    async def run():
+        set_http_client(build_http_client(transport=httpx.MockTransport(handler)))
+        try:
+            return await coro_factory()
+        finally:
+            set_http_client(None)
+
+    return asyncio.run(run())
+
+
+def test_get_project_many_reports_partial_failures(monkeypatch):
+    in_flight = []
+    peak = []
+
+    async def handler(request):
+        in_flight.append(1)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.pop()
+        project_id = request.url.path.rsplit("/", 1)[-1]
+        if project_id == "missing":
+            return httpx.Response(404, json={"message": "Project not found"})
+        return httpx.Response(200, json={"id": project_id, "status": "completed", "title": project_id})
+
+    ids = [f"p{i}" for i in range(12)] + ["missing", "p0"]
+    result = _call(
+        monkeypatch, handler,
+        lambda: submagic_mcp.submagic_get_project_many(ids, max_concurrency=3)
+    )
+    text = result[0].text
+    assert "(13 projects)" in text
+    assert "completed: 12" in text
+    assert "Project not found" in text
+    assert max(peak) <= 3
+
+
+def test_create_projects_batch_is_resumable(monkeypatch):
+    created = []
+    fail_titles = {"Episode 2"}
+
+    def handler(request):
+        data = json.loads(request.read())
+        if data["title"] in fail_titles:
+            return httpx.Response(500, json={"message": "temporary failure"})
+        created.append(data["title"])
+        return httpx.Response(200, json={"id": f"id-{data['title']}", "status": "processing"})
+
+    items = [
+        {"title": "Episode 1", "language": "en", "video_url": "https://example.com/1.mp4"},
+        {"title": "Episode 2", "language": "en", "video_url": "https://example.com/2.mp4"},
+        {"title": "Episode 1", "language": "en", "video_url": "https://example.com/1.mp4"},
+    ]
+
+    first = _call(monkeypatch, handler, lambda: submagic_mcp.create_projects_batch(items))
+    assert [r["status"] for r in first] == ["created", "error", "duplicate"]
+    assert first[2]["project_id"] == "id-Episode 1"
+
+    fail_titles.clear()
+    monkeypatch.setattr(submagic_mcp, "_batch_ledger", None)
+    second = _call(monkeypatch, handler, lambda: submagic_mcp.create_projects_batch(items))
+    assert [r["status"] for r in second] == ["existing", "created", "existing"]
+    assert created == ["Episode 1", "Episode 2"]
+
+
+def test_create_projects_batch_validates_before_submitting(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        return httpx.Response(200, json={"id": "x"})
+
+    items = [
+        {"title": "Good", "language": "en", "video_url": "https://example.com/1.mp4"},
+        {"title": "Bad", "language": "English", "video_url": "https://example.com/2.mp4"},
+    ]
+    result = _call(monkeypatch, handler, lambda: submagic_mcp.submagic_create_projects_batch(items))
+    text = result[0].text
+    assert "invalid: 1" in text
+    assert "not_submitted: 1" in text
+    assert calls == []
+
+
+def test_batch_ledger_expires_merges_and_skips_missing_ids(tmp_path):
+    from submagic_mcp.batch import BatchLedger, request_key
+
+    path = str(tmp_path / "ledger.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"legacy": "None"}, f)
+    first = BatchLedger(path, ttl=60)
+    second = BatchLedger(path, ttl=60)
+    assert first.get("legacy") is None
+
+    first.record("a", "p-a")
+    second.record("b", "p-b")
+    first.record("c", None)
+    assert first.get("b") == "p-b" and second.get("a") == "p-a"
+    assert first.get("c") is None
+    assert len(BatchLedger(path, ttl=60)) == 2
+    assert BatchLedger(path, ttl=0).get("a") is None
+
+    body = {"title": "Episode 1"}
+    assert request_key(body) != request_key(body, "season-2")
+    assert request_key(body, "season-2") == request_key(dict(body), "season-2")
+
+
+def test_create_projects_batch_scopes_ledger_to_batch_id(monkeypatch):
+    created = []
+
+    def handler(request):
+        created.append(json.loads(request.read())["title"])
+        return httpx.Response(200, json={"id": f"id-{len(created)}", "status": "processing"})
+
+    items = [{"title": "Episode 1", "language": "en", "video_url": "https://example.com/1.mp4"}]
+
+    first = _call(monkeypatch, handler, lambda: submagic_mcp.create_projects_batch(items, batch_id="a"))
+    again = _call(monkeypatch, handler, lambda: submagic_mcp.create_projects_batch(items, batch_id="a"))
+    other = _call(monkeypatch, handler, lambda: submagic_mcp.create_projects_batch(items, batch_id="b"))
+
+    assert [first[0]["status"], again[0]["status"], other[0]["status"]] == ["created", "existing", "created"]
+    assert len(created) == 2
+
+
+def test_create_projects_batch_does_not_record_missing_ids(monkeypatch):
+    def handler(request):
+        return httpx.Response(200, json={"status": "processing"})
+
+    items = [{"title": "Episode 1", "language": "en", "video_url": "https://example.com/1.mp4"}]
+    _call(monkeypatch, handler, lambda: submagic_mcp.create_projects_batch(items))
+    second = _call(monkeypatch, handler, lambda: submagic_mcp.create_projects_batch(items))
+
+    assert second[0]["status"] == "created"
+    assert len(submagic_mcp.get_batch_ledger()) == 0
@@ -0,0 +1,87 @@
+"""
+Tests for the catalog TTL cache
+"""
+
+import asyncio
+import time
+
+from submagic_mcp.cache import TTLCache
+
+
+class _Counter:
+    def __init__(self, payload=None, delay=0.0):
+        self.calls = 0
+        self.payload = payload or {"languages": ["en"]}
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return dict(self.payload)
+
+
+def test_fresh_entries_skip_fetch():
+    cache = TTLCache(ttl=60)
+    fetch = _Counter()
+
+    async def run():
+        await cache.get_or_fetch("languages", fetch)
+        await cache.get_or_fetch("languages", fetch)
+
+    asyncio.run(run())
+    assert fetch.calls == 1
+    assert cache.hits == 1
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = TTLCache(ttl=60)
+    fetch = _Counter(delay=0.05)
+
+    async def run():
+        return await asyncio.gather(*[cache.get_or_fetch("templates", fetch) for _ in range(10)])
+
+    results = asyncio.run(run())
+    assert fetch.calls == 1
+    assert all(r == {"languages": ["en"]} for r in results)
+
+
+def test_stale_entry_is_served_while_refreshing():
+    cache = TTLCache(ttl=1, max_stale=60)
+    fetch = _Counter(payload={"languages": ["en", "es"]})
+
+    async def run():
+        await cache.get_or_fetch("languages", _Counter())
+        cache._entries["languages"].fetched_at = time.time() - 5
+        stale = await cache.get_or_fetch("languages", fetch)
+        await asyncio.sleep(0.01)
+        fresh = await cache.get_or_fetch("languages", fetch)
+        return stale, fresh
+
+    stale, fresh = asyncio.run(run())
+    assert stale == {"languages": ["en"]}
+    assert fresh == {"languages": ["en", "es"]}
+    assert fetch.calls == 1
+
+
+def test_errors_are_not_cached():
+    cache = TTLCache(ttl=60)
+    fetch = _Counter(payload={"error": "Request failed", "message": "boom"})
+
+    async def run():
+        await cache.get_or_fetch("languages", fetch)
+        await cache.get_or_fetch("languages", fetch)
+
+    asyncio.run(run())
+    assert fetch.calls == 2
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "catalog.json")
+    cache = TTLCache(ttl=60, snapshot_path=path)
+    asyncio.run(cache.get_or_fetch("templates", _Counter(payload={"templates": ["Sara"]})))
+
+    warm = TTLCache(ttl=60, snapshot_path=path)
+    assert warm.load_snapshot() == 1
+    fetch = _Counter()
+    assert asyncio.run(warm.get_or_fetch("templates", fetch)) == {"templates": ["Sara"]}
+    assert fetch.calls == 0
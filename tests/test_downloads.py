@@ -0,0 +1,251 @@
+"""
+Tests for streaming, resumable downloads and the magic clips tool
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+
+import httpx
+
+import submagic_mcp
+from submagic_mcp.downloads import (
+    ETAG_SUFFIX,
+    PART_SUFFIX,
+    STATE_SUFFIX,
+    DownloadError,
+    DownloadResult,
+    download_file,
+    download_segmented,
+    parse_content_range,
+    safe_filename,
+    strong_etag,
+    verify_download,
+)
+from submagic_mcp.http_client import build_http_client, set_http_client
+from submagic_mcp.mock_api import CDN_HOST, MockSubmagicAPI
+
+URL = f"https://{CDN_HOST}/video.mp4"
+
+
+def _download(api, path, **kwargs):
+    async def run():
+        async with httpx.AsyncClient(transport=api.transport()) as client:
+            return await download_file(client, URL, str(path), **kwargs)
+
+    return asyncio.run(run())
+
+
+def test_parse_content_range_and_filenames():
+    assert parse_content_range("bytes 100-199/1000") == (100, 1000)
+    assert parse_content_range("bytes 0-9/*") == (0, None)
+    assert parse_content_range(None) == (None, None)
+    assert safe_filename("Why Rust? (Part 2/3)") == "Why-Rust-Part-2-3"
+    assert safe_filename("???", "clip") == "clip"
+
+
+def test_download_streams_in_chunks(tmp_path):
+    api = MockSubmagicAPI(file_size=10_000)
+    seen = []
+
+    async def progress(done, total):
+        seen.append((done, total))
+
+    result = _download(api, tmp_path / "out.mp4", chunk_size=4096, progress=progress)
+    assert result.size == 10_000 and result.transferred == 10_000 and not result.skipped
+    assert (tmp_path / "out.mp4").read_bytes() == api.file_content("/video.mp4")
+    assert seen == [(4096, 10_000), (8192, 10_000), (10_000, 10_000)]
+    assert not os.path.exists(str(tmp_path / "out.mp4") + PART_SUFFIX)
+
+    again = _download(api, tmp_path / "out.mp4")
+    assert again.skipped and api.requests[("GET", "cdn")] == 1
+
+
+def test_download_resumes_partial_file(tmp_path):
+    api = MockSubmagicAPI(file_size=10_000)
+    content = api.file_content("/video.mp4")
+    path = tmp_path / "out.mp4"
+    (tmp_path / ("out.mp4" + PART_SUFFIX)).write_bytes(content[:6000])
+
+    result = _download(api, path)
+    assert result.resumed_from == 6000 and result.transferred == 4000
+    assert path.read_bytes() == content
+
+
+def test_download_restarts_when_file_changed_upstream(tmp_path):
+    api = MockSubmagicAPI(file_size=10_000)
+    old = api.file_content("/video.mp4")
+    path = tmp_path / "out.mp4"
+    (tmp_path / ("out.mp4" + PART_SUFFIX)).write_bytes(old[:6000])
+    (tmp_path / ("out.mp4" + ETAG_SUFFIX)).write_text(f'"{hashlib.md5(old).hexdigest()}"')
+    api.file_revision = 1
+
+    result = _download(api, path)
+    assert result.resumed_from == 0 and result.transferred == 10_000
+    assert path.read_bytes() == api.file_content("/video.mp4") != old
+    assert not (tmp_path / ("out.mp4" + ETAG_SUFFIX)).exists()
+
+
+def test_download_restarts_when_range_is_ignored(tmp_path):
+    api = MockSubmagicAPI(file_size=5000, accept_ranges=False)
+    (tmp_path / ("out.mp4" + PART_SUFFIX)).write_bytes(b"x" * 1000)
+
+    result = _download(api, tmp_path / "out.mp4")
+    assert result.resumed_from == 0 and result.transferred == 5000
+    assert (tmp_path / "out.mp4").read_bytes() == api.file_content("/video.mp4")
+
+
+def test_download_error_keeps_nothing_in_place(tmp_path):
+    def handler(request):
+        return httpx.Response(403)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await download_file(client, URL, str(tmp_path / "out.mp4"))
+
+    try:
+        asyncio.run(run())
+    except DownloadError as e:
+        assert "403" in str(e)
+    else:
+        raise AssertionError("expected DownloadError")
+    assert not (tmp_path / "out.mp4").exists()
+
+
+def test_get_magic_clips_lists_and_downloads(monkeypatch, tmp_path):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    api = MockSubmagicAPI(clips=5, file_size=3000, seed=2)
+    project_id = api.add_project(kind="magic_clips")
+
+    async def run():
+        set_http_client(build_http_client(transport=api.transport()))
+        try:
+            listed = await submagic_mcp.submagic_get_magic_clips(project_id)
+            downloaded = await submagic_mcp.submagic_get_magic_clips(
+                project_id, download_dir=str(tmp_path / "clips"), max_concurrency=2
+            )
+            again = await submagic_mcp.submagic_get_magic_clips(project_id, download_dir=str(tmp_path / "clips"))
+            return listed[0].text, downloaded[0].text, again[0].text
+        finally:
+            set_http_client(None)
+
+    listed, downloaded, again = asyncio.run(run())
+    assert "(5 clips)" in listed and "completed: 5" in listed and "## Downloads" not in listed
+    assert downloaded.count("| downloaded |") == 5
+    assert sorted(os.listdir(tmp_path / "clips"))[0].startswith("01-Clip-1-")
+    assert again.count("already downloaded") == 5
+    assert api.requests[("GET", "cdn")] == 5
+
+
+def test_get_magic_clips_on_regular_project(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    api = MockSubmagicAPI()
+    project_id = api.add_project()
+
+    async def run():
+        set_http_client(build_http_client(transport=api.transport()))
+        try:
+            return await submagic_mcp.submagic_get_magic_clips(project_id)
+        finally:
+            set_http_client(None)
+
+    assert "has no magic clips" in asyncio.run(run())[0].text
+
+
+def test_segmented_download_and_verify(tmp_path):
+    api = MockSubmagicAPI(file_size=100_000)
+    path = str(tmp_path / "out.mp4")
+
+    async def run():
+        async with httpx.AsyncClient(transport=api.transport()) as client:
+            result = await download_segmented(client, URL, path, segments=4, chunk_size=8192, min_segment_size=10_000)
+            return result, await verify_download(result)
+
+    result, checks = asyncio.run(run())
+    content = api.file_content("/video.mp4")
+    assert result.segments == 4 and result.size == 100_000
+    assert open(path, "rb").read() == content
+    assert checks == {"sha256": hashlib.sha256(content).hexdigest(), "md5_verified": True}
+    assert not os.path.exists(path + STATE_SUFFIX) and not os.path.exists(path + PART_SUFFIX)
+    # probe + one request per segment
+    assert api.requests[("GET", "cdn")] == 5
+
+
+def test_segmented_download_ignores_weak_etags(tmp_path):
+    api = MockSubmagicAPI(file_size=100_000, weak_etags=True)
+    path = str(tmp_path / "out.mp4")
+
+    async def run():
+        async with httpx.AsyncClient(transport=api.transport()) as client:
+            return await download_segmented(client, URL, path, segments=4, min_segment_size=10_000)
+
+    result = asyncio.run(run())
+    assert result.segments == 4
+    assert open(path, "rb").read() == api.file_content("/video.mp4")
+    assert strong_etag('W/"abc"') is None and strong_etag('"abc"') == '"abc"'
+
+
+def test_segmented_download_resumes_saved_segments(tmp_path):
+    api = MockSubmagicAPI(file_size=40_000)
+    content = api.file_content("/video.mp4")
+    path = str(tmp_path / "out.mp4")
+    etag = f'"{hashlib.md5(content).hexdigest()}"'
+    # First half of each of two segments already on disk
+    segments = [[0, 19_999, 10_000], [20_000, 39_999, 5_000]]
+    partial = bytearray(40_000)
+    partial[0:10_000] = content[0:10_000]
+    partial[20_000:25_000] = content[20_000:25_000]
+    with open(path + PART_SUFFIX, "wb") as f:
+        f.write(partial)
+    with open(path + STATE_SUFFIX, "w") as f:
+        json.dump({"size": 40_000, "etag": etag, "segments": segments}, f)
+
+    async def run():
+        async with httpx.AsyncClient(transport=api.transport()) as client:
+            return await download_segmented(client, URL, path, segments=2, min_segment_size=10_000)
+
+    result = asyncio.run(run())
+    assert result.resumed_from == 15_000 and result.transferred == 25_000
+    assert open(path, "rb").read() == content
+
+
+def test_verify_download_rejects_corrupt_file(tmp_path):
+    path = tmp_path / "out.mp4"
+    path.write_bytes(b"corrupt")
+    result = DownloadResult(str(path), 7, etag=f'"{hashlib.md5(b"original").hexdigest()}"')
+
+    try:
+        asyncio.run(verify_download(result))
+    except DownloadError as e:
+        assert "Checksum mismatch" in str(e)
+    else:
+        raise AssertionError("expected DownloadError")
+    assert not path.exists()
+
+
+def test_download_output_batch(monkeypatch, tmp_path):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setenv("SUBMAGIC_DOWNLOAD_MIN_SEGMENT_SIZE", "10000")
+    api = MockSubmagicAPI(file_size=50_000, polls_to_complete=1, seed=3)
+    exported = [api.add_project() for _ in range(3)]
+    for project_id in exported:
+        api.projects[project_id]["directUrl"] = f"https://{CDN_HOST}/{project_id}.mp4"
+    not_exported = api.add_project()
+
+    async def run():
+        set_http_client(build_http_client(transport=api.transport()))
+        try:
+            result = await submagic_mcp.submagic_download_output(
+                exported + [not_exported], download_dir=str(tmp_path / "exports"), segments=2
+            )
+            return result[0].text
+        finally:
+            set_http_client(None)
+
+    text = asyncio.run(run())
+    assert "3 of 4 saved" in text
+    assert text.count("downloaded (2 segments)") == 3
+    assert text.count("size, md5") == 3
+    assert "run submagic_export_project first" in text
+    assert len(os.listdir(tmp_path / "exports")) == 3
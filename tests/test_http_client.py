@@ -0,0 +1,71 @@
+"""
+Tests for the shared pooled HTTP client
+"""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from submagic_mcp import http_client
+from submagic_mcp.http_client import HTTPClientConfig, build_http_client, connection_stats
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_config_from_env(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_HTTP_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("SUBMAGIC_HTTP_KEEPALIVE_EXPIRY", "2.5")
+    monkeypatch.setenv("SUBMAGIC_HTTP2", "yes")
+    config = HTTPClientConfig.from_env()
+    assert config.max_connections == 7
+    assert config.keepalive_expiry == 2.5
+    assert config.http2 is True
+
+
+def test_connections_are_reused():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/languages"
+
+    async def run():
+        client = build_http_client(HTTPClientConfig(max_connections=1))
+        async with client:
+            for _ in range(5):
+                response = await client.get(url)
+                assert response.status_code == 200
+
+    connection_stats.reset()
+    try:
+        asyncio.run(run())
+    finally:
+        server.shutdown()
+
+    assert connection_stats.requests == 5
+    assert connection_stats.connections_opened == 1
+    assert connection_stats.connections_reused == 4
+
+
+def test_shared_client_is_recreated_after_close():
+    async def run():
+        first = http_client.get_http_client()
+        assert http_client.get_http_client() is first
+        await http_client.close_http_client()
+        second = http_client.get_http_client()
+        assert second is not first
+        await http_client.close_http_client()
+
+    asyncio.run(run())
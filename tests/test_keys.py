@@ -0,0 +1,157 @@
+"""
+Tests for the multi-key API pool
+"""
+
+import asyncio
+
+import httpx
+
+import submagic_mcp
+from submagic_mcp.http_client import build_http_client, set_http_client
+from submagic_mcp.keys import KeyPool, load_api_keys, project_id_from_endpoint
+
+
+def _use_keys(monkeypatch, *keys):
+    monkeypatch.delenv("SUBMAGIC_API_KEY", raising=False)
+    monkeypatch.setenv("SUBMAGIC_API_KEYS", ",".join(keys))
+
+
+def _run(handler, coro_fn):
+    async def run():
+        set_http_client(build_http_client(transport=httpx.MockTransport(handler)))
+        try:
+            return await coro_fn()
+        finally:
+            set_http_client(None)
+
+    return asyncio.run(run())
+
+
+def test_keys_load_from_env_and_file(monkeypatch, tmp_path):
+    key_file = tmp_path / "keys.txt"
+    key_file.write_text("# team accounts\nsk-c\n\nsk-a\n")
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-a")
+    monkeypatch.setenv("SUBMAGIC_API_KEYS", "sk-b, sk-a")
+    monkeypatch.setenv("SUBMAGIC_API_KEY_1", "sk-d")
+    monkeypatch.setenv("SUBMAGIC_API_KEYS_FILE", str(key_file))
+
+    assert load_api_keys() == ["sk-a", "sk-b", "sk-d", "sk-c"]
+
+
+def test_project_id_from_endpoint():
+    assert project_id_from_endpoint("projects/p1") == "p1"
+    assert project_id_from_endpoint("projects/p1/export") == "p1"
+    assert project_id_from_endpoint("projects") is None
+    assert project_id_from_endpoint("projects/upload") is None
+    assert project_id_from_endpoint("projects/magic-clips") is None
+
+
+def test_remaining_quota_policy_prefers_key_with_budget():
+    pool = KeyPool(["sk-a", "sk-b"], policy="remaining_quota")
+    pool.keys[0].limiter.buckets["standard"].sync(remaining=3)
+
+    assert pool.select("standard").key == "sk-b"
+
+
+def test_requests_spread_across_keys(monkeypatch):
+    _use_keys(monkeypatch, "sk-a", "sk-b")
+    used = []
+
+    def handler(request):
+        used.append(request.headers["x-api-key"])
+        return httpx.Response(200, json={"id": "x", "status": "processing"})
+
+    async def calls():
+        for pid in ("p1", "p2", "p3", "p4"):
+            await submagic_mcp.make_api_request("GET", f"projects/{pid}")
+
+    _run(handler, calls)
+    assert sorted(used) == ["sk-a", "sk-a", "sk-b", "sk-b"]
+
+
+def test_rate_limit_tokens_reported_per_key(monkeypatch):
+    _use_keys(monkeypatch, "sk-a", "sk-b")
+    pool = submagic_mcp.get_key_pool()
+    pool.keys[0].limiter.buckets["standard"].sync(remaining=3)
+
+    families = {name: samples for name, _, _, samples in submagic_mcp.collect_component_metrics()}
+    tokens = {(labels["key"], labels["quota"]): value for labels, value in families["submagic_rate_limit_tokens"]}
+
+    assert tokens[(pool.keys[0].id, "standard")] == 3
+    assert tokens[(pool.keys[1].id, "standard")] > 3
+
+
+def test_unauthorized_key_is_ejected(monkeypatch):
+    _use_keys(monkeypatch, "sk-bad", "sk-good")
+    used = []
+
+    def handler(request):
+        key = request.headers["x-api-key"]
+        used.append(key)
+        if key == "sk-bad":
+            return httpx.Response(401, json={"message": "Invalid API key"})
+        return httpx.Response(200, json={"languages": []})
+
+    async def calls():
+        return [await submagic_mcp.make_api_request("GET", "languages") for _ in range(3)]
+
+    results = _run(handler, calls)
+    assert all("error" not in r for r in results)
+    assert used.count("sk-bad") == 1
+    assert submagic_mcp.get_key_pool().snapshot()["keys"][0]["ejected"] == "401 Unauthorized"
+
+
+def test_projects_stay_pinned_to_creating_key(monkeypatch):
+    _use_keys(monkeypatch, "sk-a", "sk-b")
+    used = []
+
+    def handler(request):
+        used.append((request.method, request.headers["x-api-key"]))
+        if request.method == "POST":
+            return httpx.Response(201, json={"id": "p1", "status": "processing"})
+        return httpx.Response(200, json={"id": "p1", "status": "processing"})
+
+    async def calls():
+        await submagic_mcp.make_api_request("POST", "projects", data={"title": "Demo"})
+        for _ in range(3):
+            await submagic_mcp.make_api_request("GET", "projects/p1")
+
+    _run(handler, calls)
+    creator = used[0][1]
+    assert [key for _, key in used] == [creator] * 4
+
+
+def test_pins_merge_across_processes_and_expire(tmp_path):
+    import json
+
+    path = str(tmp_path / "key_pins.json")
+    first = KeyPool(["sk-a", "sk-b"], pins_path=path)
+    second = KeyPool(["sk-a", "sk-b"], pins_path=path)
+    assert first.pinned("p0") is None
+
+    first.pin("p1", first.keys[0])
+    second.pin("p2", second.keys[1])
+    first.pin("p3", first.keys[1])
+
+    assert second.pinned("p1").key == "sk-a"
+    assert first.pinned("p2").key == "sk-b"
+    assert set(json.load(open(path))) == {"p1", "p2", "p3"}
+
+    capped = KeyPool(["sk-a", "sk-b"], pins_path=path, max_pins=2)
+    capped.pin("p4", capped.keys[0])
+    assert set(json.load(open(path))) == {"p3", "p4"}
+
+    expired = KeyPool(["sk-a", "sk-b"], pins_path=path, pin_ttl=0)
+    assert expired.pinned("p4") is None
+
+
+def test_legacy_pins_still_route(tmp_path):
+    import json
+
+    path = tmp_path / "key_pins.json"
+    pool = KeyPool(["sk-a", "sk-b"], pins_path=str(path))
+    path.write_text(json.dumps({"p1": pool.keys[1].id}))
+
+    assert pool.pinned("p1").key == "sk-b"
+    pool.pin("p2", pool.keys[0])
+    assert json.loads(path.read_text())["p1"]["key"] == pool.keys[1].id
@@ -0,0 +1,138 @@
+"""
+Tests for the Prometheus metrics registry, listener and instrumentation
+"""
+
+import asyncio
+
+import httpx
+
+import submagic_mcp
+from submagic_mcp.http_client import build_http_client, set_http_client
+from submagic_mcp.metrics import (
+    API_RESPONSES,
+    API_RETRIES,
+    TOOL_CALLS,
+    MetricsRegistry,
+    MetricsServer,
+    endpoint_label,
+)
+from submagic_mcp.mock_api import MockSubmagicAPI
+from submagic_mcp.retry import RetryPolicy
+
+
+def test_render_counters_and_histograms():
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total", "Calls", ("tool",))
+    latency = registry.histogram("latency_seconds", "Latency", ("tool",), buckets=(0.1, 1.0))
+    calls.inc(tool='say "hi"')
+    latency.observe(0.05, tool="a")
+    latency.observe(0.5, tool="a")
+    latency.observe(5.0, tool="a")
+
+    text = registry.render()
+
+    assert "# TYPE calls_total counter" in text
+    assert 'calls_total{tool="say \\"hi\\""} 1' in text
+    assert 'latency_seconds_bucket{tool="a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{tool="a",le="1"} 2' in text
+    assert 'latency_seconds_bucket{tool="a",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{tool="a"} 3' in text
+    assert latency.quantile(0.5, tool="a") == 1.0
+
+    compact = registry.render(buckets=False)
+    assert 'le="0.1"' not in compact
+    assert 'latency_seconds_bucket{tool="a",le="+Inf"} 3' in compact
+    assert 'latency_seconds_count{tool="a"} 3' in compact
+
+
+def test_endpoint_label_hides_project_ids():
+    assert endpoint_label("projects/3f2a") == "projects/{id}"
+    assert endpoint_label("/projects/3f2a/export") == "projects/{id}/export"
+    assert endpoint_label("projects/magic-clips") == "projects/magic-clips"
+    assert endpoint_label("languages") == "languages"
+
+
+def test_tool_and_request_metrics(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setattr(submagic_mcp, "retry_policy", RetryPolicy(max_attempts=2, base_delay=0.001))
+    api = MockSubmagicAPI(error_rate=1.0)
+    ok_before = TOOL_CALLS.total(tool="submagic_get_project", outcome="ok")
+    errors_before = TOOL_CALLS.total(tool="submagic_get_project", outcome="error")
+    unavailable_before = API_RESPONSES.total(endpoint="projects/{id}", status="503")
+    retries_before = API_RETRIES.total(endpoint="projects/{id}", reason="status")
+
+    async def run():
+        set_http_client(build_http_client(transport=api.transport()))
+        try:
+            await submagic_mcp.submagic_get_project(api.add_project())
+            return await submagic_mcp.submagic_server_stats(output_format="prometheus")
+        finally:
+            set_http_client(None)
+
+    output = asyncio.run(run())
+
+    assert TOOL_CALLS.total(tool="submagic_get_project", outcome="error") == errors_before + 1
+    assert TOOL_CALLS.total(tool="submagic_get_project", outcome="ok") == ok_before
+    assert API_RESPONSES.total(endpoint="projects/{id}", status="503") == unavailable_before + 2
+    assert API_RETRIES.total(endpoint="projects/{id}", reason="status") == retries_before + 1
+    assert 'submagic_cache_hit_ratio{cache="project"}' in output[0].text
+
+
+def test_server_stats_markdown():
+    output = asyncio.run(submagic_mcp.submagic_server_stats())
+    assert output[0].text.startswith("# Server Statistics")
+    assert "| catalog |" in output[0].text
+
+    invalid = asyncio.run(submagic_mcp.submagic_server_stats(output_format="xml"))
+    assert invalid[0].text.startswith("Input validation error")
+
+
+def test_metrics_server_serves_text_format():
+    registry = MetricsRegistry()
+    registry.counter("up_total", "Up").inc()
+    server = MetricsServer(registry, port=0)
+
+    async def run():
+        await server.start()
+        try:
+            async with httpx.AsyncClient() as client:
+                base = f"http://127.0.0.1:{server.port}"
+                return await client.get(f"{base}/metrics"), await client.get(f"{base}/other")
+        finally:
+            await server.stop()
+
+    scrape, missing = asyncio.run(run())
+
+    assert scrape.status_code == 200
+    assert scrape.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "up_total 1" in scrape.text
+    assert missing.status_code == 404
+    assert server.scrapes == 1
+
+
+def test_metrics_server_limits_slow_and_oversized_requests():
+    server = MetricsServer(MetricsRegistry(), port=0, read_timeout=0.2)
+
+    async def raw(data):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(data)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        return response.split(b"\r\n", 1)[0]
+
+    async def run():
+        await server.start()
+        try:
+            slow = await raw(b"GET /metrics HTTP/1.1\r\nHost: x\r\n")
+            long_line = await raw(b"GET /metrics HTTP/1.1\r\nX-Pad: " + b"a" * (64 * 1024) + b"\r\n\r\n")
+            many = await raw(b"GET /metrics HTTP/1.1\r\n" + b"X-Pad: a\r\n" * 200 + b"\r\n")
+        finally:
+            await server.stop()
+        return slow, long_line, many
+
+    slow, long_line, many = asyncio.run(run())
+    assert slow == b"HTTP/1.1 408 Request Timeout"
+    assert long_line == b"HTTP/1.1 400 Bad Request"
+    assert many == b"HTTP/1.1 431 Request Header Fields Too Large"
+    assert server.scrapes == 0
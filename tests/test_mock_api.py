@@ -0,0 +1,72 @@
+"""
+Tests for the local mock Submagic API
+"""
+
+import asyncio
+
+import submagic_mcp
+from submagic_mcp.http_client import build_http_client, set_http_client
+from submagic_mcp.mock_api import MockSubmagicAPI
+from submagic_mcp.rate_limit import RateLimiter
+from submagic_mcp.retry import RetryPolicy
+
+
+def _run(api, coro_fn):
+    async def run():
+        set_http_client(build_http_client(transport=api.transport()))
+        try:
+            return await coro_fn()
+        finally:
+            set_http_client(None)
+
+    return asyncio.run(run())
+
+
+def test_project_lifecycle(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    api = MockSubmagicAPI(polls_to_complete=2, words=20, seed=1)
+
+    async def lifecycle():
+        created = await submagic_mcp.make_api_request("POST", "projects", data={"title": "Demo", "language": "en"})
+        pid = created["id"]
+        first = await submagic_mcp.make_api_request("GET", f"projects/{pid}")
+        second = await submagic_mcp.make_api_request("GET", f"projects/{pid}")
+        await submagic_mcp.make_api_request("POST", f"projects/{pid}/export", data={})
+        await submagic_mcp.make_api_request("GET", f"projects/{pid}")
+        exported = await submagic_mcp.make_api_request("GET", f"projects/{pid}")
+        return first, second, exported
+
+    first, second, exported = _run(api, lifecycle)
+
+    assert first["status"] == "processing"
+    assert second["status"] == "completed"
+    assert len(second["words"]) == 20
+    assert exported["downloadUrl"].endswith(".mp4")
+    assert api.snapshot()["requests"]["GET /projects/{id}"] == 4
+
+
+def test_catalogs_and_unknown_project(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    api = MockSubmagicAPI()
+
+    async def calls():
+        languages = await submagic_mcp.make_api_request("GET", "languages")
+        missing = await submagic_mcp.make_api_request("GET", "projects/nope")
+        return languages, missing
+
+    languages, missing = _run(api, calls)
+
+    assert {"code": "en", "name": "English"} in languages["languages"]
+    assert "error" in missing
+
+
+def test_injected_rate_limits_are_retried(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setattr(submagic_mcp, "rate_limiter", RateLimiter(limits={"lightweight": 3_600_000}))
+    monkeypatch.setattr(submagic_mcp, "retry_policy", RetryPolicy(max_attempts=2, base_delay=0.001))
+    api = MockSubmagicAPI(rate_limit_rate=1.0, retry_after=0.01)
+
+    result = _run(api, lambda: submagic_mcp.make_api_request("GET", "templates"))
+
+    assert "error" in result
+    assert api.injected[429] == 2
@@ -0,0 +1,187 @@
+"""
+Tests for the submagic_process_video pipeline and its checkpoint store
+"""
+
+import asyncio
+
+import httpx
+
+import submagic_mcp
+from submagic_mcp.http_client import build_http_client, set_http_client
+from submagic_mcp.pipeline import STAGE_COMPLETED, STAGE_FAILED, STAGE_RENDERING, RunStore
+from submagic_mcp.rate_limit import RateLimiter
+
+
+class FakeSubmagic:
+    """Project that finishes processing after two polls and exporting after one more"""
+
+    def __init__(self, fail_processing=False):
+        self.fail_processing = fail_processing
+        self.calls = []
+        self.polls = 0
+        self.exported = False
+
+    def __call__(self, request):
+        path = request.url.path
+        self.calls.append((request.method, path))
+        if request.method == "POST" and path.endswith("/projects"):
+            return httpx.Response(201, json={"id": "p1", "title": "Demo", "status": "processing"})
+        if request.method == "POST" and path.endswith("/export"):
+            self.exported = True
+            return httpx.Response(200, json={"status": "exporting"})
+        self.polls += 1
+        if self.fail_processing:
+            return httpx.Response(200, json={"id": "p1", "status": "failed", "failureReason": "Bad video"})
+        if self.exported:
+            return httpx.Response(200, json={"id": "p1", "status": "completed", "downloadUrl": "https://cdn/p1.mp4"})
+        status = "completed" if self.polls >= 2 else "processing"
+        return httpx.Response(200, json={"id": "p1", "status": status})
+
+
+def _setup(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setenv("SUBMAGIC_POLL_MIN_INTERVAL", "0.01")
+    monkeypatch.setenv("SUBMAGIC_POLL_MAX_INTERVAL", "0.01")
+    monkeypatch.setattr(submagic_mcp, "rate_limiter", RateLimiter())
+
+
+def _run(handler, coro_fn):
+    async def run():
+        set_http_client(build_http_client(transport=httpx.MockTransport(handler)))
+        try:
+            return await coro_fn()
+        finally:
+            await submagic_mcp.cancel_pipeline_runs()
+            set_http_client(None)
+
+    return asyncio.run(run())
+
+
+def test_process_video_runs_to_download_url(monkeypatch):
+    _setup(monkeypatch)
+    api = FakeSubmagic()
+
+    output = _run(api, lambda: submagic_mcp.submagic_process_video(
+        title="Demo", language="en", video_url="https://example.com/v.mp4", width=1080, wait_seconds=10
+    ))
+    text = output[0].text
+
+    assert "completed (step 5 of 5)" in text
+    assert "https://cdn/p1.mp4" in text
+    assert [c for c in api.calls if c[0] == "POST"] == [("POST", "/v1/projects"), ("POST", "/v1/projects/p1/export")]
+    run = submagic_mcp.get_run_store().list()[0]
+    assert run["stage"] == STAGE_COMPLETED
+    assert run["export_body"] == {"width": 1080}
+
+
+def test_processing_failure_fails_run(monkeypatch):
+    _setup(monkeypatch)
+    api = FakeSubmagic(fail_processing=True)
+
+    output = _run(api, lambda: submagic_mcp.submagic_process_video(
+        title="Demo", language="en", video_url="https://example.com/v.mp4", wait_seconds=10
+    ))
+
+    assert "Processing failed: Bad video" in output[0].text
+    assert not any(path.endswith("/export") for _, path in api.calls)
+
+
+def test_unfinished_runs_resume_from_checkpoint(monkeypatch):
+    _setup(monkeypatch)
+    api = FakeSubmagic()
+    api.exported = True
+    store = submagic_mcp.get_run_store()
+    run_id = store.create("Demo", {"title": "Demo"}, {}, timeout=600)
+    store.checkpoint(run_id, STAGE_RENDERING, project_id="p1")
+
+    async def resume():
+        assert submagic_mcp.resume_pipeline_runs() == 1
+        return await submagic_mcp.start_pipeline_run(run_id)
+
+    run = _run(api, resume)
+
+    assert run["stage"] == STAGE_COMPLETED
+    assert run["download_url"] == "https://cdn/p1.mp4"
+    assert all(method == "GET" for method, _ in api.calls)
+
+
+def test_run_store_checkpoints():
+    store = RunStore(":memory:")
+    run_id = store.create("Demo", {"title": "Demo"}, {"fps": 30}, timeout=60)
+    assert [r["run_id"] for r in store.unfinished()] == [run_id]
+
+    store.checkpoint(run_id, STAGE_FAILED, error="boom")
+    assert store.get(run_id)["error"] == "boom"
+    assert store.unfinished() == []
+
+
+def test_runs_are_claimed_by_one_process(tmp_path):
+    path = str(tmp_path / "runs.db")
+    first = RunStore(path, owner="host-a:1")
+    second = RunStore(path, owner="host-b:2")
+    run_id = first.create("Demo", {"title": "Demo"}, {}, timeout=600)
+
+    assert second.claim_unfinished() == []
+    assert not second.claim(run_id)
+    assert first.renew(run_id)
+
+    first.release(run_id)
+    assert [run["run_id"] for run in second.claim_unfinished()] == [run_id]
+    assert not first.renew(run_id)
+    assert second.get(run_id)["owner"] == "host-b:2"
+
+
+def test_resume_skips_runs_leased_elsewhere(monkeypatch):
+    _setup(monkeypatch)
+    api = FakeSubmagic()
+    store = submagic_mcp.get_run_store()
+    other = RunStore(store.path, owner="other-host:1")
+    run_id = other.create("Demo", {"title": "Demo"}, {}, timeout=600)
+
+    async def resume():
+        resumed = submagic_mcp.resume_pipeline_runs()
+        run = await submagic_mcp.run_pipeline(run_id)
+        return resumed, run
+
+    resumed, run = _run(api, resume)
+    other.close()
+
+    assert resumed == 0
+    assert run["stage"] != STAGE_COMPLETED
+    assert api.calls == []
+
+
+def test_run_taken_over_mid_stage_stops_advancing(monkeypatch):
+    _setup(monkeypatch)
+    store = submagic_mcp.get_run_store()
+    other = RunStore(store.path, owner="other-host:1")
+    run_id = store.create("Demo", {"title": "Demo"}, {}, timeout=600)
+    api = FakeSubmagic()
+
+    def handler(request):
+        # The lease passes to another process while the create request is in flight
+        assert other.claim(run_id, stale_owner=store.owner)
+        return api(request)
+
+    run = _run(handler, lambda: submagic_mcp.run_pipeline(run_id))
+    other.close()
+
+    assert api.calls == [("POST", "/v1/projects")]
+    assert run["stage"] == "creating"
+    assert run["owner"] == "other-host:1"
+    assert not store.checkpoint(run_id, STAGE_FAILED, error="late")
+    assert store.get(run_id)["error"] is None
+
+
+def test_runs_of_exited_process_are_reclaimed(tmp_path):
+    import socket
+    import subprocess
+    import sys
+
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    path = str(tmp_path / "runs.db")
+    crashed = RunStore(path, owner=f"{socket.gethostname()}:{exited.pid}")
+    run_id = crashed.create("Demo", {"title": "Demo"}, {}, timeout=600)
+
+    assert [run["run_id"] for run in RunStore(path).claim_unfinished()] == [run_id]
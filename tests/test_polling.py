@@ -0,0 +1,27 @@
+"""
+Tests for the adaptive poll schedule
+"""
+
+from submagic_mcp.polling import AdaptivePollSchedule
+
+
+def test_interval_backs_off_while_status_unchanged():
+    schedule = AdaptivePollSchedule(min_interval=1, max_interval=30, growth=2)
+    first = schedule.next_interval("transcribing")
+    second = schedule.next_interval("transcribing")
+    assert second == first * 2
+    for _ in range(10):
+        last = schedule.next_interval("transcribing")
+    assert last == 30
+
+
+def test_status_change_resets_interval():
+    schedule = AdaptivePollSchedule(min_interval=1, max_interval=60)
+    for _ in range(5):
+        schedule.next_interval("transcribing")
+    assert schedule.next_interval("exporting") == schedule.base_interval("exporting")
+
+
+def test_long_videos_poll_less_often():
+    schedule = AdaptivePollSchedule(min_interval=1, max_interval=600)
+    assert schedule.base_interval("transcribing", 7200) > schedule.base_interval("transcribing", 60)
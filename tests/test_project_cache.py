@@ -0,0 +1,91 @@
+"""
+Tests for the per-project response cache and conditional GETs
+"""
+
+import asyncio
+
+import httpx
+
+import submagic_mcp
+from submagic_mcp.cache import ProjectResponseCache
+from submagic_mcp.http_client import build_http_client, set_http_client
+from submagic_mcp.rate_limit import RateLimiter
+
+
+def test_terminal_projects_are_kept_until_invalidated():
+    cache = ProjectResponseCache(ttl=0)
+    cache.store("p1", {"id": "p1", "status": "completed"})
+    cache.store("p2", {"id": "p2", "status": "processing"})
+
+    assert cache.get_fresh("p1") == {"id": "p1", "status": "completed"}
+    assert cache.get_fresh("p2") is None
+
+    cache.invalidate("p1")
+    assert cache.get_fresh("p1") is None
+
+
+def test_status_change_event_drops_entry():
+    cache = ProjectResponseCache(ttl=60)
+    cache.store("p1", {"id": "p1", "status": "processing"})
+
+    cache.observe({"projectId": "p1", "status": "processing"})
+    assert cache.get("p1") is not None
+    cache.observe({"projectId": "p1", "status": "completed"})
+    assert cache.get("p1") is None
+
+
+def test_lru_bound():
+    cache = ProjectResponseCache(ttl=60, max_entries=2)
+    for pid in ("a", "b", "c"):
+        cache.store(pid, {"id": pid, "status": "completed"})
+    assert cache.get("a") is None
+    assert cache.snapshot()["entries"] == 2
+
+
+def _run_tool(monkeypatch, handler, calls):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setattr(submagic_mcp, "rate_limiter", RateLimiter())
+
+    async def run():
+        set_http_client(build_http_client(transport=httpx.MockTransport(handler)))
+        try:
+            return [(await submagic_mcp.submagic_get_project(pid))[0].text for pid in calls]
+        finally:
+            set_http_client(None)
+
+    return asyncio.run(run())
+
+
+def test_completed_project_is_served_from_cache(monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"id": "p1", "title": "Demo", "status": "completed"})
+
+    outputs = _run_tool(monkeypatch, handler, ["p1", "p1", "p1"])
+    assert len(requests) == 1
+    assert all("Completed" in text for text in outputs)
+
+
+def test_expired_project_is_revalidated_with_etag(monkeypatch):
+    monkeypatch.setattr(submagic_mcp.project_cache, "ttl", 0)
+    revalidated = submagic_mcp.project_cache.revalidated
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(
+            200,
+            json={"id": "p1", "title": "Demo", "status": "processing"},
+            headers={"ETag": '"v1"'},
+        )
+
+    outputs = _run_tool(monkeypatch, handler, ["p1", "p1"])
+    assert len(requests) == 2
+    assert "if-none-match" not in requests[0].headers
+    assert requests[1].headers["if-none-match"] == '"v1"'
+    assert "Processing" in outputs[1]
+    assert submagic_mcp.project_cache.revalidated == revalidated + 1
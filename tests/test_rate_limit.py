@@ -0,0 +1,92 @@
+"""
+Tests for the client-side quota-class rate limiter
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+import submagic_mcp
+from submagic_mcp.http_client import build_http_client, set_http_client
+from submagic_mcp.rate_limit import (
+    LIGHTWEIGHT,
+    STANDARD,
+    UPLOAD,
+    POLICY_FAIL_FAST,
+    RateLimiter,
+    RateLimitExceeded,
+    classify_endpoint,
+    parse_retry_after,
+)
+
+
+def test_classify_endpoint():
+    assert classify_endpoint("GET", "languages") == LIGHTWEIGHT
+    assert classify_endpoint("GET", "/templates") == LIGHTWEIGHT
+    assert classify_endpoint("POST", "projects") == STANDARD
+    assert classify_endpoint("POST", "projects/abc/export") == STANDARD
+    assert classify_endpoint("POST", "projects/magic-clips") == STANDARD
+    assert classify_endpoint("POST", "projects/upload") == UPLOAD
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("30") == 30.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("garbage") is None
+
+
+def test_fail_fast_refuses_when_bucket_empty():
+    limiter = RateLimiter(limits={STANDARD: 2}, policy=POLICY_FAIL_FAST)
+
+    async def run():
+        await limiter.acquire(STANDARD)
+        await limiter.acquire(STANDARD)
+        with pytest.raises(RateLimitExceeded) as exc:
+            await limiter.acquire(STANDARD)
+        return exc.value
+
+    error = asyncio.run(run())
+    assert error.quota == STANDARD
+    assert error.retry_after > 0
+    assert limiter.rejected[STANDARD] == 1
+    # Quota classes are independent
+    assert limiter.buckets[LIGHTWEIGHT].tokens == 1000
+
+
+def test_headers_resync_budget():
+    limiter = RateLimiter()
+    limiter.observe(STANDARD, 200, httpx.Headers({"X-RateLimit-Remaining": "3"}))
+    assert limiter.buckets[STANDARD].tokens <= 3
+
+    pause = limiter.observe(STANDARD, 429, httpx.Headers({"Retry-After": "12"}))
+    assert pause == 12.0
+    assert limiter.buckets[STANDARD].delay() > 11
+
+
+def test_upstream_429_pauses_quota_class(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    limiter = RateLimiter(policy=POLICY_FAIL_FAST)
+    monkeypatch.setattr(submagic_mcp, "rate_limiter", limiter)
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(429, json={"error": "RATE_LIMIT_EXCEEDED", "retryAfter": 30})
+
+    async def run():
+        set_http_client(build_http_client(transport=httpx.MockTransport(handler)))
+        try:
+            first = await submagic_mcp.make_api_request("POST", "projects", data={})
+            second = await submagic_mcp.make_api_request("POST", "projects", data={})
+            other = await submagic_mcp.make_api_request("GET", "languages")
+        finally:
+            set_http_client(None)
+        return first, second, other
+
+    first, second, other = asyncio.run(run())
+    assert first["retry_after"] == 30.0
+    assert second["error"] == "Rate limit exceeded"
+    assert second["quota_class"] == STANDARD
+    # The second standard call never reached the server; the lightweight one did
+    assert calls == ["/v1/projects", "/v1/languages"]
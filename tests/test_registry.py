@@ -0,0 +1,63 @@
+"""
+Tests for the local SQLite project registry
+"""
+
+import asyncio
+
+import httpx
+
+import submagic_mcp
+from submagic_mcp.events import ProjectEventBus
+from submagic_mcp.http_client import build_http_client, set_http_client
+from submagic_mcp.rate_limit import RateLimiter
+from submagic_mcp.registry import ACTIVE, KIND_MAGIC_CLIPS, ProjectRegistry
+
+
+def test_registry_tracks_status_and_outputs():
+    registry = ProjectRegistry(":memory:")
+    registry.record_created("p1", "project", "Launch", {"language": "en"}, "processing")
+    registry.record_created("p2", KIND_MAGIC_CLIPS, "Clips", {"youtubeUrl": "https://yt"}, "processing")
+    registry.update_status({"projectId": "p1", "status": "completed", "directUrl": "https://cdn/p1.mp4"})
+
+    assert [row["id"] for row in registry.list(status=ACTIVE)] == ["p2"]
+    p1 = registry.get("p1")
+    assert p1["title"] == "Launch"
+    assert p1["params"] == {"language": "en"}
+    assert p1["direct_url"] == "https://cdn/p1.mp4"
+    assert registry.status_counts() == {"completed": 1, "processing": 1}
+
+
+def test_indexes_exist():
+    registry = ProjectRegistry(":memory:")
+    names = {row[0] for row in registry._conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_projects_status", "idx_projects_created_at"} <= names
+
+
+def test_tools_write_to_registry(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setattr(submagic_mcp, "rate_limiter", RateLimiter())
+
+    def handler(request):
+        if request.method == "POST":
+            return httpx.Response(200, json={"id": "p1", "title": "Demo", "status": "processing"})
+        return httpx.Response(200, json={"id": "p1", "title": "Demo", "status": "completed",
+                                         "downloadUrl": "https://dl/p1.mp4"})
+
+    async def run():
+        set_http_client(build_http_client(transport=httpx.MockTransport(handler)))
+        try:
+            await submagic_mcp.submagic_create_project(
+                title="Demo", language="en", video_url="https://example.com/v.mp4",
+                remove_silence_pace="fast"
+            )
+            active = await submagic_mcp.submagic_list_local_projects()
+            await submagic_mcp.submagic_get_project("p1")
+            done = await submagic_mcp.submagic_list_local_projects(status="completed")
+        finally:
+            set_http_client(None)
+        return active, done
+
+    active, done = asyncio.run(run())
+    assert "`p1`" in active[0].text and "processing" in active[0].text
+    assert "https://dl/p1.mp4" in done[0].text
+    assert submagic_mcp.get_registry().get("p1")["params"]["removeSilencePace"] == "fast"
@@ -0,0 +1,101 @@
+"""
+Tests for retry/backoff behaviour in make_api_request
+"""
+
+import asyncio
+
+import httpx
+
+import submagic_mcp
+from submagic_mcp.http_client import build_http_client, set_http_client
+from submagic_mcp.rate_limit import RateLimiter
+from submagic_mcp.retry import RetryPolicy, RetryState
+
+
+def _run(monkeypatch, handler, method, endpoint, policy=None):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setattr(submagic_mcp, "rate_limiter", RateLimiter())
+    monkeypatch.setattr(
+        submagic_mcp, "retry_policy", policy or RetryPolicy(max_attempts=3, base_delay=0.001)
+    )
+
+    async def run():
+        set_http_client(build_http_client(transport=httpx.MockTransport(handler)))
+        try:
+            return await submagic_mcp.make_api_request(method, endpoint, data={})
+        finally:
+            set_http_client(None)
+
+    return asyncio.run(run())
+
+
+def test_get_retries_transient_5xx(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        if len(calls) < 3:
+            return httpx.Response(503, json={"error": "unavailable"})
+        return httpx.Response(200, json={"id": "p1", "status": "completed"})
+
+    result = _run(monkeypatch, handler, "GET", "projects/p1")
+    assert result == {"id": "p1", "status": "completed"}
+    assert len(calls) == 3
+
+
+def test_gives_up_after_max_attempts(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        return httpx.Response(500, json={"message": "boom"})
+
+    result = _run(monkeypatch, handler, "GET", "projects/p1")
+    assert result["error"] == "API Error (500)"
+    assert result["attempts"] == 3
+    assert len(calls) == 3
+
+
+def test_create_does_not_retry_after_request_was_sent(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        raise httpx.ReadTimeout("read timed out", request=request)
+
+    result = _run(monkeypatch, handler, "POST", "projects")
+    assert result["error"] == "Request timeout"
+    assert len(calls) == 1
+
+
+def test_create_retries_connect_errors(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        if len(calls) == 1:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json={"id": "new-project"})
+
+    result = _run(monkeypatch, handler, "POST", "projects/magic-clips")
+    assert result == {"id": "new-project"}
+    assert len(calls) == 2
+
+
+def test_create_does_not_retry_5xx(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        return httpx.Response(502, text="bad gateway")
+
+    result = _run(monkeypatch, handler, "POST", "projects")
+    assert result["error"] == "API Error (502)"
+    assert len(calls) == 1
+
+
+def test_deadline_stops_retries():
+    state = RetryState(RetryPolicy(max_attempts=10, deadline=1.0))
+    state.attempt = 1
+    assert state.next_delay(retry_after=5.0) is None
+    assert state.next_delay(retry_after=0.1) == 0.1
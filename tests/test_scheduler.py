@@ -0,0 +1,149 @@
+"""
+Tests for the priority request scheduler
+"""
+
+import asyncio
+
+import pytest
+
+from submagic_mcp.scheduler import BATCH, INTERACTIVE, RequestScheduler, lane
+
+
+def _recorder(order, name):
+    async def job():
+        order.append(name)
+        return name
+    return job
+
+
+async def _blocked(scheduler):
+    """Occupy the only worker until the returned event is set"""
+    gate = asyncio.Event()
+
+    async def hold():
+        await gate.wait()
+
+    holder = asyncio.ensure_future(scheduler.run(hold))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    return gate, holder
+
+
+def test_interactive_lane_gets_weighted_priority():
+    scheduler = RequestScheduler(workers=1, weights={INTERACTIVE: 2, BATCH: 1})
+    order = []
+
+    async def run():
+        gate, holder = await _blocked(scheduler)
+        jobs = [asyncio.ensure_future(scheduler.run(_recorder(order, f"b{i}"), lane=BATCH)) for i in range(3)]
+        jobs += [asyncio.ensure_future(scheduler.run(_recorder(order, f"i{i}"), lane=INTERACTIVE)) for i in range(3)]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(holder, *jobs)
+        await scheduler.aclose()
+
+    asyncio.run(run())
+    # Batch jobs were queued first, yet interactive ones take two of every three slots
+    assert sorted(order[:3]) == ["b0", "i0", "i1"]
+    assert order[3:] == ["i2", "b1", "b2"]
+
+
+def test_tenants_are_served_round_robin():
+    scheduler = RequestScheduler(workers=1)
+    order = []
+
+    async def run():
+        gate, holder = await _blocked(scheduler)
+        jobs = [asyncio.ensure_future(scheduler.run(_recorder(order, f"a{i}"), tenant="a")) for i in range(3)]
+        jobs.append(asyncio.ensure_future(scheduler.run(_recorder(order, "b0"), tenant="b")))
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(holder, *jobs)
+        await scheduler.aclose()
+
+    asyncio.run(run())
+    assert order == ["a0", "b0", "a1", "a2"]
+
+
+def test_full_queue_applies_backpressure_instead_of_dropping():
+    scheduler = RequestScheduler(workers=1, max_queue=1)
+    order = []
+
+    async def run():
+        gate, holder = await _blocked(scheduler)
+        first = asyncio.ensure_future(scheduler.run(_recorder(order, "first")))
+        second = asyncio.ensure_future(scheduler.run(_recorder(order, "second")))
+        await asyncio.sleep(0.01)
+        assert not second.done()
+        assert scheduler.snapshot()["queued"] == 1
+        gate.set()
+        results = await asyncio.gather(holder, first, second)
+        await scheduler.aclose()
+        return results
+
+    results = asyncio.run(run())
+    assert results[1:] == ["first", "second"]
+    assert scheduler.backpressure_waits == 1
+
+
+def test_lane_context_and_errors_propagate():
+    scheduler = RequestScheduler(workers=2)
+
+    async def boom():
+        raise ValueError("boom")
+
+    async def run():
+        with lane(BATCH):
+            await scheduler.run(_recorder([], "x"))
+        with pytest.raises(ValueError):
+            await scheduler.run(boom)
+        await scheduler.aclose()
+
+    asyncio.run(run())
+    snapshot = scheduler.snapshot()
+    assert snapshot["lanes"][BATCH]["dispatched"] == 1
+    assert snapshot["lanes"][INTERACTIVE]["dispatched"] == 1
+    assert snapshot["queued"] == 0
+
+
+def test_exhausted_quota_does_not_hold_workers(monkeypatch):
+    import time
+
+    import submagic_mcp
+    from submagic_mcp.http_client import build_http_client, set_http_client
+    from submagic_mcp.mock_api import MockSubmagicAPI
+    from submagic_mcp.rate_limit import STANDARD, RateLimiter
+
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    limiter = RateLimiter(max_wait=30.0)
+    limiter.buckets[STANDARD].tokens = 0.0
+    monkeypatch.setattr(submagic_mcp, "rate_limiter", limiter)
+    monkeypatch.setattr(submagic_mcp, "scheduler", RequestScheduler(workers=2))
+    api = MockSubmagicAPI(seed=1)
+    project_id = api.add_project(status="processing")
+
+    async def run():
+        set_http_client(build_http_client(transport=api.transport()))
+        try:
+            with lane(BATCH):
+                waiting = [
+                    asyncio.ensure_future(submagic_mcp.send_api_request("GET", f"projects/{project_id}"))
+                    for _ in range(4)
+                ]
+            await asyncio.sleep(0.05)
+            started = time.monotonic()
+            languages = await submagic_mcp.send_api_request("GET", "languages")
+            elapsed = time.monotonic() - started
+            for task in waiting:
+                task.cancel()
+            await asyncio.gather(*waiting, return_exceptions=True)
+            return languages, elapsed
+        finally:
+            await submagic_mcp.scheduler.aclose()
+            set_http_client(None)
+
+    languages, elapsed = asyncio.run(run())
+
+    assert languages.status_code == 200
+    assert elapsed < 1.0
+    assert api.requests[("GET", "/projects/{id}")] == 0
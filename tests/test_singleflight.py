@@ -0,0 +1,148 @@
+"""
+Tests for coalescing identical in-flight API requests
+"""
+
+import asyncio
+
+import submagic_mcp
+from submagic_mcp.http_client import build_http_client, set_http_client
+from submagic_mcp.mock_api import MockSubmagicAPI
+from submagic_mcp.singleflight import SingleFlight
+
+
+def _run(api, coro_fn):
+    async def run():
+        set_http_client(build_http_client(transport=api.transport()))
+        try:
+            return await coro_fn()
+        finally:
+            set_http_client(None)
+
+    return asyncio.run(run())
+
+
+def test_singleflight_shares_result_and_counts():
+    flight = SingleFlight()
+    started = 0
+
+    async def work():
+        nonlocal started
+        started += 1
+        await asyncio.sleep(0.01)
+        return started
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+
+    assert asyncio.run(main()) == [1] * 5
+    assert flight.snapshot() == {"calls": 5, "coalesced": 4, "inflight": 0}
+
+
+def test_identical_gets_share_one_request(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setattr(submagic_mcp, "request_flight", SingleFlight())
+    api = MockSubmagicAPI(latency=0.02, seed=4)
+    project_id = api.add_project(status="processing")
+
+    async def fan_in():
+        return await asyncio.gather(
+            *(submagic_mcp.make_api_request("GET", f"projects/{project_id}") for _ in range(6)),
+            submagic_mcp.make_api_request("GET", f"projects/{project_id}", params={"fields": "status"})
+        )
+
+    results = _run(api, fan_in)
+
+    assert api.requests[("GET", "/projects/{id}")] == 2
+    assert all(result["id"] == project_id for result in results)
+    # Callers get their own top-level dict
+    results[0]["status"] = "changed"
+    assert results[1]["status"] == "processing"
+    assert submagic_mcp.request_flight.coalesced == 5
+
+
+def test_gets_with_list_params_are_coalesced(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setattr(submagic_mcp, "request_flight", SingleFlight())
+    api = MockSubmagicAPI(latency=0.02, seed=7)
+    project_id = api.add_project(status="processing")
+
+    async def fan_in():
+        return await asyncio.gather(*(
+            submagic_mcp.make_api_request("GET", f"projects/{project_id}", params={"fields": ["id", "status"]})
+            for _ in range(3)
+        ))
+
+    results = _run(api, fan_in)
+
+    assert all(result["id"] == project_id for result in results)
+    assert api.requests[("GET", "/projects/{id}")] == 1
+    assert submagic_mcp.request_flight.coalesced == 2
+
+
+def test_coalesced_callers_get_independent_nested_data(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setattr(submagic_mcp, "request_flight", SingleFlight())
+    api = MockSubmagicAPI(latency=0.02, words=3, seed=6)
+    project_id = api.add_project(status="completed")
+
+    async def fan_in():
+        return await asyncio.gather(*(submagic_mcp.make_api_request("GET", f"projects/{project_id}") for _ in range(3)))
+
+    first, second, third = _run(api, fan_in)
+
+    first["words"].clear()
+    second["words"][0]["text"] = "changed"
+    assert len(third["words"]) == 3 and third["words"][0]["text"] != "changed"
+    assert api.requests[("GET", "/projects/{id}")] == 1
+
+
+def test_singleflight_copies_only_shared_results():
+    flight = SingleFlight()
+    copies = []
+
+    def copy(value):
+        copies.append(value)
+        return list(value)
+
+    async def work():
+        await asyncio.sleep(0.01)
+        return [1]
+
+    async def main():
+        alone = await flight.do("a", work, copy=copy)
+        shared = await asyncio.gather(*(flight.do("b", work, copy=copy) for _ in range(3)))
+        return alone, shared
+
+    alone, shared = asyncio.run(main())
+    assert copies == [[1], [1]]
+    assert len({id(result) for result in shared}) == 3
+
+
+def test_concurrent_project_fetches_are_coalesced(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setattr(submagic_mcp, "request_flight", SingleFlight())
+    api = MockSubmagicAPI(latency=0.02, seed=5)
+    project_ids = [api.add_project(status="processing") for _ in range(2)]
+
+    async def fan_in():
+        return await asyncio.gather(*(submagic_mcp.fetch_project(pid, revalidate=True) for pid in project_ids * 4))
+
+    results = _run(api, fan_in)
+
+    assert api.requests[("GET", "/projects/{id}")] == 2
+    assert [r["id"] for r in results] == project_ids * 4
+
+
+def test_posts_are_never_coalesced(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setattr(submagic_mcp, "request_flight", SingleFlight())
+    api = MockSubmagicAPI(latency=0.01, seed=6)
+
+    async def create_twice():
+        body = {"title": "Same", "language": "en", "videoUrl": "https://example.com/v.mp4"}
+        return await asyncio.gather(*(submagic_mcp.make_api_request("POST", "projects", data=body) for _ in range(2)))
+
+    first, second = _run(api, create_twice)
+
+    assert first["id"] != second["id"]
+    assert submagic_mcp.request_flight.calls == 0
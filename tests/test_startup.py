@@ -0,0 +1,38 @@
+"""
+Tests for work kept off the import path of a fresh server process
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+
+import submagic_mcp
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def test_import_defers_input_model_validators():
+    # Runs in a fresh interpreter: other tests build the validators on first use
+    code = (
+        "import submagic_mcp\n"
+        "models = [m for m in vars(submagic_mcp).values()\n"
+        "          if isinstance(m, type) and issubclass(m, submagic_mcp.ToolInput) and m is not submagic_mcp.ToolInput]\n"
+        "assert models\n"
+        "built = [m.__name__ for m in models if m.__pydantic_complete__]\n"
+        "assert not built, built\n"
+    )
+    env = dict(os.environ, PYTHONPATH=SRC + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+    assert result.returncode == 0, result.stderr
+
+
+def test_deferred_model_still_validates():
+    params = submagic_mcp.ExportProjectInput(project_id="abc")
+    assert params.project_id == "abc"
+
+
+def test_tools_do_not_advertise_output_schemas():
+    tools = asyncio.run(submagic_mcp.app.list_tools())
+    assert tools
+    assert all(tool.outputSchema is None for tool in tools)
@@ -0,0 +1,128 @@
+"""
+Tests for tracing spans around tools and API requests
+"""
+
+import asyncio
+import json
+
+import pytest
+
+import submagic_mcp
+from submagic_mcp.http_client import build_http_client, set_http_client
+from submagic_mcp.mock_api import MockSubmagicAPI
+from submagic_mcp.retry import RetryPolicy
+from submagic_mcp.tracing import NOOP_SPAN, JsonFileSpanExporter, SpanExporter, Tracer, tracer
+
+
+class CollectingExporter(SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def exporter():
+    collected = CollectingExporter()
+    tracer.configure(collected)
+    try:
+        yield collected
+    finally:
+        tracer.configure(None)
+
+
+def _run(api, coro_fn):
+    async def run():
+        set_http_client(build_http_client(transport=api.transport()))
+        try:
+            return await coro_fn()
+        finally:
+            set_http_client(None)
+
+    return asyncio.run(run())
+
+
+def test_tool_call_produces_nested_spans(monkeypatch, exporter):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    api = MockSubmagicAPI()
+    pid = api.add_project()
+
+    _run(api, lambda: submagic_mcp.submagic_get_project(pid))
+
+    spans = {span.name: span for span in exporter.spans}
+    tool = spans["tool submagic_get_project"]
+    request = spans["GET projects/{id}"]
+    attempt = spans["attempt"]
+    assert tool.parent_id is None
+    assert spans["validate GetProjectInput"].parent_id == tool.span_id
+    assert request.parent_id == tool.span_id
+    # Attempts run in scheduler workers but still hang off their request
+    assert attempt.parent_id == request.span_id
+    assert {span.trace_id for span in exporter.spans} == {tool.trace_id}
+    assert request.attributes["http.response.status_code"] == 200
+    assert request.attributes["submagic.attempts"] == 1
+    assert request.attributes["http.response.body.size"] > 0
+    assert tool.attributes["mcp.tool.outcome"] == "ok"
+
+
+def test_retries_and_errors_are_recorded(monkeypatch, exporter):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setattr(submagic_mcp, "retry_policy", RetryPolicy(max_attempts=2, base_delay=0.001))
+    api = MockSubmagicAPI(error_rate=1.0)
+
+    _run(api, lambda: submagic_mcp.submagic_get_project(api.add_project()))
+
+    attempts = [span for span in exporter.spans if span.name == "attempt"]
+    request = next(span for span in exporter.spans if span.name == "GET projects/{id}")
+    tool = next(span for span in exporter.spans if span.name.startswith("tool "))
+    assert [span.status for span in attempts] == ["ERROR", "ERROR"]
+    assert request.attributes["submagic.retries"] == 1
+    assert request.status == "ERROR"
+    assert tool.status == "ERROR"
+
+
+def test_unsampled_traces_record_nothing():
+    collected = CollectingExporter()
+    sampled_out = Tracer(collected, sample_rate=0.0)
+
+    with sampled_out.span("root") as root:
+        with sampled_out.span("child") as child:
+            pass
+
+    assert root is NOOP_SPAN and child is NOOP_SPAN
+    assert collected.spans == []
+
+
+def test_disabled_tracer_is_noop():
+    with Tracer().span("anything") as span:
+        span.set_attribute("ignored", 1)
+    assert not span.recording
+
+
+def test_json_file_exporter(tmp_path):
+    path = tmp_path / "traces" / "spans.jsonl"
+    json_tracer = Tracer(JsonFileSpanExporter(str(path)))
+
+    with json_tracer.span("outer", kind="test"):
+        with json_tracer.span("inner"):
+            pass
+    json_tracer.shutdown()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    inner, outer = records
+    assert inner["parentSpanId"] == outer["spanId"]
+    assert inner["traceId"] == outer["traceId"]
+    assert outer["attributes"] == {"kind": "test"}
+    assert outer["status"]["code"] == "OK"
+
+
+def test_exporter_failures_do_not_break_calls():
+    class Broken(SpanExporter):
+        def export(self, span):
+            raise OSError("disk full")
+
+    broken = Tracer(Broken())
+    with broken.span("work"):
+        pass
+    assert broken.export_errors == 1
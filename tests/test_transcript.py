@@ -0,0 +1,130 @@
+"""
+Tests for the streaming transcript parser and submagic_get_transcript
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import submagic_mcp
+from submagic_mcp.http_client import build_http_client, set_http_client
+from submagic_mcp.rate_limit import RateLimiter
+from submagic_mcp.transcript import ProjectStreamParser, TranscriptWindow
+
+
+def _project(n_words=5):
+    words = []
+    t = 0.0
+    for i in range(n_words):
+        kind = "silence" if i % 4 == 3 else "word"
+        words.append({
+            "id": f"w{i}",
+            "text": "" if kind == "silence" else f"wörd{i}",
+            "type": kind,
+            "startTime": round(t, 2),
+            "endTime": round(t + 0.5, 2),
+        })
+        t += 0.5
+    return {"id": "p1", "title": "Demo", "status": "completed", "words": words, "duration": 123.25}
+
+
+def _parse(body: bytes, chunk_size: int):
+    words = []
+    parser = ProjectStreamParser(words.append)
+    for i in range(0, len(body), chunk_size):
+        parser.feed(body[i:i + chunk_size])
+    return parser.close(), words
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_parser_streams_words_across_chunk_boundaries(chunk_size):
+    project = _project(20)
+    body = json.dumps(project, ensure_ascii=False).encode("utf-8")
+
+    result, words = _parse(body, chunk_size)
+
+    assert words == project["words"]
+    assert "words" not in result
+    assert result["duration"] == 123.25
+    assert result["title"] == "Demo"
+
+
+def test_parser_handles_empty_words_and_rejects_truncation():
+    result, words = _parse(b'{"id": "p1", "words": [], "status": "processing"}', 3)
+    assert words == []
+    assert result == {"id": "p1", "status": "processing"}
+
+    parser = ProjectStreamParser(lambda word: None)
+    parser.feed(b'{"id": "p1", "words": [{"text": "a"}')
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_window_keeps_only_requested_page():
+    window = TranscriptWindow(start_time=1.0, end_time=3.0, offset=1, limit=2)
+    for word in _project(20)["words"]:
+        window(word)
+
+    assert window.total == 20
+    assert window.matched == 4
+    assert [w["id"] for w in window.segments] == ["w3", "w4"]
+    assert window.duration == 10.0
+
+
+def test_get_transcript_tool_pages(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setattr(submagic_mcp, "rate_limiter", RateLimiter())
+
+    def handler(request):
+        return httpx.Response(200, json=_project(30))
+
+    async def run():
+        set_http_client(build_http_client(transport=httpx.MockTransport(handler)))
+        try:
+            first = await submagic_mcp.submagic_get_transcript("p1", page_size=10)
+            last = await submagic_mcp.submagic_get_transcript("p1", page=3, page_size=10)
+            project = await submagic_mcp.submagic_get_project("p1")
+            return first[0].text, last[0].text, project[0].text
+        finally:
+            set_http_client(None)
+
+    first, last, project = asyncio.run(run())
+    assert "Page:** 1 of 3" in first
+    assert "wörd0" in first and "wörd10" not in first
+    assert "page=2" in first
+    assert "wörd29" in last and "More segments" not in last
+    assert "_(silence 0.50s)_" in first
+    assert "Completed" in project
+
+
+def test_transcript_pages_share_one_download_per_revision(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setattr(submagic_mcp.project_cache, "ttl", 0)
+    monkeypatch.setattr(submagic_mcp, "rate_limiter", RateLimiter())
+    project = dict(_project(30), status="processing")
+    etag = '"r1"'
+    requests = []
+
+    def handler(request):
+        requests.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, json=project, headers={"ETag": etag})
+
+    async def run():
+        set_http_client(build_http_client(transport=httpx.MockTransport(handler)))
+        try:
+            pages = [await submagic_mcp.submagic_get_transcript("p1", page=page, page_size=10) for page in (1, 2, 3)]
+            ranged = await submagic_mcp.submagic_get_transcript("p1", start_time=1.0, end_time=3.0)
+            return [p[0].text for p in pages], ranged[0].text
+        finally:
+            set_http_client(None)
+
+    (first, second, third), ranged = asyncio.run(run())
+    assert "wörd0" in first and "wörd10" in second and "wörd29" in third
+    assert "Page:** 3 of 3" in third
+    assert "(4 matching segments)" in ranged
+    # One full download; later pages of the unfinished project only revalidate it
+    assert requests == [None, etag, etag, etag]
@@ -0,0 +1,80 @@
+"""
+Tests for the transcript interval/word index and submagic_find_in_transcript
+"""
+
+import asyncio
+
+import httpx
+
+import submagic_mcp
+from submagic_mcp.http_client import build_http_client, set_http_client
+from submagic_mcp.rate_limit import RateLimiter
+from submagic_mcp.transcript_index import TranscriptIndex
+
+WORDS = [
+    {"text": "Welcome", "type": "word", "startTime": 0.0, "endTime": 0.4},
+    {"text": "to", "type": "word", "startTime": 0.4, "endTime": 0.5},
+    {"text": "the", "type": "word", "startTime": 0.5, "endTime": 0.6},
+    {"text": "Show.", "type": "word", "startTime": 0.6, "endTime": 1.0},
+    {"text": "", "type": "silence", "startTime": 1.0, "endTime": 3.5},
+    {"text": "welcome", "type": "word", "startTime": 3.5, "endTime": 3.9},
+    {"text": "back", "type": "word", "startTime": 3.9, "endTime": 4.2},
+    {"text": ",", "type": "punctuation", "startTime": 4.2, "endTime": 4.2},
+    {"text": "to", "type": "word", "startTime": 5.0, "endTime": 5.1},
+    {"text": "the", "type": "word", "startTime": 5.1, "endTime": 5.2},
+    {"text": "show", "type": "word", "startTime": 5.2, "endTime": 5.6},
+]
+
+
+def _index(words=WORDS):
+    index = TranscriptIndex()
+    for word in words:
+        index.add(word)
+    return index.finalize()
+
+
+def test_find_phrase_ignores_case_and_punctuation():
+    index = _index()
+    assert index.find_phrase("to the show") == [(0.4, 1.0), (5.0, 5.6)]
+    assert index.find_phrase("Welcome back") == [(3.5, 4.2)]
+    assert index.find_phrase("the welcome") == []
+    assert index.find_phrase("missing") == []
+
+
+def test_silence_gaps_cover_silence_segments_and_untranscribed_time():
+    index = _index()
+    assert index.silence_gaps(2.0) == [(1.0, 3.5)]
+    assert index.silence_gaps(0.5) == [(1.0, 3.5), (4.2, 5.0)]
+
+
+def test_segments_between_uses_interval_overlap():
+    index = _index(list(reversed(WORDS)))
+    assert index.text_between(0.45, 0.95) == "to the Show."
+    assert index.duration == 5.6
+
+
+def test_find_tool_indexes_completed_project_once(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setattr(submagic_mcp, "rate_limiter", RateLimiter())
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"id": "p1", "status": "completed", "words": WORDS})
+
+    async def run():
+        set_http_client(build_http_client(transport=httpx.MockTransport(handler)))
+        try:
+            first = await submagic_mcp.submagic_find_in_transcript("p1", phrase="the show")
+            second = await submagic_mcp.submagic_find_in_transcript("p1", min_silence_seconds=2)
+            invalid = await submagic_mcp.submagic_find_in_transcript("p1")
+            return first[0].text, second[0].text, invalid[0].text
+        finally:
+            set_http_client(None)
+
+    first, second, invalid = asyncio.run(run())
+    assert len(requests) == 1
+    assert "(2 matches)" in first
+    assert "| 1 | 0.50 | 1.00 |" in first
+    assert "| 1 | 1.00 | 3.50 | 2.50s |" in second
+    assert invalid.startswith("Input validation error")
@@ -0,0 +1,61 @@
+"""
+Tests for the command line options and the shared-resource lifespan
+"""
+
+import asyncio
+
+import submagic_mcp
+
+
+def test_parse_args_defaults_to_stdio(monkeypatch):
+    monkeypatch.delenv("SUBMAGIC_TRANSPORT", raising=False)
+    args = submagic_mcp.parse_args([])
+    assert args.transport == "stdio"
+    assert args.host == "127.0.0.1"
+    assert args.port == 8000
+    assert not args.stateless
+
+
+def test_parse_args_http_transport(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_PORT", "9100")
+    args = submagic_mcp.parse_args(["--transport", "streamable-http", "--stateless"])
+    assert args.transport == "streamable-http"
+    assert args.port == 9100
+    assert args.stateless
+
+
+def test_sessions_share_one_set_of_resources(monkeypatch):
+    opened = []
+    closed = []
+
+    async def fake_open():
+        opened.append(1)
+
+    async def fake_close():
+        closed.append(1)
+
+    monkeypatch.setattr(submagic_mcp, "_open_shared_resources", fake_open)
+    monkeypatch.setattr(submagic_mcp, "_close_shared_resources", fake_close)
+    monkeypatch.setattr(submagic_mcp, "_resource_lock", None)
+
+    async def session(started: asyncio.Event, release: asyncio.Event) -> None:
+        async with submagic_mcp.server_lifespan(submagic_mcp.app):
+            started.set()
+            await release.wait()
+
+    async def main():
+        release = asyncio.Event()
+        events = [asyncio.Event() for _ in range(3)]
+        tasks = [asyncio.create_task(session(e, release)) for e in events]
+        await asyncio.gather(*(e.wait() for e in events))
+        assert opened == [1] and closed == []
+        release.set()
+        await asyncio.gather(*tasks)
+        assert closed == [1]
+
+        # A later session opens them again
+        async with submagic_mcp.shared_resources():
+            pass
+        assert len(opened) == 2 and len(closed) == 2
+
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""
+Tests for the streaming multipart upload
+"""
+
+import asyncio
+import os
+from email.parser import BytesParser
+from email.policy import HTTP
+
+import httpx
+
+import submagic_mcp
+from submagic_mcp.http_client import build_http_client, set_http_client
+from submagic_mcp.rate_limit import RateLimiter
+from submagic_mcp.uploads import MultipartFileUpload
+
+
+def _parse_multipart(content_type, body):
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    return {part.get_param("name", header="content-disposition"): part for part in message.iter_parts()}
+
+
+def test_stream_matches_content_length(tmp_path):
+    path = tmp_path / "clip.mp4"
+    payload = os.urandom(300_000)
+    path.write_bytes(payload)
+    progress = []
+
+    async def on_progress(sent, total):
+        progress.append((sent, total))
+
+    upload = MultipartFileUpload(
+        str(path), {"title": "Clip", "magicZooms": "true"}, chunk_size=64 * 1024, progress=on_progress
+    )
+
+    async def collect():
+        return b"".join([chunk async for chunk in upload.stream()])
+
+    body = asyncio.run(collect())
+    assert len(body) == upload.content_length
+    parts = _parse_multipart(upload.content_type, body)
+    assert parts["title"].get_content() == "Clip"
+    assert parts["file"].get_content() == payload
+    assert parts["file"].get_content_type() == "video/mp4"
+    assert progress[-1] == (300_000, 300_000)
+    assert len(progress) == 5
+
+
+def test_upload_tool_sends_string_encoded_fields(monkeypatch, tmp_path):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setattr(submagic_mcp, "rate_limiter", RateLimiter())
+    path = tmp_path / "render.mov"
+    path.write_bytes(b"\x00" * 1024)
+    seen = {}
+
+    async def handler(request):
+        body = await request.aread()
+        seen["path"] = request.url.path
+        seen["parts"] = _parse_multipart(request.headers["content-type"], body)
+        seen["length"] = int(request.headers["content-length"]) == len(body)
+        return httpx.Response(200, json={"id": "up-1", "title": "Render", "status": "processing"})
+
+    async def run():
+        set_http_client(build_http_client(transport=httpx.MockTransport(handler)))
+        try:
+            return await submagic_mcp.submagic_upload_project(
+                title="Render", language="en", file_path=str(path),
+                dictionary=["Submagic"], magic_brolls=False, magic_brolls_percentage=40
+            )
+        finally:
+            set_http_client(None)
+
+    result = asyncio.run(run())
+    assert "up-1" in result[0].text
+    parts = seen["parts"]
+    assert seen["path"] == "/v1/projects/upload"
+    assert seen["length"]
+    assert parts["magicBrolls"].get_content() == "false"
+    assert parts["magicBrollsPercentage"].get_content() == "40"
+    assert parts["dictionary"].get_content() == '["Submagic"]'
+    assert "videoUrl" not in parts
+    assert "removeSilencePace" not in parts
+    assert parts["file"].get_content_type() == "video/quicktime"
+
+
+def test_upload_rejects_unsupported_files(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("hello")
+    result = asyncio.run(submagic_mcp.submagic_upload_project(
+        title="Bad", language="en", file_path=str(path)
+    ))
+    assert "Only MP4 and MOV files are supported" in result[0].text
@@ -0,0 +1,140 @@
+"""
+Tests for checking languages and template names against the cached catalogs
+"""
+
+import asyncio
+
+import pytest
+
+import submagic_mcp
+from submagic_mcp.cache import TTLCache
+from submagic_mcp.catalog import LANGUAGES, TEMPLATES, CatalogIndex
+from submagic_mcp.http_client import build_http_client, set_http_client
+from submagic_mcp.mock_api import LANGUAGES as MOCK_LANGUAGES
+from submagic_mcp.mock_api import TEMPLATES as MOCK_TEMPLATES
+from submagic_mcp.mock_api import MockSubmagicAPI
+
+
+@pytest.fixture
+def catalogs(monkeypatch):
+    cache = TTLCache(ttl=60)
+    monkeypatch.setattr(submagic_mcp, "catalog_cache", cache)
+    monkeypatch.setattr(submagic_mcp, "catalog_index", CatalogIndex(cache.peek))
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    return cache
+
+
+def test_index_suggestions():
+    payloads = {LANGUAGES: {"languages": MOCK_LANGUAGES}, TEMPLATES: {"templates": MOCK_TEMPLATES}}
+    index = CatalogIndex(payloads.get)
+
+    assert index.check(LANGUAGES, "en") is None
+    assert index.check(TEMPLATES, "Hormozi 2") is None
+    assert "Did you mean 'Hormozi 2'?" in index.check(TEMPLATES, "hormozi 2")
+    assert "'Hormozi 2'" in index.check(TEMPLATES, "Hormozy 2")
+    # Display names point at their code
+    assert "Did you mean 'es'?" in index.check(LANGUAGES, "spanish")
+    assert "submagic_list_languages" in index.check(LANGUAGES, "xx")
+    assert index.snapshot() == {"languages": 6, "templates": 7, "checks": 6, "rejected": 4}
+
+
+def test_index_fails_open_and_follows_refreshes():
+    payloads = {}
+    index = CatalogIndex(payloads.get)
+    assert index.check(TEMPLATES, "Anything") is None
+
+    payloads[TEMPLATES] = {"error": "Unauthorized"}
+    assert index.check(TEMPLATES, "Anything") is None
+
+    payloads[TEMPLATES] = {"templates": ["Sara"]}
+    assert index.check(TEMPLATES, "Beast") is not None
+    payloads[TEMPLATES] = {"templates": ["Sara", "Beast"]}
+    assert index.check(TEMPLATES, "Beast") is None
+
+
+def test_invalid_requests_rejected_without_api_calls(catalogs):
+    api = MockSubmagicAPI(seed=3)
+
+    async def run():
+        set_http_client(build_http_client(transport=api.transport()))
+        try:
+            submagic_mcp.start_catalog_refresh(interval=60)
+            for _ in range(50):
+                if submagic_mcp.catalog_index.values(TEMPLATES):
+                    break
+                await asyncio.sleep(0.01)
+            create = await submagic_mcp.submagic_create_project(
+                title="Demo", language="en", video_url="https://example.com/v.mp4", template_name="Hormozi 4"
+            )
+            clips = await submagic_mcp.submagic_create_magic_clips(
+                title="Clips", youtube_url="https://youtube.com/watch?v=abc", language="cmn_es"
+            )
+            batch = await submagic_mcp.submagic_create_projects_batch([
+                {"title": "One", "language": "en", "video_url": "https://example.com/1.mp4"},
+                {"title": "Two", "language": "de", "video_url": "https://example.com/2.mp4", "template_name": "sara"},
+            ])
+        finally:
+            await submagic_mcp.stop_catalog_refresh()
+            set_http_client(None)
+        return create[0].text, clips[0].text, batch[0].text
+
+    create, clips, batch = asyncio.run(run())
+
+    assert create.startswith("Input validation error")
+    assert "'Hormozi 3'" in create
+    assert clips.startswith("Input validation error") and "'cmn_en'" in clips
+    assert "Did you mean 'Sara'?" in batch
+    assert api.requests[("GET", "/languages")] == 1
+    assert api.requests[("GET", "/templates")] == 1
+    assert not any(method == "POST" for method, _ in api.requests)
+
+
+def test_valid_values_still_submitted(catalogs):
+    api = MockSubmagicAPI(seed=5)
+
+    async def run():
+        set_http_client(build_http_client(transport=api.transport()))
+        try:
+            await submagic_mcp.fetch_catalog(LANGUAGES)
+            await submagic_mcp.fetch_catalog(TEMPLATES)
+            return await submagic_mcp.submagic_create_project(
+                title="Demo", language="es", video_url="https://example.com/v.mp4", template_name="Sara",
+                remove_silence_pace="fast"
+            )
+        finally:
+            set_http_client(None)
+
+    result = asyncio.run(run())[0].text
+
+    assert "Input validation error" not in result
+    assert any(method == "POST" for method, _ in api.requests)
+
+
+def test_input_models_suggest_for_malformed_values(monkeypatch):
+    payloads = {LANGUAGES: {"languages": MOCK_LANGUAGES}, TEMPLATES: {"templates": MOCK_TEMPLATES}}
+    monkeypatch.setattr(submagic_mcp, "catalog_index", CatalogIndex(payloads.get))
+    base = {"title": "Demo", "video_url": "https://example.com/v.mp4"}
+
+    def error(model, **fields):
+        with pytest.raises(ValueError) as excinfo:
+            model(**dict(base, **fields))
+        return str(excinfo.value)
+
+    assert "Did you mean 'es'?" in error(submagic_mcp.CreateProjectInput, language="spanish")
+    assert "Did you mean 'en'?" in error(submagic_mcp.CreateProjectInput, language="EN")
+    assert "'en'" in error(submagic_mcp.CreateProjectInput, language="eng")
+    assert "Did you mean 'Sara'?" in error(submagic_mcp.CreateProjectInput, language="en", template_name="SARA")
+    clips = {"title": "Clips", "youtube_url": "https://youtube.com/watch?v=abc"}
+    with pytest.raises(ValueError, match="Did you mean 'en'"):
+        submagic_mcp.CreateMagicClipsInput(**clips, language="English")
+    # Listed codes are accepted even where the offline format check would refuse them
+    assert submagic_mcp.CreateProjectInput(**base, language="cmn_en").language == "cmn_en"
+
+
+def test_input_models_check_format_until_catalog_is_cached(monkeypatch):
+    monkeypatch.setattr(submagic_mcp, "catalog_index", CatalogIndex({}.get))
+    base = {"title": "Demo", "video_url": "https://example.com/v.mp4"}
+
+    assert submagic_mcp.CreateProjectInput(**base, language="pt-BR", template_name="Anything").language == "pt-BR"
+    with pytest.raises(ValueError, match="not a valid language code"):
+        submagic_mcp.CreateProjectInput(**base, language="English")
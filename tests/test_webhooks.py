@@ -0,0 +1,186 @@
+"""
+Tests for the webhook receiver and project event bus
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+import submagic_mcp
+from submagic_mcp.events import ProjectEventBus
+from submagic_mcp.webhooks import WebhookReceiver
+
+
+def test_wait_resolves_on_terminal_event():
+    bus = ProjectEventBus()
+
+    async def run():
+        waiter = asyncio.ensure_future(bus.wait("p1", timeout=5))
+        await asyncio.sleep(0)
+        bus.publish({"projectId": "p1", "status": "processing"})
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        bus.publish({"projectId": "p1", "status": "completed", "downloadUrl": "https://x/video.mp4"})
+        return await waiter
+
+    event = asyncio.run(run())
+    assert event["downloadUrl"] == "https://x/video.mp4"
+
+
+def test_wait_returns_latest_on_timeout():
+    bus = ProjectEventBus()
+    bus.publish({"projectId": "p1", "status": "exporting"})
+    event = asyncio.run(bus.wait("p1", timeout=0.01))
+    assert event["status"] == "exporting"
+
+
+def test_receiver_publishes_posted_payload():
+    bus = ProjectEventBus()
+    receiver = WebhookReceiver(bus, port=0, token="secret")
+
+    async def run():
+        await receiver.start()
+        base = f"http://127.0.0.1:{receiver.port}{receiver.path}"
+        try:
+            async with httpx.AsyncClient() as client:
+                denied = await client.post(base, json={"projectId": "p1", "status": "completed"})
+                ok = await client.post(
+                    f"{base}?token=secret",
+                    json={"projectId": "p1", "status": "completed", "directUrl": "https://cdn/v.mp4"}
+                )
+                missing = await client.get(f"http://127.0.0.1:{receiver.port}/other")
+        finally:
+            await receiver.stop()
+        return denied, ok, missing
+
+    denied, ok, missing = asyncio.run(run())
+    assert denied.status_code == 401
+    assert ok.status_code == 200
+    assert missing.status_code == 404
+    assert bus.latest("p1")["directUrl"] == "https://cdn/v.mp4"
+
+
+def test_wait_tool_returns_webhook_result(monkeypatch):
+    bus = ProjectEventBus()
+    receiver = WebhookReceiver(bus, port=0)
+    monkeypatch.setattr(submagic_mcp, "event_bus", bus)
+    monkeypatch.setattr(submagic_mcp, "webhook_receiver", receiver)
+
+    async def run():
+        await receiver.start()
+        try:
+            asyncio.get_running_loop().call_later(
+                0.05, bus.publish, {"projectId": "p1", "status": "completed", "downloadUrl": "https://dl"}
+            )
+            return await submagic_mcp.submagic_wait_for_project("p1", timeout_seconds=5)
+        finally:
+            await receiver.stop()
+
+    result = asyncio.run(run())
+    assert "completed" in result[0].text
+    assert "https://dl" in result[0].text
+
+
+def test_wait_tool_polls_without_receiver(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setenv("SUBMAGIC_POLL_MIN_INTERVAL", "0.01")
+    monkeypatch.setenv("SUBMAGIC_POLL_MAX_INTERVAL", "0.01")
+    monkeypatch.setattr(submagic_mcp, "webhook_receiver", None)
+    monkeypatch.setattr(submagic_mcp, "event_bus", ProjectEventBus())
+    statuses = iter(["transcribing", "transcribing", "exporting", "completed"])
+
+    def handler(request):
+        return httpx.Response(200, json={
+            "id": "p1", "status": next(statuses), "directUrl": "https://cdn/v.mp4", "words": []
+        })
+
+    class _Ctx:
+        def __init__(self):
+            self.messages = []
+
+        async def report_progress(self, progress, total=None, message=None):
+            self.messages.append(message)
+
+    ctx = _Ctx()
+
+    async def run():
+        from submagic_mcp.http_client import build_http_client, set_http_client
+        set_http_client(build_http_client(transport=httpx.MockTransport(handler)))
+        try:
+            return await submagic_mcp.submagic_wait_for_project("p1", timeout_seconds=10, ctx=ctx)
+        finally:
+            set_http_client(None)
+
+    result = asyncio.run(run())
+    assert "completed" in result[0].text
+    assert ctx.messages == ["Project p1: transcribing", "Project p1: exporting", "Project p1: completed"]
+
+
+def test_export_wait_does_not_spin_on_cached_terminal_event(monkeypatch):
+    monkeypatch.setenv("SUBMAGIC_API_KEY", "sk-test")
+    monkeypatch.setenv("SUBMAGIC_WEBHOOK_FALLBACK_POLL", "0.1")
+    bus = ProjectEventBus()
+    receiver = WebhookReceiver(bus, port=0)
+    monkeypatch.setattr(submagic_mcp, "event_bus", bus)
+    monkeypatch.setattr(submagic_mcp, "webhook_receiver", receiver)
+    # Processing finished but the export has no download URL yet
+    bus.publish({"projectId": "p1", "status": "completed"})
+    gets = 0
+
+    def handler(request):
+        nonlocal gets
+        gets += 1
+        return httpx.Response(200, json={"id": "p1", "status": "completed"})
+
+    async def run():
+        from submagic_mcp.http_client import build_http_client, set_http_client
+        set_http_client(build_http_client(transport=httpx.MockTransport(handler)))
+        await receiver.start()
+        try:
+            return await submagic_mcp.wait_for_project("p1", timeout=1.0, until=submagic_mcp.export_ready)
+        finally:
+            await receiver.stop()
+            set_http_client(None)
+
+    assert asyncio.run(run()) is None
+    assert 1 <= gets <= 3
+
+
+def test_receiver_requires_token_off_loopback():
+    receiver = WebhookReceiver(ProjectEventBus(), host="0.0.0.0", port=0)
+    with pytest.raises(ValueError, match="SUBMAGIC_WEBHOOK_TOKEN"):
+        asyncio.run(receiver.start())
+    assert not receiver.running
+
+
+def test_receiver_limits_slow_and_oversized_requests():
+    from submagic_mcp.webhooks import MAX_BODY_BYTES
+
+    bus = ProjectEventBus()
+    receiver = WebhookReceiver(bus, port=0, token="secret", read_timeout=0.2)
+
+    async def raw(data):
+        reader, writer = await asyncio.open_connection("127.0.0.1", receiver.port)
+        writer.write(data)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        return response.split(b"\r\n", 1)[0]
+
+    async def run():
+        await receiver.start()
+        try:
+            slow = await raw(b"POST /webhook/submagic?token=secret HTTP/1.1\r\nContent-Length: 10\r\n")
+            big = await raw(
+                f"POST /webhook/submagic?token=secret HTTP/1.1\r\nContent-Length: {MAX_BODY_BYTES + 1}\r\n\r\n".encode()
+            )
+            wrong = await raw(b"POST /webhook/submagic?token=secreT HTTP/1.1\r\nContent-Length: 0\r\n\r\n")
+        finally:
+            await receiver.stop()
+        return slow, big, wrong
+
+    slow, big, wrong = asyncio.run(run())
+    assert slow == b"HTTP/1.1 408 Request Timeout"
+    assert big == b"HTTP/1.1 413 Payload Too Large"
+    assert wrong == b"HTTP/1.1 401 Unauthorized"